@@ -2,11 +2,19 @@ import json
 import os
 import random
 from core.Agente import Agente
-from core.Accao import Accao
+from core.BufferReplay import BufferReplay
+from core.ModeloDyna import ModeloDyna
+from core.TracosElegibilidade import TracosElegibilidade
+from core.Sensor import estado_de_texto, estado_para_texto
+from core.Accao import ACCOES, BITS_MOVIMENTO, CODIGOS_ACCOES, NOMES_ACCOES, N, S, E, O, F
 
 
 class AgenteFarol(Agente):
-    def __init__(self, nome, modo="teste", ficheiro_qtable=None, epsilon=0.2, alpha=0.5, gamma=0.9, epsilon_min=0.05, epsilon_decay=0.99):
+    def __init__(self, nome, modo="teste", ficheiro_qtable=None, epsilon=0.2, alpha=0.5, gamma=0.9, epsilon_min=0.05, epsilon_decay=0.99,
+                 replay_capacidade=0, replay_lote=32, replay_a_cada=1,
+                 planeamento=0, limiar_prioridade=1e-4,
+                 lambda_tracos=0.0, tipo_tracos="q_lambda", limiar_traco=1e-3, max_tracos=500,
+                 codificador_estado=None, sensores=None):
         super().__init__(nome)
         self.modo = modo  # "aprendizagem", "teste" ou "fixo"
         self.q_table = {}
@@ -25,22 +33,50 @@ class AgenteFarol(Agente):
             self.epsilon_decay = epsilon_decay
             self.alpha = alpha
         self.gamma = gamma
-        self.accoes = ["N", "S", "E", "O", "F"]
+        self.accoes = [N, S, E, O, F]
+        # Experience replay opcional (0 = desativado); so faz sentido a aprender
+        self.replay = None
+        if replay_capacidade > 0 and self.modo == "aprendizagem":
+            self.replay = BufferReplay(replay_capacidade, replay_lote, replay_a_cada)
+        # Dyna-Q / prioritized sweeping: N atualizacoes planeadas por passo real (0 = desativado)
+        self.modelo = None
+        if planeamento > 0 and self.modo == "aprendizagem":
+            self.modelo = ModeloDyna(planeamento, limiar_prioridade)
+        # Q(lambda)/SARSA(lambda) com tracos esparsos (lambda 0 = Q-learning de um passo)
+        self.tracos = None
+        self._sarsa_pendente = None
+        self._explorou = False
+        if lambda_tracos > 0 and self.modo == "aprendizagem":
+            self.tracos = TracosElegibilidade(lambda_tracos, gamma, tipo_tracos, limiar_traco, max_tracos)
+            if self.replay is not None or self.modelo is not None:
+                raise ValueError("Tracos de elegibilidade (lambda) nao se combinam com replay nem planeamento")
+        # funcao observacao -> estado (por omissao _estado); memorizada em cada Observacao
+        self.codificar_estado = codificador_estado or self._estado
+        for sensor in sensores or []:
+            if self.modo == "fixo":
+                raise ValueError("A heuristica do modo fixo usa a observacao global; sem sensores")
+            self.instala(sensor)
         self._carregar_politica()
 
     def _estado(self, obs):
+        if self.sensores:
+            # observacao parcial: leituras dos sensores e movimentos livres
+            return self.leituras(obs) + (obs.get("mascara_movimentos"),)
         dx, dy = obs["dir_farol"]
-        mov_validos = obs.get("movimentos_validos", [])
+        mascara = obs.get("mascara_movimentos")
 
         sx = 1 if dx > 0 else -1 if dx < 0 else 0
         sy = 1 if dy > 0 else -1 if dy < 0 else 0
 
         # frente Ç¸ a direÇõÇœo que mais aproxima do farol
         if abs(dx) > abs(dy):
-            frente = "E" if dx > 0 else "O"
+            frente = E if dx > 0 else O
+        else:
+            frente = S if dy > 0 else N
+        if mascara is not None:
+            frente_livre = bool(mascara & BITS_MOVIMENTO[frente])
         else:
-            frente = "S" if dy > 0 else "N"
-        frente_livre = frente in mov_validos
+            frente_livre = frente in obs.get("movimentos_validos", [])
 
         return (sx, sy, frente_livre)
 
@@ -48,30 +84,31 @@ class AgenteFarol(Agente):
         dx_sign, dy_sign, frente_livre = estado
         # Se já está alinhado ao farol, fica parado para não ser penalizado
         if dx_sign == 0 and dy_sign == 0:
-            return "F"
+            return F
         if frente_livre:
             if abs(dx_sign) > abs(dy_sign):
-                candidato = "E" if dx_sign > 0 else "O"
+                candidato = E if dx_sign > 0 else O
             else:
-                candidato = "S" if dy_sign > 0 else "N"
+                candidato = S if dy_sign > 0 else N
             if candidato in mov_validos:
                 return candidato
-        return mov_validos[0] if mov_validos else "F"
+        return mov_validos[0] if mov_validos else F
 
     def _escolher_accao(self, estado, mov_validos):
         if self.modo == "fixo":
             return self._accao_fixa(estado, mov_validos)
 
         if self.modo == "aprendizagem" and random.random() < self.epsilon:
+            self._explorou = True
             # ExploraÇõÇœo: escolhe uma aÇõÇœo vÇ­lida aleatÇüria (ou F)
-            candidatas = [a for a in self.accoes if (a in mov_validos) or a == "F"]
-            return random.choice(candidatas) if candidatas else "F"
+            candidatas = [a for a in self.accoes if (a in mov_validos) or a == F]
+            return random.choice(candidatas) if candidatas else F
 
         # ExploitaÇõÇœo: escolhe melhor Q
         melhor_accao = None
         melhor_q = -float("inf")
         for a in self.accoes:
-            if a != "F" and a not in mov_validos:
+            if a != F and a not in mov_validos:
                 continue
             q = self.q_table.get((estado, a), 0.0)
             if q > melhor_q:
@@ -80,20 +117,23 @@ class AgenteFarol(Agente):
 
         if melhor_accao is None:
             # sem info, tenta vÇ­lida ou fica
-            return mov_validos[0] if mov_validos else "F"
+            return mov_validos[0] if mov_validos else F
         return melhor_accao
 
     def age(self):
         obs = self.ultima_observacao.dados
-        estado = self._estado(obs)
+        estado = self.ultima_observacao.memo(self.codificar_estado)
         mov_validos = obs.get("movimentos_validos", [])
 
-        accao_tipo = self._escolher_accao(estado, mov_validos)
+        self._explorou = False
+        codigo = self._escolher_accao(estado, mov_validos)
+        if self.tracos is not None:
+            self._concluir_passo_tracos(estado, codigo)
 
         self.ultimo_estado = estado
-        self.ultima_accao = accao_tipo
+        self.ultima_accao = codigo
 
-        return Accao(accao_tipo)
+        return ACCOES[codigo]
 
     def avaliacaoEstadoAtual(self, recompensa: float, nova_observacao=None, terminou: bool = False):
         if self.modo != "aprendizagem":
@@ -101,25 +141,79 @@ class AgenteFarol(Agente):
         if self.ultimo_estado is None or self.ultima_accao is None:
             return
 
-        prox_estado = self._estado(nova_observacao.dados) if nova_observacao else self.ultimo_estado
+        prox_estado = nova_observacao.memo(self.codificar_estado) if nova_observacao else self.ultimo_estado
 
-        max_q_prox = 0.0
-        if not terminou:
-            max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
+        if self.tracos is not None:
+            self._aprender_com_tracos(recompensa, prox_estado, terminou)
+        else:
+            max_q_prox = 0.0
+            if not terminou:
+                max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
 
-        chave = (self.ultimo_estado, self.ultima_accao)
-        q_atual = self.q_table.get(chave, 0.0)
+            chave = (self.ultimo_estado, self.ultima_accao)
+            q_atual = self.q_table.get(chave, 0.0)
+
+            novo_q = q_atual + self.alpha * (recompensa + self.gamma * max_q_prox - q_atual)
+            self.q_table[chave] = novo_q
 
-        novo_q = q_atual + self.alpha * (recompensa + self.gamma * max_q_prox - q_atual)
-        self.q_table[chave] = novo_q
+            if self.replay is not None and self.replay.guardar(self.ultimo_estado, self.ultima_accao, recompensa, prox_estado, terminou):
+                self.replay.atualizar_lote(self.q_table, self.accoes, self.alpha, self.gamma)
+            if self.modelo is not None:
+                self.modelo.observar(self.q_table, self.accoes, self.gamma, self.ultimo_estado, self.ultima_accao, recompensa, prox_estado, terminou)
+                self.modelo.planear(self.q_table, self.accoes, self.alpha, self.gamma)
 
         # Decaimento de exploraÇõÇœo
         self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
 
+    def _aprender_com_tracos(self, recompensa, prox_estado, terminou):
+        chave = (self.ultimo_estado, self.ultima_accao)
+        if terminou:
+            erro = recompensa - self.q_table.get(chave, 0.0)
+            self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+            self.tracos.limpar()
+        elif self.tracos.tipo == "sarsa_lambda":
+            # o alvo depende da proxima accao: a atualizacao fica para o proximo age()
+            self._sarsa_pendente = (chave, recompensa, prox_estado)
+        else:
+            max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
+            erro = recompensa + self.gamma * max_q_prox - self.q_table.get(chave, 0.0)
+            self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+
+    def _concluir_passo_tracos(self, estado, codigo):
+        """
+        Chamado em age() quando ja se conhece a accao seguinte:
+        SARSA(lambda) aplica a atualizacao pendente; Q(lambda) corta os tracos
+        se a accao escolhida foi exploratoria (Watkins).
+        """
+        if self._sarsa_pendente is not None:
+            chave, recompensa, _ = self._sarsa_pendente
+            self._sarsa_pendente = None
+            erro = recompensa + self.gamma * self.q_table.get((estado, codigo), 0.0) - self.q_table.get(chave, 0.0)
+            self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+        elif self._explorou and self.tracos.tipo == "q_lambda":
+            self.tracos.limpar()
+
+    def _fechar_sarsa_pendente(self):
+        """
+        Episodio cortado (max_passos ou corte) com uma atualizacao SARSA(lambda) pendente:
+        o estado seguinte nao e terminal, por isso faz bootstrap; como a accao seguinte
+        ja nao chega a ser escolhida, usa a greedy (max Q no estado seguinte).
+        """
+        if self._sarsa_pendente is None:
+            return
+        chave, recompensa, prox_estado = self._sarsa_pendente
+        self._sarsa_pendente = None
+        max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
+        erro = recompensa + self.gamma * max_q_prox - self.q_table.get(chave, 0.0)
+        self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+
     def reset(self):
         super().reset()
+        self._fechar_sarsa_pendente()
         self.ultimo_estado = None
         self.ultima_accao = None
+        if self.tracos is not None:
+            self.tracos.limpar()
 
     def _carregar_politica(self):
         if self.ficheiro_qtable and os.path.exists(self.ficheiro_qtable):
@@ -127,6 +221,10 @@ class AgenteFarol(Agente):
                 dados = json.load(f)
             # Q-table guardada como dict de strings -> float
             for chave_str, valor in dados.items():
+                if self.sensores:
+                    estado_str, accao = chave_str.rsplit("|", 1)
+                    self.q_table[(estado_de_texto(estado_str), CODIGOS_ACCOES[accao])] = valor
+                    continue
                 estado_str, accao = chave_str.split("|")
                 partes = estado_str.split(",")
                 if len(partes) == 3:
@@ -134,16 +232,19 @@ class AgenteFarol(Agente):
                     sy = int(partes[1])
                     frente_livre = partes[2] == "1"
                     estado = (sx, sy, frente_livre)
-                    self.q_table[(estado, accao)] = valor
+                    self.q_table[(estado, CODIGOS_ACCOES[accao])] = valor
 
     def guardar_politica(self):
         if not self.ficheiro_qtable or self.modo in ["teste", "fixo"]:
             return
         serializado = {}
         for (estado, accao), valor in self.q_table.items():
+            if self.sensores:
+                serializado[f"{estado_para_texto(estado)}|{NOMES_ACCOES[accao]}"] = valor
+                continue
             sx, sy, frente_livre = estado
             estado_str = f"{sx},{sy},{1 if frente_livre else 0}"
-            serializado[f"{estado_str}|{accao}"] = valor
+            serializado[f"{estado_str}|{NOMES_ACCOES[accao]}"] = valor
 
         with open(self.ficheiro_qtable, "w", encoding="utf-8") as f:
             json.dump(serializado, f, ensure_ascii=False, indent=2)
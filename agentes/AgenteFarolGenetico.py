@@ -1,11 +1,13 @@
 import json
 import os
 import random
+from collections import OrderedDict
 from core.Agente import Agente
-from core.Accao import Accao
+from core.Genetico import MetodosGeneticos
+from core.Accao import ACCOES, BITS_MOVIMENTO, CODIGOS_ACCOES, CODIGOS_MOVIMENTO, NOMES_ACCOES, N, S, E, O, F
 
 
-class AgenteFarolGenetico(Agente):
+class AgenteFarolGenetico(MetodosGeneticos, Agente):
     """
     Agente que aprende uma política para o ambiente do Farol com um algoritmo genético.
     Cada cromossoma associa um estado (dx, dy, frente_livre) a uma ação {N,S,E,O,F}.
@@ -29,6 +31,8 @@ class AgenteFarolGenetico(Agente):
         tamanho_torneio=3,
         stall_max=2,
         heuristic_seeds=1,
+        cache_fitness=0,
+        codificador_estado=None,
     ):
         super().__init__(nome)
         self.modo = modo  # "aprendizagem" ou "teste"
@@ -46,8 +50,22 @@ class AgenteFarolGenetico(Agente):
         self.tamanho_torneio = max(2, tamanho_torneio)
         self.stall_max = max(1, stall_max)
         self.heuristic_seeds = max(0, heuristic_seeds)
-
-        self.possiveis_accoes = ["N", "S", "E", "O", "F"]
+        # cache LRU de fitness: (genoma, cenario) -> fitness; 0 desativa
+        self.cache_fitness_tamanho = max(0, cache_fitness)
+        self.cache_fitness = OrderedDict()
+        self.cenario = None
+        self.geracao = 0
+        self.consultas_cache = 0
+        self.acertos_cache = 0
+        self.historico_cache = []
+        # fitness de cada geracao avaliada: {"geracao", "melhor", "media"}
+        self.historico_fitness = []
+        # o individuo atual ja fez alguma escolha aleatoria (o fitness nao vai para a cache)
+        self.fitness_aleatorio = False
+        # algum episodio do individuo atual foi cortado pelo motor (idem)
+        self.fitness_cortado = False
+
+        self.possiveis_accoes = [N, S, E, O, F]
         self.estados_possiveis = [(sx, sy, frente) for sx in (-1, 0, 1) for sy in (-1, 0, 1) for frente in (False, True)]
 
         self.populacao = []
@@ -66,6 +84,13 @@ class AgenteFarolGenetico(Agente):
         self.ultima_distancia = 0
         self.ultima_posicao = None
         self.stall_count = 0
+        # fitness do pior elite da ultima geracao (usado no corte antecipado)
+        self.limiar_elite = None
+        # elite da ultima geracao avaliada [(genoma, fitness)], usada na migracao entre ilhas
+        self.ultima_elite = []
+
+        # funcao observacao -> estado (por omissao _estado); memorizada em cada Observacao
+        self.codificar_estado = codificador_estado or self._estado
 
         self._inicializar_populacao()
 
@@ -104,45 +129,45 @@ class AgenteFarolGenetico(Agente):
         gen = {}
         for (sx, sy, frente_livre) in self.estados_possiveis:
             if sx == 0 and sy == 0:
-                gen[(sx, sy, frente_livre)] = "F"
+                gen[(sx, sy, frente_livre)] = F
                 continue
             if frente_livre:
                 # prioridade ao eixo dominante
                 if abs(sx) >= abs(sy):
-                    gen[(sx, sy, frente_livre)] = "E" if sx > 0 else "O"
+                    gen[(sx, sy, frente_livre)] = E if sx > 0 else O
                 else:
-                    gen[(sx, sy, frente_livre)] = "S" if sy > 0 else "N"
+                    gen[(sx, sy, frente_livre)] = S if sy > 0 else N
             else:
                 # se frente bloqueada, tenta outro eixo ou fica
                 if sx != 0:
-                    gen[(sx, sy, frente_livre)] = "S" if sy > 0 else "N" if sy < 0 else ("E" if sx > 0 else "O")
+                    gen[(sx, sy, frente_livre)] = S if sy > 0 else N if sy < 0 else (E if sx > 0 else O)
                 elif sy != 0:
-                    gen[(sx, sy, frente_livre)] = "E" if sx > 0 else "O"
+                    gen[(sx, sy, frente_livre)] = E if sx > 0 else O
                 else:
-                    gen[(sx, sy, frente_livre)] = "F"
+                    gen[(sx, sy, frente_livre)] = F
         return gen
 
     def _acao_heuristica(self, estado, mov_validos):
         sx, sy, frente_livre = estado
         if sx == 0 and sy == 0:
-            return "F"
+            return F
         if frente_livre:
             if abs(sx) >= abs(sy):
-                preferida = "E" if sx > 0 else "O"
+                preferida = E if sx > 0 else O
             else:
-                preferida = "S" if sy > 0 else "N"
+                preferida = S if sy > 0 else N
             if preferida in mov_validos:
                 return preferida
         # fallback: tenta eixo alternativo
         alternativas = []
         if sx != 0:
-            alternativas.append("E" if sx > 0 else "O")
+            alternativas.append(E if sx > 0 else O)
         if sy != 0:
-            alternativas.append("S" if sy > 0 else "N")
+            alternativas.append(S if sy > 0 else N)
         for alt in alternativas:
             if alt in mov_validos:
                 return alt
-        return mov_validos[0] if mov_validos else "F"
+        return mov_validos[0] if mov_validos else F
 
     def _carregar_genoma(self, caminho):
         if not caminho or not os.path.exists(caminho):
@@ -154,23 +179,27 @@ class AgenteFarolGenetico(Agente):
             try:
                 sx, sy, frente = estado_str.split(",")
                 estado = (int(sx), int(sy), frente == "1")
-                if accao in self.possiveis_accoes:
-                    genoma[estado] = accao
+                codigo = CODIGOS_ACCOES.get(accao)
+                if codigo in self.possiveis_accoes:
+                    genoma[estado] = codigo
             except ValueError:
                 continue
         return genoma if genoma else None
 
     def _estado(self, obs):
         dx, dy = obs["dir_farol"]
-        mov_validos = obs.get("movimentos_validos", [])
+        mascara = obs.get("mascara_movimentos")
         sx = 1 if dx > 0 else -1 if dx < 0 else 0
         sy = 1 if dy > 0 else -1 if dy < 0 else 0
         frente = None
         if abs(dx) > abs(dy):
-            frente = "E" if dx > 0 else "O"
+            frente = E if dx > 0 else O
         else:
-            frente = "S" if dy > 0 else "N"
-        frente_livre = frente in mov_validos
+            frente = S if dy > 0 else N
+        if mascara is not None:
+            frente_livre = bool(mascara & BITS_MOVIMENTO[frente])
+        else:
+            frente_livre = frente in obs.get("movimentos_validos", [])
         return (sx, sy, frente_livre)
 
     def _genoma_atual(self):
@@ -182,7 +211,7 @@ class AgenteFarolGenetico(Agente):
     def _acao_para_estado(self, estado, mov_validos):
         genoma = self._genoma_atual()
         accao = genoma.get(estado)
-        if accao in ["N", "S", "E", "O"] and accao not in mov_validos:
+        if accao in CODIGOS_MOVIMENTO and accao not in mov_validos:
             accao = None
         if self.stall_count >= self.stall_max:
             # heuristica de desbloqueio: tenta aproximar do farol
@@ -192,13 +221,17 @@ class AgenteFarolGenetico(Agente):
         if accao is None:
             if mov_validos:
                 accao = random.choice(mov_validos)
+                self.fitness_aleatorio = True
             else:
-                accao = "F"
-        return Accao(accao)
+                accao = F
+        return ACCOES[accao]
 
     def age(self):
         obs = self.ultima_observacao.dados
-        estado = self._estado(obs)
+        if not self.episodio_ativo:
+            # cenario do episodio: posicao inicial e posicao relativa do farol
+            self.cenario = (tuple(obs["posicao"]), tuple(obs["dir_farol"]))
+        estado = self.ultima_observacao.memo(self.codificar_estado)
         mov_validos = obs.get("movimentos_validos", [])
         return self._acao_para_estado(estado, mov_validos)
 
@@ -233,10 +266,7 @@ class AgenteFarolGenetico(Agente):
         super().reset()
         self._finalizar_episodio()
 
-    def _finalizar_episodio(self):
-        if not self.episodio_ativo:
-            return
-
+    def _fitness_episodio(self):
         fitness = self.recompensa_ep
         if self.teve_sucesso:
             fitness += self.bonus_sucesso
@@ -244,17 +274,20 @@ class AgenteFarolGenetico(Agente):
             fitness -= self.penalizacao_passos * self.passos_ep
         if not self.teve_sucesso and self.penalizacao_distancia > 0:
             fitness -= self.penalizacao_distancia * self.ultima_distancia
+        return fitness
 
+    def _finalizar_episodio(self):
+        if not self.episodio_ativo:
+            return
+
+        fitness = self._fitness_episodio()
         self.acumulado_fitness_individuo += fitness
         self.ep_avaliados_individuo += 1
 
         if self.ep_avaliados_individuo >= self.episodios_por_individuo:
             fitness_medio = self.acumulado_fitness_individuo / self.episodios_por_individuo
-            self.fitnesses[self.indice_genoma_atual] = fitness_medio
-
-            if fitness_medio > self.melhor_fitness:
-                self.melhor_fitness = fitness_medio
-                self.melhor_genoma = dict(self._genoma_atual())
+            self._atribuir_fitness(fitness_medio)
+            self._guardar_fitness_cache(self._genoma_atual(), fitness_medio)
 
             self.avaliados_na_geracao += 1
             # modo teste: não evolui, mantém sempre o melhor genoma carregado
@@ -266,7 +299,12 @@ class AgenteFarolGenetico(Agente):
             # se terminámos avaliação de um indivíduo, reset contadores
             self.acumulado_fitness_individuo = 0.0
             self.ep_avaliados_individuo = 0
+            self.fitness_aleatorio = False
+            self.fitness_cortado = False
+
+        self._limpar_episodio()
 
+    def _limpar_episodio(self):
         self.recompensa_ep = 0.0
         self.passos_ep = 0
         self.teve_sucesso = False
@@ -281,15 +319,23 @@ class AgenteFarolGenetico(Agente):
         if self.indice_genoma_atual >= len(self.populacao):
             self._evoluir()
             self.indice_genoma_atual = 0
+        self._saltar_individuos_em_cache()
 
     def _evoluir(self):
+        self._registar_geracao_cache()
+        self.geracao += 1
         avaliados = list(zip(self.populacao, self.fitnesses))
         avaliados.sort(key=lambda par: par[1], reverse=True)
+        self._registar_geracao_fitness(avaliados)
 
         if avaliados and avaliados[0][1] > self.melhor_fitness:
             self.melhor_fitness = avaliados[0][1]
             self.melhor_genoma = dict(avaliados[0][0])
 
+        if avaliados:
+            self.limiar_elite = avaliados[min(self.elitismo, len(avaliados)) - 1][1]
+        self.ultima_elite = avaliados[: self.elitismo]
+
         nova_populacao = [dict(g) for g, _ in avaliados[: self.elitismo]]
 
         while len(nova_populacao) < self.populacao_tamanho:
@@ -304,6 +350,19 @@ class AgenteFarolGenetico(Agente):
         self.fitnesses = [0.0 for _ in self.populacao]
         self.avaliados_na_geracao = 0
 
+    def acolher_migrantes(self, genomas):
+        """
+        Modelo de ilhas: os genomas recebidos substituem os ultimos individuos
+        da populacao que ainda nao foram avaliados nesta geracao.
+        """
+        pos = len(self.populacao) - 1
+        for genoma in genomas:
+            if pos <= self.indice_genoma_atual:
+                break
+            self.populacao[pos] = dict(genoma)
+            self.fitnesses[pos] = 0.0
+            pos -= 1
+
     def _selecionar(self, avaliados):
         if not avaliados:
             return self._novo_genoma()
@@ -335,6 +394,6 @@ class AgenteFarolGenetico(Agente):
     def guardar_politica(self):
         if not self.ficheiro_genoma or not self.melhor_genoma:
             return
-        serializado = {f"{sx},{sy},{1 if frente else 0}": accao for (sx, sy, frente), accao in self.melhor_genoma.items()}
+        serializado = {f"{sx},{sy},{1 if frente else 0}": NOMES_ACCOES[accao] for (sx, sy, frente), accao in self.melhor_genoma.items()}
         with open(self.ficheiro_genoma, "w", encoding="utf-8") as f:
             json.dump(serializado, f, ensure_ascii=False, indent=2)
@@ -2,7 +2,11 @@ import json
 import os
 import random
 from core.Agente import Agente
-from core.Accao import Accao
+from core.BufferReplay import BufferReplay
+from core.ModeloDyna import ModeloDyna
+from core.TracosElegibilidade import TracosElegibilidade
+from core.Sensor import estado_de_texto, estado_para_texto
+from core.Accao import ACCOES, CODIGOS_ACCOES, CODIGOS_MOVIMENTO, NOMES_ACCOES, N, S, E, O, F, APANHAR, DEPOSITAR
 
 
 def _dist_manhattan(p1, p2):
@@ -24,6 +28,18 @@ class AgenteForaging(Agente):
         gamma=0.9,
         epsilon_min=0.05,
         epsilon_decay=0.99,
+        replay_capacidade=0,
+        replay_lote=32,
+        replay_a_cada=1,
+        planeamento=0,
+        limiar_prioridade=1e-4,
+        lambda_tracos=0.0,
+        tipo_tracos="q_lambda",
+        limiar_traco=1e-3,
+        max_tracos=500,
+        codificador_estado=None,
+        sensores=None,
+        coordenar=False,
     ):
         super().__init__(nome)
         self.modo = modo  # "aprendizagem", "teste" ou "fixo"
@@ -42,14 +58,45 @@ class AgenteForaging(Agente):
             self.epsilon_decay = epsilon_decay
             self.alpha = alpha
         self.gamma = gamma
-        self.accoes = ["N", "S", "E", "O", "F", "APANHAR", "DEPOSITAR"]
+        self.accoes = [N, S, E, O, F, APANHAR, DEPOSITAR]
+        # Experience replay opcional (0 = desativado); so faz sentido a aprender
+        self.replay = None
+        if replay_capacidade > 0 and self.modo == "aprendizagem":
+            self.replay = BufferReplay(replay_capacidade, replay_lote, replay_a_cada)
+        # Dyna-Q / prioritized sweeping: N atualizacoes planeadas por passo real (0 = desativado)
+        self.modelo = None
+        if planeamento > 0 and self.modo == "aprendizagem":
+            self.modelo = ModeloDyna(planeamento, limiar_prioridade)
+        # Q(lambda)/SARSA(lambda) com tracos esparsos (lambda 0 = Q-learning de um passo)
+        self.tracos = None
+        self._sarsa_pendente = None
+        self._explorou = False
+        if lambda_tracos > 0 and self.modo == "aprendizagem":
+            self.tracos = TracosElegibilidade(lambda_tracos, gamma, tipo_tracos, limiar_traco, max_tracos)
+            if self.replay is not None or self.modelo is not None:
+                raise ValueError("Tracos de elegibilidade (lambda) nao se combinam com replay nem planeamento")
+        # funcao observacao -> estado (por omissao _estado); memorizada em cada Observacao
+        self.codificar_estado = codificador_estado or self._estado
+        for sensor in sensores or []:
+            if self.modo == "fixo":
+                raise ValueError("A heuristica do modo fixo usa a observacao global; sem sensores")
+            self.instala(sensor)
+        # modo fixo com coordenacao: anuncia o recurso para onde vai e evita os
+        # recursos anunciados por agentes mais perto deles
+        self.coordenar = coordenar
+        self.reclamados = {}  # recurso -> (distancia anunciada, nome do agente, passo em que chegou)
+        self._meu_alvo = None
+        self._passos = 0
         self._carregar_politica()
 
     def _estado(self, obs):
         """
         Estado compacto: posicao (x,y), a_carregar, recurso_aqui, ninho_aqui,
         direcao do recurso mais proximo em sinais (dx_sign, dy_sign).
+        Com sensores: a_carregar e as leituras dos sensores (observacao parcial).
         """
+        if self.sensores:
+            return (int(obs.get("a_carregar", False)),) + self.leituras(obs)
         pos = obs["posicao"]
         recursos = obs.get("recursos", [])
         ninhos = obs.get("ninhos", [])
@@ -77,54 +124,92 @@ class AgenteForaging(Agente):
         recursos = obs.get("recursos", [])
         ninhos = obs.get("ninhos", [])
         a_carregar = obs.get("a_carregar", False)
+        self._passos += 1
 
         if a_carregar:
+            if self.coordenar and self._meu_alvo is not None:
+                # ja apanhou: liberta o reclamo
+                self._meu_alvo = None
+                self.envia({"tipo": "reclamo", "recurso": None})
             if pos in ninhos:
-                return Accao("DEPOSITAR")
+                return ACCOES[DEPOSITAR]
             destino = min(ninhos, key=lambda n: _dist_manhattan(pos, n)) if ninhos else pos
         else:
             if pos in recursos:
-                return Accao("APANHAR")
-            destino = min(recursos, key=lambda r: _dist_manhattan(pos, r)) if recursos else pos
+                return ACCOES[APANHAR]
+            if self.coordenar:
+                destino = self._alvo_coordenado(pos, recursos)
+            else:
+                destino = min(recursos, key=lambda r: _dist_manhattan(pos, r)) if recursos else pos
 
         if destino == pos:
-            return Accao("F")
+            return ACCOES[F]
 
         dx = destino[0] - pos[0]
         dy = destino[1] - pos[1]
         candidatos = []
         if dx > 0:
-            candidatos.append("E")
+            candidatos.append(E)
         if dx < 0:
-            candidatos.append("O")
+            candidatos.append(O)
         if dy > 0:
-            candidatos.append("S")
+            candidatos.append(S)
         if dy < 0:
-            candidatos.append("N")
+            candidatos.append(N)
 
         for c in candidatos:
             if c in mov_validos:
-                return Accao(c)
+                return ACCOES[c]
 
         if mov_validos:
-            return Accao(mov_validos[0])
-        return Accao("F")
+            return ACCOES[mov_validos[0]]
+        return ACCOES[F]
+
+    def _alvo_coordenado(self, pos, recursos):
+        """
+        Recurso mais proximo que nenhum agente mais perto dele reclamou (se todos
+        estiverem reclamados, o mais proximo); anuncia-o quando muda.
+        """
+        def livre(r):
+            reclamo = self.reclamados.get(r)
+            if reclamo is None:
+                return True
+            # o outro agente foi-se aproximando desde o anuncio (um passo por passo)
+            distancia, nome, recebido = reclamo
+            return (_dist_manhattan(pos, r), self.nome) < (max(0, distancia - (self._passos - recebido)), nome)
+
+        candidatos = [r for r in recursos if livre(r)] or recursos
+        destino = min(candidatos, key=lambda r: _dist_manhattan(pos, r)) if candidatos else pos
+        alvo = destino if destino != pos else None
+        if alvo != self._meu_alvo:
+            self._meu_alvo = alvo
+            self.envia({"tipo": "reclamo", "recurso": alvo, "distancia": _dist_manhattan(pos, destino)})
+        return destino
+
+    def comunica(self, mensagem, de_agente):
+        if not isinstance(mensagem, dict) or mensagem.get("tipo") != "reclamo":
+            return
+        # cada agente reclama no maximo um recurso: o novo anuncio substitui o anterior
+        self.reclamados = {r: c for r, c in self.reclamados.items() if c[1] != de_agente.nome}
+        if mensagem.get("recurso") is not None:
+            self.reclamados[tuple(mensagem["recurso"])] = (mensagem.get("distancia", 0), de_agente.nome, self._passos)
 
     def _escolher_accao(self, estado, obs):
         if self.modo == "fixo":
-            return self._accao_fixa(obs).tipo
+            return self._accao_fixa(obs).codigo
 
         mov_validos = obs.get("movimentos_validos", [])
         # Exploracao
         if self.modo == "aprendizagem" and random.random() < self.epsilon:
-            candidatas = [a for a in self.accoes if (a in mov_validos) or a in ["F", "APANHAR", "DEPOSITAR"]]
-            return random.choice(candidatas) if candidatas else "F"
+            self._explorou = True
+            candidatas = [a for a in self.accoes if (a in mov_validos) or a not in CODIGOS_MOVIMENTO]
+            return random.choice(candidatas) if candidatas else F
 
         # Explotacao
         melhor_accao = None
         melhor_q = -float("inf")
         for a in self.accoes:
-            if a in ["N", "S", "E", "O"] and a not in mov_validos:
+            if a in CODIGOS_MOVIMENTO and a not in mov_validos:
                 continue
             q = self.q_table.get((estado, a), 0.0)
             if q > melhor_q:
@@ -132,18 +217,21 @@ class AgenteForaging(Agente):
                 melhor_accao = a
 
         if melhor_accao is None:
-            return mov_validos[0] if mov_validos else "F"
+            return mov_validos[0] if mov_validos else F
         return melhor_accao
 
     def age(self):
         obs = self.ultima_observacao.dados
-        estado = self._estado(obs)
-        accao_tipo = self._escolher_accao(estado, obs)
+        estado = self.ultima_observacao.memo(self.codificar_estado)
+        self._explorou = False
+        codigo = self._escolher_accao(estado, obs)
+        if self.tracos is not None:
+            self._concluir_passo_tracos(estado, codigo)
 
         self.ultimo_estado = estado
-        self.ultima_accao = accao_tipo
+        self.ultima_accao = codigo
 
-        return Accao(accao_tipo)
+        return ACCOES[codigo]
 
     def avaliacaoEstadoAtual(self, recompensa: float, nova_observacao=None, terminou: bool = False):
         if self.modo != "aprendizagem":
@@ -151,44 +239,105 @@ class AgenteForaging(Agente):
         if self.ultimo_estado is None or self.ultima_accao is None:
             return
 
-        prox_estado = self._estado(nova_observacao.dados) if nova_observacao else self.ultimo_estado
+        prox_estado = nova_observacao.memo(self.codificar_estado) if nova_observacao else self.ultimo_estado
 
-        max_q_prox = 0.0
-        if not terminou:
-            max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
+        if self.tracos is not None:
+            self._aprender_com_tracos(recompensa, prox_estado, terminou)
+        else:
+            max_q_prox = 0.0
+            if not terminou:
+                max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
 
-        chave = (self.ultimo_estado, self.ultima_accao)
-        q_atual = self.q_table.get(chave, 0.0)
+            chave = (self.ultimo_estado, self.ultima_accao)
+            q_atual = self.q_table.get(chave, 0.0)
 
-        novo_q = q_atual + self.alpha * (recompensa + self.gamma * max_q_prox - q_atual)
-        self.q_table[chave] = novo_q
+            novo_q = q_atual + self.alpha * (recompensa + self.gamma * max_q_prox - q_atual)
+            self.q_table[chave] = novo_q
+
+            if self.replay is not None and self.replay.guardar(self.ultimo_estado, self.ultima_accao, recompensa, prox_estado, terminou):
+                self.replay.atualizar_lote(self.q_table, self.accoes, self.alpha, self.gamma)
+            if self.modelo is not None:
+                self.modelo.observar(self.q_table, self.accoes, self.gamma, self.ultimo_estado, self.ultima_accao, recompensa, prox_estado, terminou)
+                self.modelo.planear(self.q_table, self.accoes, self.alpha, self.gamma)
 
         # Decaimento de exploracao
         self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
 
+    def _aprender_com_tracos(self, recompensa, prox_estado, terminou):
+        chave = (self.ultimo_estado, self.ultima_accao)
+        if terminou:
+            erro = recompensa - self.q_table.get(chave, 0.0)
+            self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+            self.tracos.limpar()
+        elif self.tracos.tipo == "sarsa_lambda":
+            # o alvo depende da proxima accao: a atualizacao fica para o proximo age()
+            self._sarsa_pendente = (chave, recompensa, prox_estado)
+        else:
+            max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
+            erro = recompensa + self.gamma * max_q_prox - self.q_table.get(chave, 0.0)
+            self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+
+    def _concluir_passo_tracos(self, estado, codigo):
+        """
+        Chamado em age() quando ja se conhece a accao seguinte:
+        SARSA(lambda) aplica a atualizacao pendente; Q(lambda) corta os tracos
+        se a accao escolhida foi exploratoria (Watkins).
+        """
+        if self._sarsa_pendente is not None:
+            chave, recompensa, _ = self._sarsa_pendente
+            self._sarsa_pendente = None
+            erro = recompensa + self.gamma * self.q_table.get((estado, codigo), 0.0) - self.q_table.get(chave, 0.0)
+            self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+        elif self._explorou and self.tracos.tipo == "q_lambda":
+            self.tracos.limpar()
+
+    def _fechar_sarsa_pendente(self):
+        """
+        Episodio cortado (max_passos ou corte) com uma atualizacao SARSA(lambda) pendente:
+        o estado seguinte nao e terminal, por isso faz bootstrap; como a accao seguinte
+        ja nao chega a ser escolhida, usa a greedy (max Q no estado seguinte).
+        """
+        if self._sarsa_pendente is None:
+            return
+        chave, recompensa, prox_estado = self._sarsa_pendente
+        self._sarsa_pendente = None
+        max_q_prox = max(self.q_table.get((prox_estado, a), 0.0) for a in self.accoes)
+        erro = recompensa + self.gamma * max_q_prox - self.q_table.get(chave, 0.0)
+        self.tracos.atualizar(self.q_table, chave, erro, self.alpha)
+
     def reset(self):
         super().reset()
+        self._fechar_sarsa_pendente()
         self.ultimo_estado = None
         self.ultima_accao = None
+        if self.tracos is not None:
+            self.tracos.limpar()
+        self.reclamados = {}
+        self._meu_alvo = None
+        self._passos = 0
 
     def _carregar_politica(self):
         if self.ficheiro_qtable and os.path.exists(self.ficheiro_qtable):
             with open(self.ficheiro_qtable, "r", encoding="utf-8") as f:
                 dados = json.load(f)
             for chave_str, valor in dados.items():
+                if self.sensores:
+                    estado_str, accao = chave_str.rsplit("|", 1)
+                    self.q_table[(estado_de_texto(estado_str), CODIGOS_ACCOES[accao])] = valor
+                    continue
                 estado_str, accao = chave_str.split("|")
                 partes = [int(x) for x in estado_str.split(",")]
                 if len(partes) == 7:
                     estado = tuple(partes)
-                    self.q_table[(estado, accao)] = valor
+                    self.q_table[(estado, CODIGOS_ACCOES[accao])] = valor
 
     def guardar_politica(self):
         if not self.ficheiro_qtable or self.modo in ["teste", "fixo"]:
             return
         serializado = {}
         for (estado, accao), valor in self.q_table.items():
-            estado_str = ",".join(str(x) for x in estado)
-            serializado[f"{estado_str}|{accao}"] = valor
+            estado_str = estado_para_texto(estado) if self.sensores else ",".join(str(x) for x in estado)
+            serializado[f"{estado_str}|{NOMES_ACCOES[accao]}"] = valor
 
         with open(self.ficheiro_qtable, "w", encoding="utf-8") as f:
             json.dump(serializado, f, ensure_ascii=False, indent=2)
@@ -1,15 +1,17 @@
 import json
 import os
 import random
+from collections import OrderedDict
 from core.Agente import Agente
-from core.Accao import Accao
+from core.Genetico import MetodosGeneticos
+from core.Accao import ACCOES, CODIGOS_ACCOES, CODIGOS_MOVIMENTO, NOMES_ACCOES, N, S, E, O, F, APANHAR, DEPOSITAR
 
 
 def _dist_manhattan(p1, p2):
     return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
 
 
-class AgenteForagingGenetico(Agente):
+class AgenteForagingGenetico(MetodosGeneticos, Agente):
     """
     Agente de Foraging com política evoluída via algoritmo genético.
     Cromossoma: mapeia estado simbólico (carregar, recurso_aqui, ninho_aqui, dx_sign, dy_sign) -> accao.
@@ -33,6 +35,8 @@ class AgenteForagingGenetico(Agente):
         tamanho_torneio=3,
         stall_max=2,
         heuristic_seeds=1,
+        cache_fitness=0,
+        codificador_estado=None,
     ):
         super().__init__(nome)
         self.modo = modo
@@ -50,8 +54,22 @@ class AgenteForagingGenetico(Agente):
         self.tamanho_torneio = max(2, tamanho_torneio)
         self.stall_max = max(1, stall_max)
         self.heuristic_seeds = max(0, heuristic_seeds)
-
-        self.possiveis_accoes = ["N", "S", "E", "O", "F", "APANHAR", "DEPOSITAR"]
+        # cache LRU de fitness: (genoma, cenario) -> fitness; 0 desativa
+        self.cache_fitness_tamanho = max(0, cache_fitness)
+        self.cache_fitness = OrderedDict()
+        self.cenario = None
+        self.geracao = 0
+        self.consultas_cache = 0
+        self.acertos_cache = 0
+        self.historico_cache = []
+        # fitness de cada geracao avaliada: {"geracao", "melhor", "media"}
+        self.historico_fitness = []
+        # o individuo atual ja fez alguma escolha aleatoria (o fitness nao vai para a cache)
+        self.fitness_aleatorio = False
+        # algum episodio do individuo atual foi cortado pelo motor (idem)
+        self.fitness_cortado = False
+
+        self.possiveis_accoes = [N, S, E, O, F, APANHAR, DEPOSITAR]
         self.estados_possiveis = [
             (carry, recurso, ninho, dx, dy)
             for carry in (0, 1)
@@ -76,6 +94,14 @@ class AgenteForagingGenetico(Agente):
         self.episodio_ativo = False
         self.stall_count = 0
         self.ultima_posicao = None
+        # fitness do pior elite da ultima geracao (usado no corte antecipado)
+        self.limiar_elite = None
+        # elite da ultima geracao avaliada [(genoma, fitness)], usada na migracao entre ilhas
+        self.ultima_elite = []
+
+        # funcao observacao -> estado (por omissao _estado); memorizada em cada Observacao
+        self.codificar_estado = codificador_estado or self._estado
+        self._medir_distancia = self._distancia_alvo
 
         self._inicializar_populacao()
 
@@ -121,8 +147,9 @@ class AgenteForagingGenetico(Agente):
         for chave_str, accao in dados.items():
             try:
                 partes = [int(x) for x in chave_str.split(",")]
-                if len(partes) == 5 and accao in self.possiveis_accoes:
-                    genoma[tuple(partes)] = accao
+                codigo = CODIGOS_ACCOES.get(accao)
+                if len(partes) == 5 and codigo in self.possiveis_accoes:
+                    genoma[tuple(partes)] = codigo
             except ValueError:
                 continue
         return genoma if genoma else None
@@ -130,7 +157,7 @@ class AgenteForagingGenetico(Agente):
     def _guardar_genoma(self):
         if not self.ficheiro_genoma or not self.melhor_genoma:
             return
-        serializado = {",".join(str(x) for x in estado): accao for estado, accao in self.melhor_genoma.items()}
+        serializado = {",".join(str(x) for x in estado): NOMES_ACCOES[accao] for estado, accao in self.melhor_genoma.items()}
         with open(self.ficheiro_genoma, "w", encoding="utf-8") as f:
             json.dump(serializado, f, ensure_ascii=False, indent=2)
 
@@ -143,23 +170,22 @@ class AgenteForagingGenetico(Agente):
         recurso_aqui = 1 if pos in recursos else 0
         ninho_aqui = 1 if pos in ninhos else 0
 
-        alvo = None
-        if a_carregar:
-            alvo = self._mais_proximo(pos, ninhos)
-        else:
-            alvo = self._mais_proximo(pos, recursos)
+        alvo = self._mais_proximo(pos, ninhos if a_carregar else recursos)
         dx_sign, dy_sign = 0, 0
         if alvo:
             dx = alvo[0] - pos[0]
             dy = alvo[1] - pos[1]
             dx_sign = 1 if dx > 0 else -1 if dx < 0 else 0
             dy_sign = 1 if dy > 0 else -1 if dy < 0 else 0
-            self.distancia_alvo = _dist_manhattan(pos, alvo)
-        else:
-            self.distancia_alvo = 0
 
         return (a_carregar, recurso_aqui, ninho_aqui, dx_sign, dy_sign)
 
+    def _distancia_alvo(self, obs):
+        # distancia ao alvo atual (ninho se a carregar, senao recurso), usada no fitness
+        pos = obs["posicao"]
+        alvo = self._mais_proximo(pos, obs.get("ninhos", []) if obs.get("a_carregar", False) else obs.get("recursos", []))
+        return _dist_manhattan(pos, alvo) if alvo else 0
+
     def _mais_proximo(self, pos, alvos):
         if not alvos:
             return None
@@ -172,36 +198,36 @@ class AgenteForagingGenetico(Agente):
 
         if a_carregar:
             if ninho_aqui:
-                return "DEPOSITAR"
+                return DEPOSITAR
             preferidas = []
             if dx_sign > 0:
-                preferidas.append("E")
+                preferidas.append(E)
             if dx_sign < 0:
-                preferidas.append("O")
+                preferidas.append(O)
             if dy_sign > 0:
-                preferidas.append("S")
+                preferidas.append(S)
             if dy_sign < 0:
-                preferidas.append("N")
+                preferidas.append(N)
             for m in preferidas:
                 if todas_validas or m in mov_validos:
                     return m
-            return mov_validos[0] if mov_validos else "F"
+            return mov_validos[0] if mov_validos else F
 
         if recurso_aqui:
-            return "APANHAR"
+            return APANHAR
         preferidas = []
         if dx_sign > 0:
-            preferidas.append("E")
+            preferidas.append(E)
         if dx_sign < 0:
-            preferidas.append("O")
+            preferidas.append(O)
         if dy_sign > 0:
-            preferidas.append("S")
+            preferidas.append(S)
         if dy_sign < 0:
-            preferidas.append("N")
+            preferidas.append(N)
         for m in preferidas:
             if todas_validas or m in mov_validos:
                 return m
-        return mov_validos[0] if mov_validos else "F"
+        return mov_validos[0] if mov_validos else F
 
     def _acao_para_estado(self, estado, mov_validos):
         genoma = self._genoma_atual()
@@ -209,15 +235,15 @@ class AgenteForagingGenetico(Agente):
 
         if self.stall_count >= self.stall_max:
             heur = self._acao_heuristica(estado, mov_validos)
-            if heur:
+            if heur is not None:
                 accao = heur
             self.stall_count = 0
 
-        if accao in ["N", "S", "E", "O"] and accao not in mov_validos:
+        if accao in CODIGOS_MOVIMENTO and accao not in mov_validos:
             accao = None
         if accao is None:
             accao = self._acao_heuristica(estado, mov_validos)
-        return Accao(accao)
+        return ACCOES[accao]
 
     def _genoma_atual(self):
         if not self.populacao:
@@ -227,7 +253,11 @@ class AgenteForagingGenetico(Agente):
 
     def age(self):
         obs = self.ultima_observacao.dados
-        estado = self._estado(obs)
+        if not self.episodio_ativo:
+            # cenario do episodio: posicao inicial e recursos disponiveis
+            self.cenario = (tuple(obs["posicao"]), frozenset(obs.get("recursos", [])))
+        estado = self.ultima_observacao.memo(self.codificar_estado)
+        self.distancia_alvo = self.ultima_observacao.memo(self._medir_distancia)
         mov_validos = obs.get("movimentos_validos", [])
         return self._acao_para_estado(estado, mov_validos)
 
@@ -244,8 +274,7 @@ class AgenteForagingGenetico(Agente):
                 else:
                     self.stall_count = 0
                 self.ultima_posicao = pos
-            estado = self._estado(nova_observacao.dados)
-            nova_dist = self.distancia_alvo
+            nova_dist = self.distancia_alvo = nova_observacao.memo(self._medir_distancia)
             if self.distancia_anterior is None:
                 self.distancia_anterior = nova_dist
             else:
@@ -262,10 +291,7 @@ class AgenteForagingGenetico(Agente):
         super().reset()
         self._finalizar_episodio()
 
-    def _finalizar_episodio(self):
-        if not self.episodio_ativo:
-            return
-
+    def _fitness_episodio(self):
         fitness = self.recompensa_ep
         if self.teve_sucesso:
             fitness += self.bonus_sucesso
@@ -273,26 +299,31 @@ class AgenteForagingGenetico(Agente):
             fitness -= self.penalizacao_passos * self.passos_ep
         if not self.teve_sucesso and self.penalizacao_distancia > 0:
             fitness -= self.penalizacao_distancia * self.distancia_alvo
+        return fitness
 
+    def _finalizar_episodio(self):
+        if not self.episodio_ativo:
+            return
+
+        fitness = self._fitness_episodio()
         self.acumulado_fitness_individuo += fitness
         self.ep_avaliados_individuo += 1
 
         if self.ep_avaliados_individuo >= self.episodios_por_individuo:
             fitness_medio = self.acumulado_fitness_individuo / self.episodios_por_individuo
-            self.fitnesses[self.indice_genoma_atual] = fitness_medio
-
-            if fitness_medio > self.melhor_fitness:
-                self.melhor_fitness = fitness_medio
-                self.melhor_genoma = dict(self._genoma_atual())
+            self._atribuir_fitness(fitness_medio)
+            self._guardar_fitness_cache(self._genoma_atual(), fitness_medio)
 
-            self.indice_genoma_atual += 1
-            if self.indice_genoma_atual >= len(self.populacao):
-                self._evoluir()
-                self.indice_genoma_atual = 0
+            self._preparar_proximo_individuo()
 
             self.acumulado_fitness_individuo = 0.0
             self.ep_avaliados_individuo = 0
+            self.fitness_aleatorio = False
+            self.fitness_cortado = False
 
+        self._limpar_episodio()
+
+    def _limpar_episodio(self):
         self.recompensa_ep = 0.0
         self.passos_ep = 0
         self.teve_sucesso = False
@@ -302,14 +333,28 @@ class AgenteForagingGenetico(Agente):
         self.stall_count = 0
         self.ultima_posicao = None
 
+    def _preparar_proximo_individuo(self):
+        self.indice_genoma_atual += 1
+        if self.indice_genoma_atual >= len(self.populacao):
+            self._evoluir()
+            self.indice_genoma_atual = 0
+        self._saltar_individuos_em_cache()
+
     def _evoluir(self):
+        self._registar_geracao_cache()
+        self.geracao += 1
         avaliados = list(zip(self.populacao, self.fitnesses))
         avaliados.sort(key=lambda par: par[1], reverse=True)
+        self._registar_geracao_fitness(avaliados)
 
         if avaliados and avaliados[0][1] > self.melhor_fitness:
             self.melhor_fitness = avaliados[0][1]
             self.melhor_genoma = dict(avaliados[0][0])
 
+        if avaliados:
+            self.limiar_elite = avaliados[min(self.elitismo, len(avaliados)) - 1][1]
+        self.ultima_elite = avaliados[: self.elitismo]
+
         nova_populacao = [dict(g) for g, _ in avaliados[: self.elitismo]]
 
         while len(nova_populacao) < self.populacao_tamanho:
@@ -323,6 +368,19 @@ class AgenteForagingGenetico(Agente):
         self.populacao = nova_populacao[: self.populacao_tamanho]
         self.fitnesses = [0.0 for _ in self.populacao]
 
+    def acolher_migrantes(self, genomas):
+        """
+        Modelo de ilhas: os genomas recebidos substituem os ultimos individuos
+        da populacao que ainda nao foram avaliados nesta geracao.
+        """
+        pos = len(self.populacao) - 1
+        for genoma in genomas:
+            if pos <= self.indice_genoma_atual:
+                break
+            self.populacao[pos] = dict(genoma)
+            self.fitnesses[pos] = 0.0
+            pos -= 1
+
     def _selecionar(self, avaliados):
         if not avaliados:
             return self._novo_genoma()
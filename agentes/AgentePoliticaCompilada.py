@@ -0,0 +1,19 @@
+from core.Agente import Agente
+from core.Accao import ACCOES
+from core.PoliticaCompilada import PoliticaCompilada
+
+
+class AgentePoliticaCompilada(Agente):
+    """
+    Agente so de execucao: usa uma politica ja compilada (ver compilar_politica.py).
+    Por passo apenas codifica a observacao e le a accao do array; nao aprende.
+    """
+
+    def __init__(self, nome, ficheiro_politica=None, modo="teste"):
+        super().__init__(nome)
+        self.modo = modo
+        self.ficheiro_politica = ficheiro_politica or f"politica_{nome}.json"
+        self.politica = PoliticaCompilada.carregar(self.ficheiro_politica)
+
+    def age(self):
+        return ACCOES[self.politica.accao(self.ultima_observacao.dados)]
@@ -0,0 +1,228 @@
+import io
+import json
+import os
+import re
+import sys
+from array import array
+from collections import deque
+
+
+CAMPOS = ("recompensa_total", "recompensa_descontada", "passos")
+PERCENTIS = (10, 50, 90)
+
+
+def iterar_episodios(caminho, tamanho_bloco=1 << 16, invalidos=None):
+    """
+    Le um ficheiro de metricas episodio a episodio, sem o carregar todo.
+    Aceita o formato do Logger (lista JSON) e JSON lines (um objeto por linha).
+    Um fim truncado (ficheiro ainda a ser escrito) e ignorado em silencio; um registo
+    invalido a meio e saltado com um aviso em stderr e contado em `invalidos` (lista).
+    """
+    with open(caminho, "r", encoding="utf-8") as f:
+        yield from _iterar_objetos(f, tamanho_bloco, invalidos)
+
+
+# inicio do registo seguinte: "{" no inicio de uma linha (JSON lines, lista do Logger)
+# ou logo depois de "}," (lista compacta)
+_RE_PROXIMO_REGISTO = re.compile(r"\n[ \t]*\{|\}[ \t]*,[ \t]*\{")
+
+
+def _iterar_objetos(f, tamanho_bloco=1 << 16, invalidos=None):
+    # le objetos JSON a partir da posicao atual de um ficheiro de texto aberto
+    decoder = json.JSONDecoder()
+    separadores = " \t\r\n,[]"
+    buffer = ""
+    pos = 0
+    # caracteres ja descartados antes do inicio de `buffer` (so para os avisos)
+    base = 0
+    fim = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in separadores:
+            pos += 1
+        if pos >= len(buffer):
+            if fim:
+                return
+            bloco = f.read(tamanho_bloco)
+            fim = not bloco
+            base += len(buffer)
+            buffer = bloco
+            pos = 0
+            continue
+        try:
+            obj, pos_fim = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            proximo = _RE_PROXIMO_REGISTO.search(buffer, pos + 1)
+            if proximo is None:
+                # registo incompleto: ou falta ler o resto, ou e o fim truncado do ficheiro
+                if fim:
+                    return
+                bloco = f.read(tamanho_bloco)
+                fim = not bloco
+                base += pos
+                buffer = buffer[pos:] + bloco
+                pos = 0
+                continue
+            # ha um registo depois deste, logo este esta mesmo estragado: salta-o
+            if invalidos is not None:
+                invalidos.append(base + pos)
+            print(f"Aviso: registo invalido ignorado (caracter {base + pos})", file=sys.stderr)
+            pos = proximo.end() - 1
+            continue
+        pos = pos_fim
+        if isinstance(obj, dict):
+            yield obj
+
+
+_RE_EPISODIO = re.compile(rb'"episodio"\s*:\s*(-?\d+)')
+
+
+def indexar_episodios(caminho):
+    """
+    Indice {episodio: byte onde comeca o primeiro registo desse episodio}.
+    E calculado numa passagem binaria e guardado ao lado do ficheiro
+    (<ficheiro>.indice.json), sendo reutilizado enquanto o ficheiro nao mudar.
+    """
+    info = os.stat(caminho)
+    assinatura = [info.st_size, info.st_mtime_ns]
+    caminho_indice = f"{caminho}.indice.json"
+    try:
+        with open(caminho_indice, "r", encoding="utf-8") as f:
+            guardado = json.load(f)
+        if guardado.get("assinatura") == assinatura:
+            return {int(k): v for k, v in guardado["episodios"].items()}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    indice = {}
+    offset = 0
+    inicio_objeto = None
+    episodio_atual = None
+    with open(caminho, "rb") as f:
+        for linha in f:
+            if linha.lstrip().startswith(b"{"):
+                inicio_objeto = offset + (len(linha) - len(linha.lstrip()))
+            if inicio_objeto is not None:
+                m = _RE_EPISODIO.search(linha)
+                if m:
+                    episodio = int(m.group(1))
+                    if episodio != episodio_atual:
+                        episodio_atual = episodio
+                        indice.setdefault(episodio, inicio_objeto)
+                    inicio_objeto = None
+            offset += len(linha)
+
+    try:
+        with open(caminho_indice, "w", encoding="utf-8") as f:
+            json.dump({"assinatura": assinatura, "episodios": indice}, f)
+    except OSError:
+        pass
+    return indice
+
+
+def iterar_episodio(caminho, episodio, indice=None):
+    """
+    Registos de um so episodio, saltando diretamente para o seu inicio (via indice).
+    """
+    indice = indice if indice is not None else indexar_episodios(caminho)
+    if episodio not in indice:
+        return
+    with open(caminho, "rb") as fb:
+        fb.seek(indice[episodio])
+        f = io.TextIOWrapper(fb, encoding="utf-8")
+        for registo in _iterar_objetos(f):
+            if registo.get("episodio") != episodio:
+                return
+            yield registo
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    k = (len(ordenados) - 1) * p / 100.0
+    i = int(k)
+    if i + 1 >= len(ordenados):
+        return ordenados[i]
+    return ordenados[i] + (ordenados[i + 1] - ordenados[i]) * (k - i)
+
+
+class AgregadorMetricas:
+    """
+    Estatisticas de metricas por episodio calculadas numa so passagem:
+    medias e variancias (Welford), taxa de sucesso, medias moveis e
+    series compactas (array) para percentis e graficos.
+    """
+
+    def __init__(self, janela=10):
+        self.janela = max(1, janela)
+        self.n = 0
+        self.sucessos = 0
+        self.invalidos = 0
+        self.episodios = array("l")
+        self.valores = {c: array("d") for c in CAMPOS}
+        self.medias_moveis = {c: array("d") for c in CAMPOS}
+        self.sucesso_acumulado = array("d")
+        self._media = {c: 0.0 for c in CAMPOS}
+        self._m2 = {c: 0.0 for c in CAMPOS}
+        self._janela_valores = {c: deque() for c in CAMPOS}
+        self._janela_soma = {c: 0.0 for c in CAMPOS}
+
+    @staticmethod
+    def de_ficheiro(caminho, janela=10):
+        agregador = AgregadorMetricas(janela)
+        agregador.adiciona_ficheiro(caminho)
+        return agregador
+
+    def adiciona_ficheiro(self, caminho):
+        invalidos = []
+        for m in iterar_episodios(caminho, invalidos=invalidos):
+            self.adiciona(m)
+        self.invalidos += len(invalidos)
+
+    def adiciona(self, m):
+        self.n += 1
+        self.episodios.append(int(m.get("episodio", self.n)))
+        if m.get("sucesso", False):
+            self.sucessos += 1
+        self.sucesso_acumulado.append(self.sucessos / self.n)
+
+        for c in CAMPOS:
+            x = float(m.get(c, 0.0))
+            self.valores[c].append(x)
+
+            delta = x - self._media[c]
+            self._media[c] += delta / self.n
+            self._m2[c] += delta * (x - self._media[c])
+
+            janela = self._janela_valores[c]
+            janela.append(x)
+            self._janela_soma[c] += x
+            if len(janela) > self.janela:
+                self._janela_soma[c] -= janela.popleft()
+            self.medias_moveis[c].append(self._janela_soma[c] / len(janela))
+
+    def media(self, campo):
+        return self._media[campo] if self.n else 0.0
+
+    def variancia(self, campo):
+        return self._m2[campo] / (self.n - 1) if self.n > 1 else 0.0
+
+    def percentis(self, campo, ps=PERCENTIS):
+        ordenados = sorted(self.valores[campo])
+        return {p: _percentil(ordenados, p) for p in ps}
+
+    def taxa_sucesso(self):
+        return self.sucessos / self.n if self.n else 0.0
+
+    def resumo(self):
+        resumo = {
+            "episodios": self.n,
+            "recompensa_media": self.media("recompensa_total"),
+            "recompensa_descontada_media": self.media("recompensa_descontada"),
+            "passos_medios": self.media("passos"),
+            "taxa_sucesso": self.taxa_sucesso(),
+            "registos_invalidos": self.invalidos,
+        }
+        for c in CAMPOS:
+            resumo[f"{c}_variancia"] = self.variancia(c)
+            resumo[f"{c}_percentis"] = self.percentis(c)
+        return resumo
@@ -1,19 +1,67 @@
+import random
+
 from core.Ambiente import Ambiente
 from core.Observacao import Observacao
-from core.Accao import Accao
+from core.Accao import Accao, BITS_MOVIMENTO, MOVIMENTOS
+from core.Sensor import FAROL
 
 
 class AmbienteFarol(Ambiente):
-    def __init__(self, largura=5, altura=5, pos_farol=None, obstaculos=None):
+    """
+    Grelha 2D com um farol que os agentes tem de alcancar.
+    Movimento opcional do farol (dict): "a_cada" (passos entre movimentos) e "modo":
+    "aleatorio" (uma casa numa direcao livre ao acaso) ou "rota" (salta para a posicao
+    seguinte da lista "rota", em ciclo, comecando pela primeira).
+    """
+
+    def __init__(self, largura=5, altura=5, pos_farol=None, obstaculos=None, movimento_farol=None):
         super().__init__()
         self.largura = largura
         self.altura = altura
         self.posicoes_agentes = {}
-        self.pos_farol = pos_farol if pos_farol else (largura - 1, altura - 1)
+        self.pos_farol = tuple(pos_farol) if pos_farol else (largura - 1, altura - 1)
         self.obstaculos = set(tuple(o) for o in (obstaculos or []))
         self._terminou = False
         self.posicoes_iniciais = {}
         self._labels_agentes = {}
+        self._construir_tabelas_movimento(largura, altura, self.obstaculos)
+
+        movimento_farol = movimento_farol or {}
+        self.farol_a_cada = int(movimento_farol.get("a_cada") or 0)
+        self.modo_farol = movimento_farol.get("modo", "aleatorio")
+        self.rota_farol = [tuple(p) for p in movimento_farol.get("rota") or []]
+        self._farol_inicial = self.pos_farol
+        self._indice_rota = -1
+        self._iniciar_dinamica()
+
+    def _iniciar_dinamica(self):
+        self._limpar_eventos()
+        self._colocar_farol(self._farol_inicial)
+        self._indice_rota = -1
+        if self.farol_a_cada > 0:
+            self._agendar(self.farol_a_cada, ("farol",))
+
+    def _mover_farol(self):
+        if self.modo_farol == "rota":
+            if self.rota_farol:
+                self._indice_rota = (self._indice_rota + 1) % len(self.rota_farol)
+                self._colocar_farol(self.rota_farol[self._indice_rota])
+        else:
+            codigos = self.movimentos_validos_celula.get(self.pos_farol)
+            if codigos:
+                self._colocar_farol(self.transicoes[self.pos_farol][random.choice(codigos)])
+
+    def _colocar_farol(self, pos):
+        antiga, self.pos_farol = self.pos_farol, pos
+        if antiga != pos:
+            self._atualizar_celula(antiga)
+            self._atualizar_celula(pos)
+
+    def _conteudo_celula(self, pos):
+        return FAROL if pos == self.pos_farol else super()._conteudo_celula(pos)
+
+    def celula_alvo(self, agente):
+        return FAROL
 
     def adicionaAgente(self, agente, posicao_inicial=(0, 0)):
         self.posicoes_agentes[agente] = posicao_inicial
@@ -25,14 +73,26 @@ class AmbienteFarol(Ambiente):
     def observacaoPara(self, agente):
         x, y = self.posicoes_agentes[agente]
         lx, ly = self.pos_farol
+        # a observacao so depende da posicao do agente e do farol
+        assinatura = (x, y, lx, ly)
+        obs = self._observacao_em_cache(agente, assinatura)
+        if obs is not None:
+            return obs
 
         mov_validos = self._movimentos_validos(x, y)
-
-        return Observacao({
+        if getattr(agente, "sensores", None):
+            return self._guardar_observacao(agente, assinatura, self._observacao_sensores(agente, {
+                "posicao": (x, y),
+                "movimentos_validos": mov_validos,
+                "mascara_movimentos": self._mascara_movimentos(x, y),
+            }))
+
+        return self._guardar_observacao(agente, assinatura, Observacao({
             "posicao": (x, y),
             "dir_farol": (lx - x, ly - y),
             "movimentos_validos": mov_validos,
-        })
+            "mascara_movimentos": self._mascara_movimentos(x, y),
+        }))
 
     def _celula_livre(self, x, y):
         if x < 0 or x >= self.largura or y < 0 or y >= self.altura:
@@ -40,13 +100,17 @@ class AmbienteFarol(Ambiente):
         return (x, y) not in self.obstaculos
 
     def _movimentos_validos(self, x, y):
-        direcoes = {
-            "N": (x, y - 1),
-            "S": (x, y + 1),
-            "E": (x + 1, y),
-            "O": (x - 1, y),
-        }
-        return [d for d, (nx, ny) in direcoes.items() if self._celula_livre(nx, ny)]
+        mov_validos = self.movimentos_validos_celula.get((x, y))
+        if mov_validos is not None:
+            return mov_validos
+        # posicao fora da grelha (nao devia acontecer): calcula na hora
+        return [c for c, (dx, dy) in MOVIMENTOS.items() if self._celula_livre(x + dx, y + dy)]
+
+    def _mascara_movimentos(self, x, y):
+        mascara = self.mascaras_movimento.get((x, y))
+        if mascara is not None:
+            return mascara
+        return sum(BITS_MOVIMENTO[d] for d in self._movimentos_validos(x, y))
 
     def _todos_no_farol(self):
         return all(pos == self.pos_farol for pos in self.posicoes_agentes.values())
@@ -56,15 +120,10 @@ class AmbienteFarol(Ambiente):
         pos_validada = (x, y)
         dist_antes = abs(self.pos_farol[0] - x) + abs(self.pos_farol[1] - y)
 
-        if accao.tipo == "N" and self._celula_livre(x, y - 1):
-            pos_validada = (x, y - 1)
-        if accao.tipo == "S" and self._celula_livre(x, y + 1):
-            pos_validada = (x, y + 1)
-        if accao.tipo == "E" and self._celula_livre(x + 1, y):
-            pos_validada = (x + 1, y)
-        if accao.tipo == "O" and self._celula_livre(x - 1, y):
-            pos_validada = (x - 1, y)
-        # "F" fica no sitio por definicao
+        # tabela de transicao pre-calculada; "F" (ou movimento bloqueado) fica no sitio
+        destinos = self.transicoes.get((x, y))
+        if destinos is not None and 0 <= accao.codigo < len(destinos):
+            pos_validada = destinos[accao.codigo] or pos_validada
 
         self.posicoes_agentes[agente] = pos_validada
 
@@ -98,9 +157,47 @@ class AmbienteFarol(Ambiente):
 
         return {"recompensa": recompensa, "terminou": self._terminou}
 
+    def distancia_objetivo(self):
+        """
+        Medida de progresso (menor e melhor): soma das distancias dos agentes ao farol.
+        """
+        fx, fy = self.pos_farol
+        return sum(abs(fx - x) + abs(fy - y) for (x, y) in self.posicoes_agentes.values())
+
+    def recompensa_maxima_restante(self, agente, passos_restantes):
+        """
+        Majorante da recompensa que o agente ainda pode receber no episodio.
+        Fora do bonus final nenhum passo da mais de 0.0; se o farol ja nao e
+        alcancavel nos passos restantes devolve 0.0 (sem hipotese de sucesso).
+        Com o farol em movimento a distancia atual nao e um limite.
+        """
+        if self.farol_a_cada > 0:
+            return 3.0
+        x, y = self.posicoes_agentes[agente]
+        dist = abs(self.pos_farol[0] - x) + abs(self.pos_farol[1] - y)
+        if dist > passos_restantes:
+            return 0.0
+        return 3.0
+
+    def melhoria_maxima_distancia(self, agente, passos_restantes):
+        """
+        Uma casa por passo do agente e, com o farol em movimento, mais uma casa (modo
+        aleatorio) ou a maior distancia da grelha (salto da rota) por cada movimento do farol.
+        """
+        melhoria = passos_restantes
+        if self.farol_a_cada > 0:
+            movimentos = passos_restantes // self.farol_a_cada + 1
+            salto = self.largura + self.altura - 2 if self.modo_farol == "rota" else 1
+            melhoria += movimentos * salto
+        return melhoria
+
+    def dinamica_aleatoria(self):
+        return self.farol_a_cada > 0 and self.modo_farol != "rota"
+
     def atualizacao(self):
-        # Sem dinamica extra por agora
-        pass
+        for evento in self._eventos_devidos():
+            self._mover_farol()
+            self._agendar(self.farol_a_cada, evento)
 
     def terminou(self):
         return self._terminou
@@ -110,6 +207,7 @@ class AmbienteFarol(Ambiente):
         for agente, pos in self.posicoes_iniciais.items():
             self.posicoes_agentes[agente] = pos
         self._terminou = False
+        self._iniciar_dinamica()
 
     def render(self):
         grelha = [["." for _ in range(self.largura)] for _ in range(self.altura)]
@@ -1,6 +1,9 @@
+import random
+
 from core.Ambiente import Ambiente
 from core.Observacao import Observacao
-from core.Accao import Accao
+from core.Accao import Accao, BITS_MOVIMENTO, MOVIMENTOS, CODIGOS_MOVIMENTO, F, APANHAR, DEPOSITAR
+from core.Sensor import RECURSO, NINHO
 
 
 def _dist_manhattan(p1, p2):
@@ -11,15 +14,24 @@ class AmbienteForaging(Ambiente):
     """
     Grelha 2D com recursos, ninhos e obstaculos.
     Acoes: N, S, E, O, F (ficar), APANHAR, DEPOSITAR.
+
+    Reposicao opcional (dict): "atraso" (passos ate um recurso apanhado voltar ao mesmo
+    sitio; 0 = nao volta), "variacao" (atraso extra aleatorio ate esse numero de passos)
+    e "aglomerados" (zonas onde nascem recursos novos: centro, raio, taxa por passo,
+    valor e maximo de recursos em simultaneo). Com reposicao o episodio so acaba no
+    limite de passos.
     """
 
-    def __init__(self, largura=7, altura=7, recursos=None, valores_recursos=None, ninhos=None, obstaculos=None):
+    def __init__(self, largura=7, altura=7, recursos=None, valores_recursos=None, ninhos=None, obstaculos=None,
+                 reposicao=None):
         super().__init__()
         self.largura = largura
         self.altura = altura
         self.recursos = set(tuple(r) for r in (recursos or []))
         self.valores_recursos = self._normalizar_valores(valores_recursos or {})
         self.ninhos = set(tuple(n) for n in (ninhos or []))
+        # os ninhos nao mudam: a mesma lista em todas as observacoes
+        self._lista_ninhos = list(self.ninhos)
         self.obstaculos = set(tuple(o) for o in (obstaculos or []))
         self.posicoes_agentes = {}
         self.agentes_carry = {}  # agente -> valor do recurso transportado (0 se vazio)
@@ -27,25 +39,102 @@ class AmbienteForaging(Ambiente):
         self._recursos_iniciais = set(self.recursos)
         self._valores_iniciais = dict(self.valores_recursos)
         self._posicoes_iniciais = {}
+        # muda sempre que o conjunto de recursos muda (invalida as observacoes em cache)
+        self._versao_recursos = 0
+        self._lista_recursos = (None, [])
+        self._construir_tabelas_movimento(largura, altura, self.obstaculos)
+
+        reposicao = reposicao or {}
+        self.atraso_reposicao = int(reposicao.get("atraso") or 0)
+        self.variacao_reposicao = int(reposicao.get("variacao") or 0)
+        self.aglomerados = [self._preparar_aglomerado(a) for a in reposicao.get("aglomerados") or []]
+        # celula -> indice do aglomerado a que pertence (a primeira zona que a cobre)
+        self._aglomerado_celula = {}
+        for i, aglomerado in enumerate(self.aglomerados):
+            for celula in aglomerado["celulas"]:
+                self._aglomerado_celula.setdefault(celula, i)
+        self._ocupacao = [0] * len(self.aglomerados)
+        self._iniciar_dinamica()
 
     def adicionaAgente(self, agente, posicao_inicial=(0, 0)):
         self.posicoes_agentes[agente] = posicao_inicial
         self.agentes_carry[agente] = 0
         self._posicoes_iniciais[agente] = posicao_inicial
 
+    def _preparar_aglomerado(self, cfg):
+        """
+        Celulas livres (sem obstaculo nem ninho) a distancia <= raio do centro; calculadas
+        uma vez, para que nascer um recurso custe o tamanho da zona e nao o do mapa.
+        """
+        cx, cy = cfg["centro"]
+        raio = int(cfg.get("raio", 1))
+        celulas = []
+        for y in range(cy - raio, cy + raio + 1):
+            for x in range(cx - raio, cx + raio + 1):
+                if _dist_manhattan((x, y), (cx, cy)) <= raio and self._celula_livre(x, y) and (x, y) not in self.ninhos:
+                    celulas.append((x, y))
+        return {
+            "celulas": celulas,
+            "taxa": float(cfg.get("taxa", 0.1)),
+            "valor": cfg.get("valor", 1.0),
+            "maximo": int(cfg.get("maximo", 3)),
+        }
+
+    def _iniciar_dinamica(self):
+        self._limpar_eventos()
+        for i in range(len(self._ocupacao)):
+            self._ocupacao[i] = 0
+        for recurso in self.recursos:
+            i = self._aglomerado_celula.get(recurso)
+            if i is not None:
+                self._ocupacao[i] += 1
+        for i, aglomerado in enumerate(self.aglomerados):
+            if aglomerado["taxa"] > 0:
+                self._agendar(self._intervalo(aglomerado["taxa"]), ("aglomerado", i))
+
+    @staticmethod
+    def _intervalo(taxa):
+        # passos ate ao proximo nascimento (em media 1/taxa)
+        return int(random.expovariate(taxa)) + 1
+
+    def _por_recurso(self, pos, valor):
+        if pos in self.recursos:
+            return False
+        self.recursos.add(pos)
+        self.valores_recursos[pos] = valor
+        self._atualizar_celula(pos)
+        i = self._aglomerado_celula.get(pos)
+        if i is not None:
+            self._ocupacao[i] += 1
+        return True
+
+    def _recurso_apanhado(self, pos, valor):
+        i = self._aglomerado_celula.get(pos)
+        if i is not None:
+            self._ocupacao[i] -= 1
+        if self.atraso_reposicao > 0:
+            atraso = self.atraso_reposicao
+            if self.variacao_reposicao > 0:
+                atraso += random.randint(0, self.variacao_reposicao)
+            self._agendar(atraso, ("recurso", pos, valor))
+
     def _celula_livre(self, x, y):
         if x < 0 or x >= self.largura or y < 0 or y >= self.altura:
             return False
         return (x, y) not in self.obstaculos
 
     def _movimentos_validos(self, x, y):
-        direcoes = {
-            "N": (x, y - 1),
-            "S": (x, y + 1),
-            "E": (x + 1, y),
-            "O": (x - 1, y),
-        }
-        return [d for d, (nx, ny) in direcoes.items() if self._celula_livre(nx, ny)]
+        mov_validos = self.movimentos_validos_celula.get((x, y))
+        if mov_validos is not None:
+            return mov_validos
+        # posicao fora da grelha (nao devia acontecer): calcula na hora
+        return [c for c, (dx, dy) in MOVIMENTOS.items() if self._celula_livre(x + dx, y + dy)]
+
+    def _mascara_movimentos(self, x, y):
+        mascara = self.mascaras_movimento.get((x, y))
+        if mascara is not None:
+            return mascara
+        return sum(BITS_MOVIMENTO[d] for d in self._movimentos_validos(x, y))
 
     def _normalizar_valores(self, valores_recursos):
         """
@@ -64,17 +153,44 @@ class AmbienteForaging(Ambiente):
                 normalizados[pos] = v
         return normalizados
 
+    def _conteudo_celula(self, pos):
+        if pos in self.recursos:
+            return RECURSO
+        if pos in self.ninhos:
+            return NINHO
+        return super()._conteudo_celula(pos)
+
+    def celula_alvo(self, agente):
+        return NINHO if self.agentes_carry.get(agente, 0) > 0 else RECURSO
+
     def observacaoPara(self, agente):
         x, y = self.posicoes_agentes[agente]
+        assinatura = (x, y, self.agentes_carry.get(agente, 0), self._versao_recursos)
+        obs = self._observacao_em_cache(agente, assinatura)
+        if obs is not None:
+            return obs
         mov_validos = self._movimentos_validos(x, y)
-        recursos_visiveis = list(self.recursos)
-        return Observacao({
+        if getattr(agente, "sensores", None):
+            # observacao parcial: sem as listas globais de recursos e ninhos
+            return self._guardar_observacao(agente, assinatura, self._observacao_sensores(agente, {
+                "posicao": (x, y),
+                "movimentos_validos": mov_validos,
+                "mascara_movimentos": self._mascara_movimentos(x, y),
+                "a_carregar": self.agentes_carry.get(agente, 0) > 0,
+            }))
+        # a mesma lista para todos os agentes enquanto os recursos nao mudam
+        versao, recursos_visiveis = self._lista_recursos
+        if versao != self._versao_recursos:
+            recursos_visiveis = list(self.recursos)
+            self._lista_recursos = (self._versao_recursos, recursos_visiveis)
+        return self._guardar_observacao(agente, assinatura, Observacao({
             "posicao": (x, y),
             "movimentos_validos": mov_validos,
+            "mascara_movimentos": self._mascara_movimentos(x, y),
             "recursos": recursos_visiveis,
-            "ninhos": list(self.ninhos),
+            "ninhos": self._lista_ninhos,
             "a_carregar": self.agentes_carry.get(agente, 0) > 0,
-        })
+        }))
 
     def _todos_recursos_recolhidos(self):
         return len(self.recursos) == 0 and all(v == 0 for v in self.agentes_carry.values())
@@ -88,31 +204,30 @@ class AmbienteForaging(Ambiente):
         x, y = self.posicoes_agentes[agente]
         recompensa = -0.05  # custo por passo mais leve
 
-        if accao.tipo in ["N", "S", "E", "O"]:
-            destino = None
-            if accao.tipo == "N" and self._celula_livre(x, y - 1):
-                destino = (x, y - 1)
-            if accao.tipo == "S" and self._celula_livre(x, y + 1):
-                destino = (x, y + 1)
-            if accao.tipo == "E" and self._celula_livre(x + 1, y):
-                destino = (x + 1, y)
-            if accao.tipo == "O" and self._celula_livre(x - 1, y):
-                destino = (x - 1, y)
+        codigo = accao.codigo
+        movimento = codigo in CODIGOS_MOVIMENTO
+
+        if movimento:
+            destinos = self.transicoes.get((x, y))
+            destino = destinos[codigo] if destinos else None
             if destino:
                 self.posicoes_agentes[agente] = destino
             else:
                 recompensa -= 0.2  # penalizacao por bater em obstaculo/borda
 
-        elif accao.tipo == "APANHAR":
+        elif codigo == APANHAR:
             if (x, y) in self.recursos and self.agentes_carry[agente] == 0:
                 self.recursos.remove((x, y))
+                self._versao_recursos += 1
+                self._atualizar_celula((x, y))
                 valor = self.valores_recursos.get((x, y), 1.0)
                 self.agentes_carry[agente] = valor
+                self._recurso_apanhado((x, y), valor)
                 recompensa += 0.5  # pequeno bonus por apanhar
             else:
                 recompensa -= 0.2
 
-        elif accao.tipo == "DEPOSITAR":
+        elif codigo == DEPOSITAR:
             if (x, y) in self.ninhos and self.agentes_carry[agente] > 0:
                 recompensa += self.agentes_carry[agente]
                 self.agentes_carry[agente] = 0
@@ -125,7 +240,7 @@ class AmbienteForaging(Ambiente):
             alvo = self._alvo_mais_proximo((x, y), self.ninhos)
         else:
             alvo = self._alvo_mais_proximo((x, y), self.recursos)
-        if accao.tipo in ["N", "S", "E", "O"] and alvo:
+        if movimento and alvo:
             dist_antes = _dist_manhattan((x, y), alvo)
             dist_depois = _dist_manhattan(self.posicoes_agentes[agente], alvo)
             if dist_depois < dist_antes:
@@ -134,29 +249,94 @@ class AmbienteForaging(Ambiente):
                 recompensa -= 0.05
 
         # "F" fica; se nao ha recursos e o agente esta vazio, nao penaliza esperar
-        if accao.tipo == "F" and len(self.recursos) == 0 and self.agentes_carry.get(agente, 0) == 0:
+        if codigo == F and len(self.recursos) == 0 and self.agentes_carry.get(agente, 0) == 0:
             recompensa = 0.0
 
-        # Bonus final quando tudo foi recolhido e depositado
-        if self._todos_recursos_recolhidos():
+        # Bonus final quando tudo foi recolhido e depositado (e nada mais vai aparecer)
+        if self._todos_recursos_recolhidos() and not self._eventos:
             recompensa += 3.0
             self._terminou = True
 
         return {"recompensa": recompensa, "terminou": self._terminou}
 
+    def distancia_objetivo(self):
+        """
+        Medida de progresso (menor e melhor). Cada recurso por apanhar conta duas
+        unidades e cada recurso transportado uma; a escala garante que apanhar ou
+        depositar pesa sempre mais do que a soma das distancias aos alvos.
+        """
+        a_carregar = sum(1 for v in self.agentes_carry.values() if v > 0)
+        pendentes = 2 * len(self.recursos) + a_carregar
+        escala = (self.largura + self.altura) * max(1, len(self.posicoes_agentes)) + 1
+        distancias = 0
+        for agente, pos in self.posicoes_agentes.items():
+            alvos = self.ninhos if self.agentes_carry.get(agente, 0) > 0 else self.recursos
+            alvo = self._alvo_mais_proximo(pos, alvos)
+            if alvo:
+                distancias += _dist_manhattan(pos, alvo)
+        return pendentes * escala + distancias
+
+    def recompensa_maxima_restante(self, agente, passos_restantes):
+        """
+        Majorante da recompensa que o agente ainda pode receber no episodio:
+        valor de todos os recursos por depositar, bonus de apanhar e bonus final.
+        Com reposicao soma ainda um recurso novo (o mais valioso) por cada dois
+        passos restantes, o maximo que um agente consegue apanhar e depositar.
+        """
+        por_recolher = sum(self.valores_recursos.get(r, 1.0) for r in self.recursos)
+        transportado = sum(self.agentes_carry.values())
+        maximo = por_recolher + transportado + 0.5 * len(self.recursos) + 3.0
+        if self._eventos:
+            valores = [a["valor"] for a in self.aglomerados] + list(self._valores_iniciais.values()) + [1.0]
+            maximo += (passos_restantes // 2 + 1) * (max(valores) + 0.5)
+        return maximo
+
+    def melhoria_maxima_distancia(self, agente, passos_restantes):
+        """
+        Uma casa por passo, mais um salto ate 0 quando outro agente apanha o ultimo recurso.
+        Com reposicao pode nascer um recurso ao lado do agente em qualquer passo.
+        """
+        maxima = self.largura + self.altura - 2
+        if self.atraso_reposicao > 0 or self.aglomerados:
+            return passos_restantes * maxima
+        return passos_restantes + maxima
+
+    def dinamica_aleatoria(self):
+        variacao = self.atraso_reposicao > 0 and self.variacao_reposicao > 0
+        return variacao or any(a["taxa"] > 0 for a in self.aglomerados)
+
     def atualizacao(self):
-        pass
+        mudou = False
+        for evento in self._eventos_devidos():
+            if evento[0] == "recurso":
+                _, pos, valor = evento
+                mudou = self._por_recurso(pos, valor) or mudou
+            else:
+                i = evento[1]
+                aglomerado = self.aglomerados[i]
+                if self._ocupacao[i] < aglomerado["maximo"]:
+                    livres = [c for c in aglomerado["celulas"] if c not in self.recursos]
+                    if livres:
+                        mudou = self._por_recurso(random.choice(livres), aglomerado["valor"]) or mudou
+                self._agendar(self._intervalo(aglomerado["taxa"]), evento)
+        if mudou:
+            self._versao_recursos += 1
 
     def terminou(self):
         return self._terminou
 
     def reset(self):
+        alteradas = self.recursos ^ self._recursos_iniciais
         self.recursos = set(self._recursos_iniciais)
+        for pos in alteradas:
+            self._atualizar_celula(pos)
         self.valores_recursos = dict(self._valores_iniciais)
+        self._versao_recursos += 1
         self._terminou = False
         for agente, pos in self._posicoes_iniciais.items():
             self.posicoes_agentes[agente] = pos
             self.agentes_carry[agente] = 0
+        self._iniciar_dinamica()
 
     def render(self):
         grelha = [["." for _ in range(self.largura)] for _ in range(self.altura)]
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from agregador_metricas import AgregadorMetricas
+from core.MotorDeSimulacao import MotorDeSimulacao, correr_episodio
+
+
+def _celulas_livres(ambiente):
+    return [
+        (x, y)
+        for y in range(ambiente.altura)
+        for x in range(ambiente.largura)
+        if (x, y) not in ambiente.obstaculos and (x, y) != getattr(ambiente, "pos_farol", None)
+    ]
+
+
+def _congelar(agentes):
+    """
+    Fixa o genoma de cada agente genetico (o foraging evolui mesmo em modo teste)
+    e devolve uma funcao que o repoe depois de cada reset.
+    """
+    fixos = [(a, a._genoma_atual()) for a in agentes if hasattr(a, "_genoma_atual")]
+
+    def repor():
+        for agente, genoma in fixos:
+            agente.populacao = [genoma]
+            agente.fitnesses = [0.0]
+            agente.indice_genoma_atual = 0
+
+    return repor
+
+
+def avaliar(ficheiro_parametros, semente, episodios, posicoes_aleatorias):
+    """
+    Corre `episodios` episodios de um cenario com as politicas guardadas congeladas.
+    Corre num processo do pool; devolve a lista de resultados por episodio.
+    """
+    with open(ficheiro_parametros, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    random.seed(semente)
+    motor = MotorDeSimulacao(parametros=parametros)
+    motor._construir_ambiente(parametros.get("ambiente", {}))
+    ambiente = motor.ambiente
+
+    agentes = []
+    for cfg in parametros.get("agentes", []):
+        cfg = dict(cfg)
+        if cfg.get("modo") != "fixo":
+            cfg["modo"] = "teste"
+        if cfg.get("algoritmo") == "genetico":
+            cfg["cache_fitness"] = 0
+        agente = motor._criar_agente(cfg)
+        ambiente.adicionaAgente(agente, tuple(cfg.get("posicao_inicial", (0, 0))))
+        agentes.append(agente)
+    repor = _congelar(agentes)
+    livres = _celulas_livres(ambiente)
+    max_passos = parametros.get("max_passos", 10)
+
+    resultados = []
+    for ep in range(1, episodios + 1):
+        if posicoes_aleatorias:
+            for agente, pos in zip(agentes, random.sample(livres, len(agentes))):
+                ambiente.adicionaAgente(agente, pos)
+        ambiente.reset()
+        resultado = correr_episodio(ambiente, agentes, max_passos)
+        resultado["episodio"] = ep
+        resultados.append(resultado)
+        for agente in agentes:
+            agente.reset()
+        repor()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia politicas guardadas em varios cenarios e sementes, em paralelo.")
+    parser.add_argument("parametros", nargs="+", help="ficheiros de parametros (um cenario cada)")
+    parser.add_argument("--sementes", type=int, default=8)
+    parser.add_argument("--episodios", type=int, default=50, help="episodios por semente")
+    parser.add_argument("--posicoes-aleatorias", action="store_true", help="posicoes iniciais aleatorias em cada episodio")
+    parser.add_argument("--processos", type=int, default=None, help="por omissao, um por core")
+    args = parser.parse_args()
+
+    tarefas = [(f, s) for f in args.parametros for s in range(args.sementes)]
+    with ProcessPoolExecutor(max_workers=args.processos) as executor:
+        futuros = [
+            executor.submit(avaliar, f, s, args.episodios, args.posicoes_aleatorias)
+            for f, s in tarefas
+        ]
+        agregadores = {f: AgregadorMetricas() for f in args.parametros}
+        for (f, _), futuro in zip(tarefas, futuros):
+            for resultado in futuro.result():
+                agregadores[f].adiciona(resultado)
+
+    largura = max(len(os.path.basename(f)) for f in args.parametros)
+    print(f"{'cenario':<{largura}} | episodios | sucesso | passos medios | p50 | p90")
+    for f, agregador in agregadores.items():
+        r = agregador.resumo()
+        p = r["passos_percentis"]
+        print(
+            f"{os.path.basename(f):<{largura}} | {r['episodios']:>9} | {r['taxa_sucesso']:>6.1%} "
+            f"| {r['passos_medios']:>13.2f} | {p[50]:>3.0f} | {p[90]:>3.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
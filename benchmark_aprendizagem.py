@@ -0,0 +1,112 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import tempfile
+import time
+from collections import deque
+
+from agregador_metricas import iterar_episodios
+from core.MotorDeSimulacao import MotorDeSimulacao
+
+
+# Variantes comparadas: nome -> parametros extra de cada agente Q-learning
+VARIANTES = {
+    "q_learning": {},
+    "replay": {"replay_capacidade": 5000, "replay_lote": 32, "replay_a_cada": 1},
+    "dyna": {"planeamento": 10},
+    "q_lambda": {"lambda": 0.8, "tipo_tracos": "q_lambda"},
+    "sarsa_lambda": {"lambda": 0.8, "tipo_tracos": "sarsa_lambda"},
+}
+
+
+def preparar_parametros(parametros, pasta, extra):
+    """
+    Copia dos parametros para correr isolado: sem render, metricas numa pasta
+    temporaria e Q-tables vazias (nao le nem escreve as do repositorio).
+    """
+    p = json.loads(json.dumps(parametros))
+    p["render"] = False
+    p["render_window"] = False
+    p["ficheiro_metricas"] = os.path.join(pasta, "metricas.json")
+    p.pop("ficheiro_passos", None)
+    p.pop("ao_vivo", None)
+    for cfg in p.get("agentes", []):
+        cfg.pop("q_table", None)
+        cfg["modo"] = "aprendizagem"
+        cfg.update(extra)
+    return p
+
+
+def episodios_ate_alvo(ficheiro_metricas, alvo, janela):
+    """
+    Primeiro episodio em que a taxa de sucesso dos ultimos `janela` episodios
+    chega ao alvo (None se nunca chegar) e taxa de sucesso da corrida toda.
+    """
+    ultimos = deque(maxlen=janela)
+    atingido = None
+    sucessos = total = 0
+    for m in iterar_episodios(ficheiro_metricas):
+        sucesso = 1 if m.get("sucesso") else 0
+        sucessos += sucesso
+        total += 1
+        ultimos.append(sucesso)
+        if atingido is None and len(ultimos) == janela and sum(ultimos) / janela >= alvo:
+            atingido = m.get("episodio")
+    return atingido, sucessos / total if total else 0.0
+
+
+def correr(parametros, semente, extra, alvo, janela):
+    with tempfile.TemporaryDirectory() as pasta:
+        p = preparar_parametros(parametros, pasta, extra)
+        random.seed(semente)
+        inicio = time.perf_counter()
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            motor = MotorDeSimulacao.de_parametros(p)
+            motor.executa()
+        duracao = time.perf_counter() - inicio
+        episodios, taxa = episodios_ate_alvo(p["ficheiro_metricas"], alvo, janela)
+        return episodios, taxa, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara variantes de aprendizagem dos agentes Q-learning.")
+    parser.add_argument("parametros", nargs="?", default="parametros_farol.json")
+    parser.add_argument("--sementes", type=int, default=5)
+    parser.add_argument("--episodios", type=int, help="limite de episodios por corrida")
+    parser.add_argument("--alvo", type=float, default=0.8, help="taxa de sucesso a atingir")
+    parser.add_argument("--janela", type=int, default=10)
+    parser.add_argument("--variantes", default=",".join(VARIANTES), help=f"lista separada por virgulas de {', '.join(VARIANTES)}")
+    parser.add_argument("--extra", default="{}", help='parametros JSON a juntar a todas as variantes, ex. {"replay_lote": 64}')
+    args = parser.parse_args()
+
+    with open(args.parametros, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    if args.episodios:
+        parametros["episodios"] = args.episodios
+    limite = parametros.get("episodios", 1)
+
+    comum = json.loads(args.extra)
+    for nome in args.variantes.split(","):
+        extra = dict(VARIANTES[nome], **comum)
+        resultados = []
+        taxas = []
+        tempo = 0.0
+        for semente in range(args.sementes):
+            episodios, taxa, duracao = correr(parametros, semente, extra, args.alvo, args.janela)
+            resultados.append(episodios)
+            taxas.append(taxa)
+            tempo += duracao
+        atingiram = [e for e in resultados if e is not None]
+        # corridas que nunca chegam ao alvo contam com o limite de episodios
+        media = sum(e if e is not None else limite for e in resultados) / len(resultados)
+        print(
+            f"{nome:>16}: episodios ate {args.alvo:.0%} (janela {args.janela}) = {media:.1f} "
+            f"[{len(atingiram)}/{len(resultados)} atingiram] | sucesso global {sum(taxas) / len(taxas):.0%} "
+            f"| tempo {tempo:.1f}s | {resultados}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from core.MotorDeSimulacao import MotorDeSimulacao
+
+
+def multiplicar_agentes(parametros, copias):
+    """
+    Cenario com `copias` vezes os agentes do ficheiro (nomes A1_1, A1_2, ...),
+    todos na posicao inicial do original. Sem Q-tables nem genomas em disco.
+    """
+    agentes = []
+    for cfg in parametros.get("agentes", []):
+        for i in range(1, copias + 1):
+            copia = dict(cfg, nome=f"{cfg.get('nome', 'agente')}_{i}")
+            for chave in ("q_table", "ficheiro_genoma"):
+                copia.pop(chave, None)
+            agentes.append(copia)
+    return dict(parametros, agentes=agentes)
+
+
+def medir(parametros, pasta):
+    """
+    Corre a simulacao (sem prints, ficheiros em `pasta`) e devolve o pico de memoria
+    Python (tracemalloc), o tamanho do historico de passos e o tempo.
+    """
+    p = dict(parametros)
+    p["render"] = False
+    p["render_window"] = False
+    p.pop("ao_vivo", None)
+    p["ficheiro_metricas"] = os.path.join(pasta, "metricas.json")
+    p["ficheiro_passos"] = os.path.join(pasta, "passos.json")
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        motor = MotorDeSimulacao.de_parametros(p)
+        for ep in range(1, motor.episodios + 1):
+            motor._executar_episodio(ep)
+        _, pico_episodios = tracemalloc.get_traced_memory()
+        motor._terminar()
+    duracao = time.perf_counter() - inicio
+    atual, pico = tracemalloc.get_traced_memory()
+    # tamanho do historico: memoria libertada ao descarta-lo
+    passos = len(motor.historico_passos_todos)
+    motor.historico_passos_todos = []
+    gc.collect()
+    bytes_historico = atual - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "passos": passos,
+        "pico_episodios": pico_episodios,
+        "pico_total": pico,
+        "bytes_historico": bytes_historico,
+        "duracao": duracao,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de memoria (tracemalloc) de uma simulacao longa com muitos agentes.")
+    parser.add_argument("parametros", nargs="?", default="parametros_foraging.json")
+    parser.add_argument("--copias", type=int, default=10, help="copias de cada agente do ficheiro")
+    parser.add_argument("--episodios", type=int, default=200)
+    parser.add_argument("--max-passos", type=int, help="por omissao, o do ficheiro")
+    args = parser.parse_args()
+
+    with open(args.parametros, "r", encoding="utf-8") as f:
+        parametros = multiplicar_agentes(json.load(f), args.copias)
+    parametros["episodios"] = args.episodios
+    if args.max_passos:
+        parametros["max_passos"] = args.max_passos
+
+    with tempfile.TemporaryDirectory() as pasta:
+        r = medir(parametros, pasta)
+
+    mib = 1024 * 1024
+    print(f"{os.path.basename(args.parametros)}: {len(parametros['agentes'])} agentes, {args.episodios} episodios, {r['passos']} registos de passos")
+    print(f"  pico durante os episodios  {r['pico_episodios'] / mib:8.2f} MiB")
+    print(f"  pico incluindo a gravacao  {r['pico_total'] / mib:8.2f} MiB")
+    print(f"  historico de passos        {r['bytes_historico'] / mib:8.2f} MiB ({r['bytes_historico'] / max(1, r['passos']):.0f} B/passo)")
+    # ru_maxrss: KiB em Linux, bytes em macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (mib if sys.platform == "darwin" else 1024)
+    print(f"  RSS maximo do processo     {rss:8.2f} MiB")
+    print(f"  tempo                      {r['duracao']:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import time
+
+from core.MotorDeSimulacao import MotorDeSimulacao
+from core.Observacao import Observacao
+from core.PoliticaCompilada import compilar
+
+
+def observacoes_do_cenario(ambiente, agente):
+    """
+    Observacoes de referencia para medir/verificar: o agente em cada celula livre
+    da grelha, com o estado inicial do ambiente (e, no foraging, a carregar ou nao).
+    """
+    ambiente.adicionaAgente(agente, (0, 0))
+    observacoes = []
+    for y in range(ambiente.altura):
+        for x in range(ambiente.largura):
+            if (x, y) in ambiente.obstaculos:
+                continue
+            ambiente.posicoes_agentes[agente] = (x, y)
+            if hasattr(ambiente, "agentes_carry"):
+                for carga in (0, 1):
+                    ambiente.agentes_carry[agente] = carga
+                    observacoes.append(ambiente.observacaoPara(agente))
+            else:
+                observacoes.append(ambiente.observacaoPara(agente))
+    return observacoes
+
+
+def medir(agente, politica, observacoes, repeticoes):
+    iguais = 0
+    for obs in observacoes:
+        agente.observacao(obs)
+        if hasattr(agente, "stall_count"):
+            agente.stall_count = 0
+        if agente.age().codigo == politica.accao(obs.dados):
+            iguais += 1
+
+    # observacoes novas em cada repeticao, como numa corrida: com as mesmas o agente
+    # so codificava o estado na primeira (fica memorizado em cada Observacao)
+    rondas = [[Observacao(obs.dados) for obs in observacoes] for _ in range(repeticoes)]
+    inicio = time.perf_counter()
+    for ronda in rondas:
+        for obs in ronda:
+            agente.observacao(obs)
+            agente.age()
+    tempo_agente = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for ronda in rondas:
+        for obs in ronda:
+            politica.accao(obs.dados)
+    tempo_compilada = time.perf_counter() - inicio
+
+    decisoes = repeticoes * len(observacoes)
+    return iguais, tempo_agente / decisoes * 1e6, tempo_compilada / decisoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compila as politicas treinadas (Q-table/genoma) em arrays densos.")
+    parser.add_argument("parametros", help="ficheiro de parametros com os agentes a compilar")
+    parser.add_argument("--pasta", default=".", help="pasta onde escrever politica_<nome>.json")
+    parser.add_argument("--medir", type=int, default=0, help="repeticoes para medir o custo por decisao (0 = nao mede)")
+    args = parser.parse_args()
+
+    with open(args.parametros, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    motor = MotorDeSimulacao(parametros=parametros)
+    cfg_ambiente = parametros.get("ambiente", {})
+    os.makedirs(args.pasta, exist_ok=True)
+
+    for cfg in parametros.get("agentes", []):
+        cfg = dict(cfg)
+        if cfg.get("algoritmo") == "compilada":
+            continue
+        # compila a politica greedy: sem exploracao nem aprendizagem
+        if cfg.get("modo") != "fixo":
+            cfg["modo"] = "teste"
+        agente = motor._criar_agente(cfg)
+        motor._construir_ambiente(cfg_ambiente)
+        largura, altura = motor.ambiente.largura, motor.ambiente.altura
+        try:
+            politica = compilar(agente, largura, altura)
+        except ValueError as e:
+            print(f"{agente.nome}: {e}")
+            continue
+
+        caminho = os.path.join(args.pasta, os.path.basename(cfg.get("politica", f"politica_{agente.nome}.json")))
+        politica.guardar(caminho)
+        print(f"{agente.nome}: {len(politica.accoes)} entradas ({politica.codificador}) -> {caminho}")
+
+        if args.medir > 0:
+            observacoes = observacoes_do_cenario(motor.ambiente, agente)
+            iguais, us_agente, us_compilada = medir(agente, politica, observacoes, args.medir)
+            print(
+                f"  {iguais}/{len(observacoes)} decisoes iguais | "
+                f"agente {us_agente:.2f} us/decisao | compilada {us_compilada:.2f} us/decisao"
+            )
+
+
+if __name__ == "__main__":
+    main()
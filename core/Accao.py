@@ -1,5 +1,28 @@
+# Codigos inteiros das accoes (usados nos caminhos quentes em vez de strings)
+N, S, E, O, F, APANHAR, DEPOSITAR = range(7)
+NOMES_ACCOES = ("N", "S", "E", "O", "F", "APANHAR", "DEPOSITAR")
+CODIGOS_ACCOES = {nome: codigo for codigo, nome in enumerate(NOMES_ACCOES)}
+
+# Movimentos na grelha: codigo -> deslocamento (dx, dy); bit na mascara = 1 << codigo
+CODIGOS_MOVIMENTO = (N, S, E, O)
+MOVIMENTOS = {N: (0, -1), S: (0, 1), E: (1, 0), O: (-1, 0)}
+BITS_MOVIMENTO = tuple(1 << codigo for codigo in range(len(NOMES_ACCOES)))
+
+
 # Estrutura simples para transportar o tipo de accao e parametros
 class Accao:
+    __slots__ = ("tipo", "codigo", "parametros")
+
     def __init__(self, tipo, parametros=None):
-        self.tipo = tipo
+        # aceita o nome ("N") ou o codigo (N); guarda sempre os dois
+        if isinstance(tipo, int):
+            self.codigo = tipo
+            self.tipo = NOMES_ACCOES[tipo]
+        else:
+            self.tipo = tipo
+            self.codigo = CODIGOS_ACCOES.get(tipo, -1)
         self.parametros = parametros or {}
+
+
+# Instancias unicas pre-construidas, indexadas pelo codigo (evita alocar uma Accao por passo)
+ACCOES = tuple(Accao(codigo) for codigo in range(len(NOMES_ACCOES)))
@@ -4,6 +4,8 @@ class Agente:
         self.nome = nome
         self.ultima_observacao = None
         self.sensores = []
+        # barramento de mensagens do motor (None = sem comunicacao)
+        self.barramento = None
 
     # --------- interface pedida no enunciado ---------
 
@@ -46,11 +48,27 @@ class Agente:
     def instala(self, sensor: "Sensor"):
         """
         Instala um novo sensor no agente.
+        Com sensores, o ambiente passa a dar-lhe uma observacao parcial (ver Sensor).
         """
         self.sensores.append(sensor)
 
-    def comunica(self, mensagem: str, de_agente: "Agente"):
+    def leituras(self, dados: dict) -> tuple:
         """
-        Comunicação entre agentes (podes deixar vazio se não usares).
+        Leituras dos sensores instalados (pela ordem de instalacao) numa observacao.
+        """
+        return tuple(dados.get(sensor.nome) for sensor in self.sensores)
+
+    def comunica(self, mensagem, de_agente: "Agente"):
+        """
+        Comunicação entre agentes: recebe uma mensagem de outro agente
+        (entregue pelo barramento no fim de cada passo). Por omissão ignora.
         """
         pass
+
+    def envia(self, mensagem, raio=None):
+        """
+        Envia uma mensagem aos outros agentes (todos, ou so a distancia <= raio);
+        sem barramento configurado no motor nao faz nada.
+        """
+        if self.barramento is not None:
+            self.barramento.envia(self, mensagem, raio)
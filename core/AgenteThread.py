@@ -27,10 +27,13 @@ class AgenteThread(threading.Thread):
             accao = self.agente.age()
             self.action_queue.put(accao)
             avaliacao = self.eval_queue.get()
-            if avaliacao is None:
-                continue
-            recompensa, nova_obs, terminou = avaliacao
-            self.agente.avaliacaoEstadoAtual(recompensa, nova_obs, terminou)
+            try:
+                if avaliacao is None:
+                    continue
+                recompensa, nova_obs, terminou = avaliacao
+                self.agente.avaliacaoEstadoAtual(recompensa, nova_obs, terminou)
+            finally:
+                self.eval_queue.task_done()
 
     def passo(self, observacao):
         self.obs_queue.put(observacao)
@@ -39,6 +42,12 @@ class AgenteThread(threading.Thread):
     def avaliar(self, recompensa, nova_observacao, terminou):
         self.eval_queue.put((recompensa, nova_observacao, terminou))
 
+    def esperar(self):
+        """
+        Bloqueia ate o agente terminar de processar as avaliacoes pendentes.
+        """
+        self.eval_queue.join()
+
     def parar(self):
         self._parar.set()
         self.obs_queue.put(None)
@@ -1,9 +1,146 @@
+import heapq
+
+from core.Accao import MOVIMENTOS, BITS_MOVIMENTO, NOMES_ACCOES
+from core.Observacao import Observacao
+from core.Sensor import LIVRE, OBSTACULO
+
+try:  # opcional: com numpy a janela dos sensores e um unico corte do array
+    import numpy as np
+except ImportError:
+    np = None
+
+
 # Interface base de ambiente (fornece observacoes e aplica acoes)
 class Ambiente:
     def __init__(self):
         # Dicionário para guardar a posição de cada agente no ambiente
         # Exemplo: {agente1: (x, y), agente2: (x2, y2), ...}
         self.posicoes_agentes = {}
+        # ultima observacao de cada agente e a "assinatura" do estado que a gerou
+        self._observacoes = {}
+        # fila de eventos agendados (passo, ordem, evento): a dinamica do ambiente
+        # so custa o que acontece em cada passo, nao o tamanho do mapa
+        self._eventos = []
+        self._passo = 0
+        self._ordem_eventos = 0
+        # grelha dos sensores (codigos de core.Sensor), criada no primeiro pedido de janela
+        # e depois atualizada celula a celula; `_margem` celulas de obstaculo a volta
+        self._grelha = None
+        self._margem = 0
+
+    def _observacao_em_cache(self, agente, assinatura):
+        """
+        Devolve a ultima Observacao do agente se o estado relevante nao mudou desde entao
+        (mesma assinatura); assim os valores memorizados nela (Observacao.memo) sao reaproveitados.
+        """
+        em_cache = self._observacoes.get(agente)
+        if em_cache is not None and em_cache[0] == assinatura:
+            return em_cache[1]
+        return None
+
+    def _guardar_observacao(self, agente, assinatura, obs):
+        self._observacoes[agente] = (assinatura, obs)
+        return obs
+
+    def _agendar(self, atraso, evento):
+        """
+        Agenda `evento` (um tuplo) para daqui a `atraso` passos (pelo menos 1).
+        """
+        self._ordem_eventos += 1
+        heapq.heappush(self._eventos, (self._passo + max(1, int(atraso)), self._ordem_eventos, evento))
+
+    def _eventos_devidos(self):
+        """
+        Avanca um passo e devolve, por ordem, os eventos agendados ate ao passo atual.
+        """
+        self._passo += 1
+        while self._eventos and self._eventos[0][0] <= self._passo:
+            yield heapq.heappop(self._eventos)[2]
+
+    def _limpar_eventos(self):
+        self._eventos = []
+        self._passo = 0
+
+    def _conteudo_celula(self, pos):
+        """
+        Codigo (core.Sensor) do que esta na celula, sem contar com os agentes.
+        As subclasses acrescentam recursos, ninhos, farol...
+        """
+        return OBSTACULO if pos in self.obstaculos else LIVRE
+
+    def _construir_grelha(self, margem):
+        self._margem = margem
+        largura, altura = self.largura + 2 * margem, self.altura + 2 * margem
+        linhas = []
+        for y in range(-margem, self.altura + margem):
+            linha = bytearray([OBSTACULO]) * largura
+            if 0 <= y < self.altura:
+                for x in range(self.largura):
+                    linha[x + margem] = self._conteudo_celula((x, y))
+            linhas.append(linha)
+        if np is not None:
+            self._grelha = np.frombuffer(b"".join(linhas), dtype=np.uint8).reshape(altura, largura).copy()
+        else:
+            self._grelha = linhas
+
+    def _atualizar_celula(self, pos):
+        """
+        Chamado quando o conteudo de uma celula muda (recurso apanhado, farol movido...).
+        """
+        if self._grelha is not None:
+            x, y = pos
+            self._grelha[y + self._margem][x + self._margem] = self._conteudo_celula(pos)
+
+    def janela(self, x, y, raio):
+        """
+        Celulas a distancia <= raio (em x e em y) de (x, y), em bytes, linha a linha;
+        fora do mapa conta como obstaculo.
+        """
+        if self._grelha is None or raio > self._margem:
+            self._construir_grelha(max(raio, self._margem))
+        x0, y0 = x + self._margem - raio, y + self._margem - raio
+        lado = 2 * raio + 1
+        if np is not None:
+            return self._grelha[y0:y0 + lado, x0:x0 + lado].tobytes()
+        return b"".join(linha[x0:x0 + lado] for linha in self._grelha[y0:y0 + lado])
+
+    def celula_alvo(self, agente):
+        """
+        Codigo da celula que o agente procura (usado por SensorAlvoProximo).
+        """
+        return None
+
+    def _observacao_sensores(self, agente, dados):
+        """
+        Observacao parcial de um agente com sensores: os `dados` locais
+        mais a leitura de cada sensor instalado.
+        """
+        for sensor in agente.sensores:
+            dados[sensor.nome] = sensor.mede(self, agente)
+        return Observacao(dados)
+
+    def _construir_tabelas_movimento(self, largura, altura, obstaculos):
+        """
+        Pre-calcula, para cada celula da grelha, a mascara de movimentos validos,
+        a lista de codigos de movimentos validos e a tabela de transicao
+        (tuplo indexado pelo codigo da accao -> destino, ou None se bloqueado).
+        Os obstaculos sao estaticos, por isso basta fazer isto uma vez na construcao.
+        """
+        self.mascaras_movimento = {}
+        self.movimentos_validos_celula = {}
+        self.transicoes = {}
+        for y in range(altura):
+            for x in range(largura):
+                mascara = 0
+                destinos = [None] * len(NOMES_ACCOES)
+                for codigo, (dx, dy) in MOVIMENTOS.items():
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < largura and 0 <= ny < altura and (nx, ny) not in obstaculos:
+                        mascara |= BITS_MOVIMENTO[codigo]
+                        destinos[codigo] = (nx, ny)
+                self.mascaras_movimento[(x, y)] = mascara
+                self.movimentos_validos_celula[(x, y)] = [c for c in MOVIMENTOS if destinos[c]]
+                self.transicoes[(x, y)] = tuple(destinos)
 
     def observacaoPara(self, agente):
         """
@@ -31,3 +168,17 @@ class Ambiente:
         Reinicia o estado do ambiente (para novo episódio).
         """
         raise NotImplementedError
+
+    def melhoria_maxima_distancia(self, agente, passos_restantes):
+        """
+        Quanto a distancia do agente ao seu alvo ainda pode diminuir no total (soma das
+        descidas) nos passos restantes; por omissao uma casa por passo.
+        """
+        return passos_restantes
+
+    def dinamica_aleatoria(self):
+        """
+        True se o ambiente muda ao acaso durante o episodio (o mesmo comportamento
+        pode ter resultados diferentes); por omissao nao muda.
+        """
+        return False
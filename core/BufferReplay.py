@@ -0,0 +1,87 @@
+import random
+from array import array
+
+
+class BufferReplay:
+    """
+    Buffer circular de transicoes (experience replay) para os agentes Q-learning.
+    Tamanho fixo e guardado em arrays compactos: os estados sao convertidos
+    para indices inteiros uma unica vez (self.estados), por isso cada transicao
+    ocupa so alguns bytes e nao ha um tuplo/dict alocado por passo.
+
+    A cada `a_cada` transicoes guardadas e feito um lote de `tamanho_lote`
+    atualizacoes: os alvos TD de todo o lote sao calculados primeiro (com a
+    Q-table congelada) e so depois aplicados, com os erros de transicoes
+    repetidas (mesmo estado/accao) juntos numa so atualizacao (media).
+    """
+
+    def __init__(self, capacidade=5000, tamanho_lote=32, a_cada=1):
+        self.capacidade = max(1, int(capacidade))
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self.a_cada = max(1, int(a_cada))
+        self.estados = {}
+        self.lista_estados = []
+        self._estado = array("l", bytes(array("l").itemsize * self.capacidade))
+        self._accao = array("b", bytes(self.capacidade))
+        self._recompensa = array("d", bytes(array("d").itemsize * self.capacidade))
+        self._prox_estado = array("l", bytes(array("l").itemsize * self.capacidade))
+        self._terminou = array("b", bytes(self.capacidade))
+        self.tamanho = 0
+        self._pos = 0
+        self._desde_ultimo_lote = 0
+        self.lotes = 0
+
+    def _indice_estado(self, estado):
+        indice = self.estados.get(estado)
+        if indice is None:
+            indice = len(self.lista_estados)
+            self.estados[estado] = indice
+            self.lista_estados.append(estado)
+        return indice
+
+    def guardar(self, estado, accao, recompensa, prox_estado, terminou):
+        """
+        Acrescenta uma transicao (substitui a mais antiga quando cheio) e diz
+        se ja e altura de fazer um lote de atualizacoes.
+        """
+        i = self._pos
+        self._estado[i] = self._indice_estado(estado)
+        self._accao[i] = accao
+        self._recompensa[i] = recompensa
+        self._prox_estado[i] = self._indice_estado(prox_estado)
+        self._terminou[i] = 1 if terminou else 0
+        self._pos = (i + 1) % self.capacidade
+        if self.tamanho < self.capacidade:
+            self.tamanho += 1
+        self._desde_ultimo_lote += 1
+        return self._desde_ultimo_lote >= self.a_cada and self.tamanho >= self.tamanho_lote
+
+    def atualizar_lote(self, q_table, accoes, alpha, gamma):
+        """
+        Amostra um lote uniforme do buffer e aplica-o a q_table (dict (estado, accao) -> Q).
+        """
+        self._desde_ultimo_lote = 0
+        self.lotes += 1
+        amostra = [random.randrange(self.tamanho) for _ in range(self.tamanho_lote)]
+        estados = self.lista_estados
+
+        # valor do proximo estado calculado uma vez por estado distinto do lote
+        max_q = {}
+        erros = {}
+        for i in amostra:
+            s2 = self._prox_estado[i]
+            if self._terminou[i]:
+                futuro = 0.0
+            else:
+                futuro = max_q.get(s2)
+                if futuro is None:
+                    e2 = estados[s2]
+                    futuro = max(q_table.get((e2, a), 0.0) for a in accoes)
+                    max_q[s2] = futuro
+            chave = (estados[self._estado[i]], self._accao[i])
+            erro = self._recompensa[i] + gamma * futuro - q_table.get(chave, 0.0)
+            soma, n = erros.get(chave, (0.0, 0))
+            erros[chave] = (soma + erro, n + 1)
+
+        for chave, (soma, n) in erros.items():
+            q_table[chave] = q_table.get(chave, 0.0) + alpha * soma / n
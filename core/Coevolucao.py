@@ -0,0 +1,211 @@
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from core.Configuracao import Cenario
+from core.MotorDeSimulacao import correr_episodio
+
+EMPARELHAMENTOS = ("partilhado", "melhor_parceiro")
+
+# ambiente e agentes de cada processo avaliador, criados uma vez por processo
+_avaliador = {}
+
+
+def _iniciar_avaliador(parametros):
+    cenario = Cenario(parametros)
+    ambiente = cenario.ambiente.criar()
+    agentes = []
+    for compilado in cenario.agentes:
+        agente = compilado.criar()
+        ambiente.adicionaAgente(agente, compilado.posicao_inicial)
+        agentes.append(agente)
+    _avaliador.update(ambiente=ambiente, agentes=agentes, max_passos=parametros.get("max_passos", 10))
+
+
+def avaliar_equipa(genomas, episodios, semente):
+    """
+    Joga `episodios` episodios conjuntos com um genoma fixo por agente genetico.
+    Devolve o fitness medio de cada agente ({nome: fitness}) e a taxa de sucesso.
+    """
+    random.seed(semente)
+    ambiente = _avaliador["ambiente"]
+    agentes = _avaliador["agentes"]
+    for agente in agentes:
+        if agente.nome in genomas:
+            agente.populacao = [genomas[agente.nome]]
+            agente.fitnesses = [0.0]
+            agente.indice_genoma_atual = 0
+    totais = dict.fromkeys(genomas, 0.0)
+    sucessos = 0
+    for _ in range(episodios):
+        ambiente.reset()
+        sucessos += correr_episodio(ambiente, agentes, _avaliador["max_passos"])["sucesso"]
+        for agente in agentes:
+            if agente.nome in totais:
+                # o fitness e lido diretamente, sem passar pela populacao do agente
+                totais[agente.nome] += agente._fitness_episodio()
+                agente.ultima_observacao = None
+                agente._limpar_episodio()
+            else:
+                agente.reset()
+    return {nome: total / episodios for nome, total in totais.items()}, sucessos / episodios
+
+
+class Coevolucao:
+    """
+    Treino conjunto dos agentes geneticos, fora do ciclo normal de episodios.
+    Em vez de emparelhar o individuo i de cada agente com o individuo i dos outros,
+    cada geracao monta equipas explicitas e avalia-as em lote (em paralelo):
+    - "partilhado": uma so populacao; cada genoma controla todos os agentes geneticos
+      (que tem de ser do mesmo tipo) e o fitness e a media da equipa;
+    - "melhor_parceiro": cada agente mantem a sua populacao e cada individuo joga com
+      o melhor genoma ja encontrado de cada outro agente (e com `parceiros - 1`
+      individuos ao acaso da populacao deles); conta o melhor resultado.
+    Os restantes agentes (Q-learning, fixos) jogam em modo teste.
+
+    Parametros (bloco "coevolucao"): emparelhamento, geracoes, parceiros, processos, semente.
+    """
+
+    def __init__(self, parametros: dict):
+        cfg = parametros.get("coevolucao", {})
+        self.emparelhamento = cfg.get("emparelhamento", "partilhado")
+        if self.emparelhamento not in EMPARELHAMENTOS:
+            raise ValueError(f"Emparelhamento desconhecido: {self.emparelhamento}")
+        self.geracoes = max(1, int(cfg.get("geracoes", 20)))
+        self.parceiros = max(1, int(cfg.get("parceiros", 1)))
+        self.processos = cfg.get("processos")
+        self.semente = cfg.get("semente")
+        self.parametros = parametros
+
+        if self.semente is not None:
+            random.seed(self.semente)
+        cenario = Cenario(parametros)
+        self.geneticos = []
+        for compilado in cenario.agentes:
+            if compilado.cfg.get("algoritmo") == "genetico":
+                agente = compilado.criar()
+                agente.cache_fitness_tamanho = 0
+                self.geneticos.append(agente)
+        if not self.geneticos:
+            raise ValueError("A coevolucao precisa de pelo menos um agente genetico")
+        if self.emparelhamento == "partilhado" and len({type(a) for a in self.geneticos}) > 1:
+            raise ValueError("Genoma partilhado: os agentes geneticos tem de ser do mesmo tipo")
+        self.episodios_por_equipa = self.geneticos[0].episodios_por_individuo
+        self.episodios_totais = 0
+        self.historico = []
+
+    def _parametros_avaliador(self):
+        p = json.loads(json.dumps(self.parametros))
+        p.pop("coevolucao", None)
+        for cfg in p.get("agentes", []):
+            if cfg.get("algoritmo") != "genetico" and cfg.get("modo") != "fixo":
+                cfg["modo"] = "teste"
+        return p
+
+    def _equipas(self):
+        """
+        Equipas da geracao: lista de ({nome: genoma}, (agente, indice) a creditar).
+        """
+        equipas = []
+        if self.emparelhamento == "partilhado":
+            for i, genoma in enumerate(self.geneticos[0].populacao):
+                equipas.append(({a.nome: genoma for a in self.geneticos}, (None, i)))
+            return equipas
+        for agente in self.geneticos:
+            outros = [a for a in self.geneticos if a is not agente]
+            for i, genoma in enumerate(agente.populacao):
+                for p in range(self.parceiros):
+                    equipa = {agente.nome: genoma}
+                    for outro in outros:
+                        equipa[outro.nome] = outro.melhor_genoma if p == 0 else random.choice(outro.populacao)
+                    equipas.append((equipa, (agente, i)))
+        return equipas
+
+    def _creditar(self, equipas, resultados):
+        if self.emparelhamento == "partilhado":
+            dono = self.geneticos[0]
+            dono.fitnesses = [0.0] * len(dono.populacao)
+            for (_, (_, i)), (fitness, _) in zip(equipas, resultados):
+                dono.fitnesses[i] = sum(fitness.values()) / len(fitness)
+            return
+        melhores = {}
+        for (_, (agente, i)), (fitness, _) in zip(equipas, resultados):
+            chave = (agente.nome, i)
+            melhores[chave] = max(melhores.get(chave, -float("inf")), fitness[agente.nome])
+        for agente in self.geneticos:
+            agente.fitnesses = [melhores[(agente.nome, i)] for i in range(len(agente.populacao))]
+
+    def _populacoes(self):
+        # agentes com populacao propria (no genoma partilhado, so o primeiro)
+        return self.geneticos[:1] if self.emparelhamento == "partilhado" else self.geneticos
+
+    def _evoluir(self):
+        if self.emparelhamento == "partilhado":
+            dono = self.geneticos[0]
+            dono._evoluir()
+            for agente in self.geneticos[1:]:
+                agente.melhor_genoma = dono.melhor_genoma
+                agente.melhor_fitness = dono.melhor_fitness
+        else:
+            for agente in self.geneticos:
+                agente._evoluir()
+        for agente in self.geneticos:
+            agente.guardar_politica()
+
+    def executa(self):
+        parametros = self._parametros_avaliador()
+        executor = None
+        processos = self.processos or os.cpu_count() or 1
+        if processos > 1:
+            executor = ProcessPoolExecutor(processos, initializer=_iniciar_avaliador, initargs=(parametros,))
+        else:
+            # criar os agentes do avaliador nao pode mexer no gerador aleatorio da coevolucao
+            estado = random.getstate()
+            _iniciar_avaliador(parametros)
+            random.setstate(estado)
+
+        try:
+            for geracao in range(1, self.geracoes + 1):
+                equipas = self._equipas()
+                sementes = [random.getrandbits(32) for _ in equipas]
+                genomas = [g for g, _ in equipas]
+                episodios = [self.episodios_por_equipa] * len(equipas)
+                if executor:
+                    # poucos lotes grandes por processo: menos idas e voltas entre processos
+                    lote = max(1, len(equipas) // (4 * processos))
+                    resultados = list(executor.map(avaliar_equipa, genomas, episodios, sementes, chunksize=lote))
+                else:
+                    # avaliar_equipa semeia o gerador global; no mesmo processo repoe-se o da coevolucao
+                    estado = random.getstate()
+                    resultados = list(map(avaliar_equipa, genomas, episodios, sementes))
+                    random.setstate(estado)
+                self.episodios_totais += len(equipas) * self.episodios_por_equipa
+                self._creditar(equipas, resultados)
+                self._registar(geracao, resultados)
+                self._evoluir()
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self._guardar_historico()
+        return self.historico
+
+    def _registar(self, geracao, resultados):
+        registo = {
+            "geracao": geracao,
+            "episodios": self.episodios_totais,
+            "taxa_sucesso": sum(s for _, s in resultados) / len(resultados),
+            "melhor_fitness": {a.nome: max(a.fitnesses) for a in self._populacoes()},
+        }
+        self.historico.append(registo)
+        melhores = ", ".join(f"{nome} {f:.2f}" for nome, f in registo["melhor_fitness"].items())
+        print(
+            f"[coevolucao] geracao {geracao}: {self.episodios_totais} episodios, "
+            f"sucesso {registo['taxa_sucesso'] * 100:.0f}%, melhor fitness {melhores}"
+        )
+
+    def _guardar_historico(self):
+        base, extensao = os.path.splitext(self.parametros.get("ficheiro_metricas", "metricas.json"))
+        with open(f"{base}_coevolucao{extensao or '.json'}", "w", encoding="utf-8") as f:
+            json.dump(self.historico, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,77 @@
+import time
+
+
+class BarramentoMensagens:
+    """
+    Canal de mensagens entre agentes do motor. O que os agentes enviam durante o passo
+    (Agente.envia) fica pendente e e entregue de uma so vez no fim do passo
+    (Agente.comunica): a todos os outros agentes (difusao, raio None) ou so aos que
+    estao a distancia de Manhattan <= raio do emissor. Cada agente recebe no maximo
+    `capacidade` mensagens por entrega; as mais antigas em excesso sao descartadas.
+    Conta mensagens enviadas, entregues e descartadas (estatisticas, deterministas) e
+    mede a latencia envio -> entrega em tempo de relogio (latencia_media_ms, so para mostrar).
+    """
+
+    def __init__(self, capacidade=8, raio=None):
+        self.capacidade = max(1, int(capacidade))
+        self.raio = raio
+        # (instante de envio, emissor, mensagem, raio); list.append e atomico entre threads
+        self._pendentes = []
+        self.reiniciar_estatisticas()
+
+    def reiniciar_estatisticas(self):
+        self.enviadas = 0
+        self.entregues = 0
+        self.descartadas = 0
+        self._latencia_total = 0.0
+
+    def limpar(self):
+        self._pendentes = []
+        self.reiniciar_estatisticas()
+
+    def envia(self, de_agente, mensagem, raio=None):
+        self._pendentes.append((time.perf_counter(), de_agente, mensagem, self.raio if raio is None else raio))
+
+    def entrega(self, agentes, posicoes):
+        """
+        Entrega em lote as mensagens pendentes a `agentes`; `posicoes` (agente -> (x, y))
+        serve para o limite de raio. Devolve o numero de entregas.
+        """
+        pendentes, self._pendentes = self._pendentes, []
+        if not pendentes:
+            return 0
+        self.enviadas += len(pendentes)
+        caixas = {agente: [] for agente in agentes}
+        for enviado, de_agente, mensagem, raio in pendentes:
+            origem = posicoes.get(de_agente)
+            for agente, caixa in caixas.items():
+                if agente is de_agente:
+                    continue
+                if raio is not None and origem is not None:
+                    destino = posicoes.get(agente)
+                    if destino is not None and abs(destino[0] - origem[0]) + abs(destino[1] - origem[1]) > raio:
+                        continue
+                caixa.append((enviado, de_agente, mensagem))
+
+        entregues = 0
+        agora = time.perf_counter()
+        for agente, caixa in caixas.items():
+            if len(caixa) > self.capacidade:
+                self.descartadas += len(caixa) - self.capacidade
+                caixa = caixa[-self.capacidade:]
+            for enviado, de_agente, mensagem in caixa:
+                self._latencia_total += agora - enviado
+                agente.comunica(mensagem, de_agente)
+            entregues += len(caixa)
+        self.entregues += entregues
+        return entregues
+
+    def estatisticas(self):
+        return {
+            "enviadas": self.enviadas,
+            "entregues": self.entregues,
+            "descartadas": self.descartadas,
+        }
+
+    def latencia_media_ms(self):
+        return 1000.0 * self._latencia_total / self.entregues if self.entregues else 0.0
@@ -0,0 +1,518 @@
+import difflib
+import importlib
+
+# Esquema dos ficheiros de parametros e registo de ambientes/agentes.
+# Cada ambiente/agente e registado com a sua classe e os campos que aceita;
+# os parametros sao validados de uma vez (chaves desconhecidas, tipos, valores)
+# e compilados em fabricas que criam as instancias sem voltar a ler o JSON.
+
+
+def _tipos_de(omissao):
+    if isinstance(omissao, bool):
+        return (bool,)
+    if isinstance(omissao, int):
+        return (int,)
+    if isinstance(omissao, float):
+        return (int, float)
+    if omissao is None:
+        return None
+    return (type(omissao),)
+
+
+def _posicao(valor):
+    if not isinstance(valor, (list, tuple)) or len(valor) != 2 or not all(isinstance(v, int) and not isinstance(v, bool) for v in valor):
+        raise ValueError("deve ser uma posicao [x, y]")
+    return tuple(valor)
+
+
+def _posicoes(valor):
+    if not isinstance(valor, (list, tuple)):
+        raise ValueError("deve ser uma lista de posicoes [[x, y], ...]")
+    return [_posicao(v) for v in valor]
+
+
+def resolver_funcao(nome):
+    """
+    "modulo:funcao" -> funcao (por exemplo um codificador de estado).
+    """
+    modulo, _, funcao = nome.partition(":")
+    if not funcao:
+        raise ValueError(f"deve ter a forma modulo:funcao, nao {nome!r}")
+    try:
+        return getattr(importlib.import_module(modulo), funcao)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"nao foi possivel carregar {nome!r} ({e})")
+
+
+class Campo:
+    """
+    Um parametro aceite: argumento do construtor a que corresponde, valor por omissao
+    e validacao (tipos aceites, valores possiveis e conversao opcional).
+    """
+
+    def __init__(self, argumento=None, omissao=None, tipos=None, escolhas=None, converter=None):
+        self.argumento = argumento
+        self.omissao = omissao
+        self.tipos = tipos or _tipos_de(omissao)
+        self.escolhas = escolhas
+        self.converter = converter
+
+    def validar(self, valor):
+        if valor is None and self.omissao is None:
+            return None
+        if self.tipos and (not isinstance(valor, self.tipos) or (isinstance(valor, bool) and bool not in self.tipos)):
+            nomes = "/".join(t.__name__ for t in self.tipos)
+            raise ValueError(f"deve ser {nomes}, nao {type(valor).__name__} ({valor!r})")
+        if self.escolhas and valor not in self.escolhas:
+            raise ValueError(f"deve ser um de {', '.join(map(str, self.escolhas))}, nao {valor!r}")
+        return self.converter(valor) if self.converter else valor
+
+
+class Especificacao:
+    """
+    Entrada do registo: classe (ou "modulo:Classe", importada so quando usada), campos aceites
+    e, opcionalmente, `verificar(argumentos)` -> lista de erros que envolvem varios campos.
+    """
+
+    def __init__(self, classe, campos, verificar=None):
+        self._classe = classe
+        self.campos = campos
+        self.verificar = verificar
+
+    @property
+    def classe(self):
+        if isinstance(self._classe, str):
+            modulo, _, nome = self._classe.partition(":")
+            self._classe = getattr(importlib.import_module(modulo), nome)
+        return self._classe
+
+
+AMBIENTES = {}
+AGENTES = {}
+
+
+def regista_ambiente(tipo, classe, campos):
+    AMBIENTES[tipo] = Especificacao(classe, campos)
+
+
+def regista_agente(tipo, algoritmo, classe, campos, verificar=None):
+    """
+    Regista um agente para (tipo, algoritmo); tipo None serve para qualquer ambiente.
+    """
+    AGENTES[(tipo, algoritmo)] = Especificacao(classe, campos, verificar)
+
+
+def _verificar(cfg, campos, onde, erros, ignorar=()):
+    """
+    Valida as chaves de `cfg` contra `campos`; devolve {argumento: valor} para todos os
+    campos (omissao nos que faltam) e acumula os problemas em `erros`.
+    """
+    # todos os campos com o valor por omissao, mesmo os que nao aparecem em cfg
+    argumentos = {campo.argumento or chave: campo.omissao for chave, campo in campos.items()}
+    for chave, valor in cfg.items():
+        if chave in ignorar:
+            continue
+        campo = campos.get(chave)
+        if campo is None:
+            sugestao = difflib.get_close_matches(chave, list(campos) + list(ignorar), n=1)
+            dica = f" (querias '{sugestao[0]}'?)" if sugestao else ""
+            erros.append(f"{onde}: chave desconhecida '{chave}'{dica}")
+            continue
+        try:
+            argumentos[campo.argumento or chave] = campo.validar(valor)
+        except ValueError as e:
+            erros.append(f"{onde}: '{chave}' {e}")
+    return argumentos
+
+
+def _falhar(erros):
+    if erros:
+        raise ValueError("Parametros invalidos:\n  - " + "\n  - ".join(erros))
+
+
+# ---------- ambientes ----------
+
+def _bloco(campos):
+    """
+    Conversor para um sub-bloco (dict) com os seus proprios campos.
+    """
+    def converter(valor):
+        erros = []
+        argumentos = _verificar(valor, campos, "", erros)
+        if erros:
+            raise ValueError("; ".join(e[2:] for e in erros))
+        return argumentos
+    return converter
+
+
+CAMPOS_AGLOMERADO = {
+    "centro": Campo(tipos=(list, tuple), converter=_posicao),
+    "raio": Campo(omissao=1),
+    "taxa": Campo(omissao=0.1),
+    "valor": Campo(omissao=1.0),
+    "maximo": Campo(omissao=3),
+}
+
+
+def _aglomerados(valor):
+    aglomerados = []
+    for i, cfg in enumerate(valor):
+        if not isinstance(cfg, dict):
+            raise ValueError(f"[{i}] deve ser um objeto")
+        try:
+            aglomerado = _bloco(CAMPOS_AGLOMERADO)(cfg)
+        except ValueError as e:
+            raise ValueError(f"[{i}] {e}")
+        if aglomerado["centro"] is None:
+            raise ValueError(f"[{i}] falta 'centro'")
+        aglomerados.append(aglomerado)
+    return aglomerados
+
+
+CAMPOS_REPOSICAO = {
+    "atraso": Campo(omissao=0),
+    "variacao": Campo(omissao=0),
+    "aglomerados": Campo(omissao=[], converter=_aglomerados),
+}
+
+CAMPOS_MOVIMENTO_FAROL = {
+    "a_cada": Campo(omissao=0),
+    "modo": Campo(omissao="aleatorio", escolhas=("aleatorio", "rota")),
+    "rota": Campo(omissao=[], converter=_posicoes),
+}
+
+regista_ambiente("farol", "ambientes.AmbienteFarol:AmbienteFarol", {
+    "largura": Campo(omissao=5),
+    "altura": Campo(omissao=5),
+    "farol": Campo("pos_farol", tipos=(list, tuple), converter=_posicao),
+    "obstaculos": Campo(tipos=(list,), converter=_posicoes),
+    "movimento_farol": Campo(tipos=(dict,), converter=_bloco(CAMPOS_MOVIMENTO_FAROL)),
+})
+
+regista_ambiente("foraging", "ambientes.AmbienteForaging:AmbienteForaging", {
+    "largura": Campo(omissao=7),
+    "altura": Campo(omissao=7),
+    "recursos": Campo(tipos=(list,), converter=_posicoes),
+    "valores_recursos": Campo(tipos=(dict, list)),
+    "ninhos": Campo(tipos=(list,), converter=_posicoes),
+    "obstaculos": Campo(tipos=(list,), converter=_posicoes),
+    "reposicao": Campo(tipos=(dict,), converter=_bloco(CAMPOS_REPOSICAO)),
+})
+
+
+# ---------- agentes ----------
+
+MODOS = ("aprendizagem", "teste", "fixo")
+
+# sensores que um agente pode instalar: tipo -> (classe, campos)
+SENSORES = {}
+
+
+def regista_sensor(tipo, classe, campos):
+    SENSORES[tipo] = Especificacao(classe, campos)
+
+
+regista_sensor("vista_local", "core.Sensor:SensorVistaLocal", {"raio": Campo(omissao=1)})
+regista_sensor("alvo_proximo", "core.Sensor:SensorAlvoProximo", {"raio": Campo(omissao=2)})
+regista_sensor("direcao_farol", "core.Sensor:SensorDirecaoFarol", {})
+
+
+def _sensores(valor):
+    """
+    ["vista_local", {"tipo": "alvo_proximo", "raio": 3}, ...] -> instancias dos sensores.
+    """
+    sensores = []
+    for i, cfg in enumerate(valor):
+        if isinstance(cfg, str):
+            cfg = {"tipo": cfg}
+        if not isinstance(cfg, dict) or cfg.get("tipo") not in SENSORES:
+            tipo = cfg.get("tipo") if isinstance(cfg, dict) else cfg
+            raise ValueError(f"[{i}] sensor desconhecido {tipo!r} (registados: {', '.join(SENSORES)})")
+        especificacao = SENSORES[cfg["tipo"]]
+        erros = []
+        argumentos = _verificar(cfg, especificacao.campos, "", erros, ignorar=("tipo",))
+        if erros:
+            raise ValueError(f"[{i}] " + "; ".join(e[2:] for e in erros))
+        sensores.append(especificacao.classe(**argumentos))
+    return sensores
+
+
+# chaves comuns a todos os agentes (lidas pelo motor, nao pelo construtor)
+CAMPOS_AGENTE = {
+    "nome": Campo(omissao="agente"),
+    "tipo": Campo(omissao="farol"),
+    "algoritmo": Campo(omissao="q_learning"),
+    "posicao_inicial": Campo(tipos=(list, tuple), converter=_posicao),
+}
+
+
+def _campos_q_learning():
+    return {
+        "modo": Campo(omissao="teste", escolhas=MODOS),
+        "q_table": Campo("ficheiro_qtable", tipos=(str,)),
+        "epsilon": Campo(omissao=0.2),
+        "alpha": Campo(omissao=0.5),
+        "gamma": Campo(omissao=0.9),
+        "epsilon_min": Campo(omissao=0.05),
+        "epsilon_decay": Campo(omissao=0.99),
+        "replay_capacidade": Campo(omissao=0),
+        "replay_lote": Campo(omissao=32),
+        "replay_a_cada": Campo(omissao=1),
+        "planeamento": Campo(omissao=0),
+        "limiar_prioridade": Campo(omissao=1e-4),
+        "lambda": Campo("lambda_tracos", 0.0),
+        "tipo_tracos": Campo(omissao="q_lambda", escolhas=("q_lambda", "sarsa_lambda")),
+        "limiar_traco": Campo(omissao=1e-3),
+        "max_tracos": Campo(omissao=500),
+        "codificador_estado": Campo(tipos=(str,), converter=resolver_funcao),
+        "sensores": Campo(tipos=(list,), converter=_sensores),
+    }
+
+
+def _positivo(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool) and valor > 0
+
+
+def _verificar_q_learning(argumentos):
+    # as atualizacoes com tracos nao passam pelo replay nem pelo modelo Dyna
+    if _positivo(argumentos.get("lambda_tracos")):
+        extras = [chave for chave in ("replay_capacidade", "planeamento") if _positivo(argumentos.get(chave))]
+        if extras:
+            return [f"'lambda' nao se combina com {' nem '.join(repr(c) for c in extras)} (os tracos substituem replay/planeamento)"]
+    return []
+
+
+def _campos_genetico(populacao, elitismo, prob_cruzamento, bonus_sucesso):
+    return {
+        "modo": Campo(omissao="aprendizagem", escolhas=MODOS),
+        "ficheiro_genoma": Campo(tipos=(str,)),
+        "populacao": Campo(omissao=populacao),
+        "elitismo": Campo(omissao=elitismo),
+        "taxa_mutacao": Campo(omissao=0.1),
+        "prob_cruzamento": Campo(omissao=prob_cruzamento),
+        "episodios_por_individuo": Campo(omissao=1),
+        "bonus_sucesso": Campo(omissao=bonus_sucesso),
+        "penalizacao_passos": Campo(omissao=0.0),
+        "penalizacao_distancia": Campo(omissao=0.0),
+        "bonus_melhoria_distancia": Campo(omissao=0.0),
+        "penalizacao_afastamento": Campo(omissao=0.0),
+        "tamanho_torneio": Campo(omissao=3),
+        "stall_max": Campo(omissao=2),
+        "heuristic_seeds": Campo(omissao=1),
+        "cache_fitness": Campo(omissao=0),
+        "codificador_estado": Campo(tipos=(str,), converter=resolver_funcao),
+    }
+
+
+regista_agente("farol", "q_learning", "agentes.AgenteFarol:AgenteFarol", _campos_q_learning(), _verificar_q_learning)
+regista_agente("foraging", "q_learning", "agentes.AgenteForaging:AgenteForaging", dict(
+    _campos_q_learning(),
+    coordenar=Campo(omissao=False),
+), _verificar_q_learning)
+regista_agente("farol", "genetico", "agentes.AgenteFarolGenetico:AgenteFarolGenetico", _campos_genetico(12, 2, 0.7, 2.0))
+regista_agente("foraging", "genetico", "agentes.AgenteForagingGenetico:AgenteForagingGenetico", _campos_genetico(20, 4, 0.8, 10.0))
+regista_agente(None, "compilada", "agentes.AgentePoliticaCompilada:AgentePoliticaCompilada", {
+    "politica": Campo("ficheiro_politica", tipos=(str,)),
+    "modo": Campo(omissao="teste", escolhas=MODOS),
+})
+
+
+# ---------- motor ----------
+
+CAMPOS_MOTOR = {
+    "max_passos": Campo(omissao=10),
+    "episodios": Campo(omissao=1),
+    "ficheiro_metricas": Campo(omissao="metricas.json"),
+    "ficheiro_passos": Campo(tipos=(str,)),
+    "render": Campo(omissao=False),
+    "render_window": Campo(omissao=False),
+    "render_sleep": Campo(omissao=0.0),
+    "render_a_cada": Campo(omissao=1),
+    "render_intervalo": Campo(omissao=0.0),
+    "gamma_desconto": Campo(omissao=1.0),
+}
+
+# blocos opcionais do ficheiro de parametros: nome -> campos aceites
+BLOCOS_MOTOR = {
+    "corte": {
+        "sem_progresso": Campo(omissao=0),
+        "elite": Campo(omissao=False),
+    },
+    "ao_vivo": {
+        "ficheiro": Campo(tipos=(str,)),
+        "porta": Campo(omissao=0),
+        "host": Campo(omissao="127.0.0.1"),
+    },
+    "checkpoint": {
+        "ficheiro": Campo(tipos=(str,)),
+        "a_cada": Campo(omissao=0),
+        "retomar": Campo(omissao=False),
+    },
+    "ilhas": {
+        "numero": Campo(omissao=4),
+        "migracao_a_cada": Campo(omissao=5),
+        "migrantes": Campo(omissao=2),
+        "topologia": Campo(omissao="anel", escolhas=("anel", "completa", "estrela")),
+        "semente": Campo(tipos=(int,)),
+    },
+    "comunicacao": {
+        "capacidade": Campo(omissao=8),
+        "raio": Campo(tipos=(int,)),
+    },
+    "coevolucao": {
+        "emparelhamento": Campo(omissao="partilhado", escolhas=("partilhado", "melhor_parceiro")),
+        "geracoes": Campo(omissao=20),
+        "parceiros": Campo(omissao=1),
+        "processos": Campo(tipos=(int,)),
+        "semente": Campo(tipos=(int,)),
+    },
+}
+
+
+class AmbienteCompilado:
+    """
+    Configuracao de ambiente ja validada: classe e argumentos do construtor.
+    """
+
+    def __init__(self, tipo, especificacao, argumentos, cfg):
+        self.tipo = tipo
+        self.especificacao = especificacao
+        self.argumentos = argumentos
+        self.cfg = cfg
+
+    def criar(self):
+        return self.especificacao.classe(**self.argumentos)
+
+
+class AgenteCompilado:
+    """
+    Configuracao de agente ja validada: classe, argumentos do construtor e posicao inicial.
+    `criar()` pode ser chamado muitas vezes (uma instancia nova de cada vez).
+    """
+
+    def __init__(self, nome, especificacao, argumentos, posicao_inicial, cfg):
+        self.nome = nome
+        self.especificacao = especificacao
+        self.argumentos = argumentos
+        self.posicao_inicial = posicao_inicial
+        self.cfg = cfg
+
+    def criar(self):
+        return self.especificacao.classe(self.nome, **self.argumentos)
+
+
+def _compilar_ambiente(cfg, erros):
+    if not isinstance(cfg, dict):
+        erros.append("ambiente: deve ser um objeto")
+        return None
+    tipo = cfg.get("tipo", "farol")
+    especificacao = AMBIENTES.get(tipo)
+    if especificacao is None:
+        erros.append(f"ambiente: Ambiente desconhecido: {tipo} (registados: {', '.join(AMBIENTES)})")
+        return None
+    argumentos = _verificar(cfg, especificacao.campos, "ambiente", erros, ignorar=("tipo",))
+    return AmbienteCompilado(tipo, especificacao, argumentos, cfg)
+
+
+def _compilar_agente(cfg, onde, erros):
+    if not isinstance(cfg, dict):
+        erros.append(f"{onde}: deve ser um objeto")
+        return None
+    comuns = _verificar({k: v for k, v in cfg.items() if k in CAMPOS_AGENTE}, CAMPOS_AGENTE, onde, erros)
+    nome = comuns.get("nome", "agente")
+    tipo = comuns.get("tipo", "farol")
+    algoritmo = comuns.get("algoritmo", "q_learning")
+    onde = f"{onde} ({nome})"
+    especificacao = AGENTES.get((tipo, algoritmo)) or AGENTES.get((None, algoritmo))
+    if especificacao is None:
+        if not any(t == tipo for t, _ in AGENTES):
+            erros.append(f"{onde}: Tipo de agente desconhecido: {tipo}")
+        else:
+            algoritmos = sorted(a for t, a in AGENTES if t in (tipo, None))
+            erros.append(f"{onde}: algoritmo desconhecido '{algoritmo}' (possiveis: {', '.join(algoritmos)})")
+        return None
+    argumentos = _verificar(cfg, especificacao.campos, onde, erros, ignorar=tuple(CAMPOS_AGENTE))
+    if especificacao.verificar:
+        erros.extend(f"{onde}: {erro}" for erro in especificacao.verificar(argumentos))
+    return AgenteCompilado(nome, especificacao, argumentos, comuns.get("posicao_inicial", (0, 0)), cfg)
+
+
+def compilar_ambiente(cfg):
+    erros = []
+    compilado = _compilar_ambiente(cfg, erros)
+    _falhar(erros)
+    return compilado
+
+
+def compilar_agente(cfg):
+    erros = []
+    compilado = _compilar_agente(cfg, "agente", erros)
+    _falhar(erros)
+    return compilado
+
+
+class Cenario:
+    """
+    Ficheiro de parametros validado e compilado: ambiente, agentes e opcoes do motor.
+    Todos os erros (chaves desconhecidas, tipos, valores fora das escolhas) sao
+    reportados juntos, antes de correr qualquer episodio.
+    `variante()` cria copias com alteracoes validando e compilando so o que mudou,
+    para varrimentos com muitas configuracoes a partir do mesmo modelo.
+    """
+
+    def __init__(self, parametros):
+        erros = []
+        self.parametros = parametros
+        self._validar_motor(parametros, erros)
+        self.ambiente = _compilar_ambiente(parametros.get("ambiente", {}), erros)
+        agentes = parametros.get("agentes", [])
+        if not isinstance(agentes, list):
+            erros.append("agentes: deve ser uma lista")
+            agentes = []
+        self.agentes = [_compilar_agente(cfg, f"agentes[{i}]", erros) for i, cfg in enumerate(agentes)]
+        nomes = [a.nome for a in self.agentes if a]
+        repetidos = sorted({n for n in nomes if nomes.count(n) > 1})
+        if repetidos:
+            erros.append(f"agentes: nomes repetidos {', '.join(repetidos)}")
+        _falhar(erros)
+
+    @staticmethod
+    def _validar_motor(parametros, erros):
+        _verificar(parametros, CAMPOS_MOTOR, "parametros", erros, ignorar=tuple(BLOCOS_MOTOR) + ("ambiente", "agentes"))
+        for bloco, campos in BLOCOS_MOTOR.items():
+            if bloco not in parametros:
+                continue
+            if not isinstance(parametros[bloco], dict):
+                erros.append(f"{bloco}: deve ser um objeto")
+                continue
+            _verificar(parametros[bloco], campos, bloco, erros)
+
+    def variante(self, alteracoes=None, agentes=None):
+        """
+        Copia com `alteracoes` nas chaves de topo (ex.: {"episodios": 50}) e/ou
+        `agentes` = {nome: {chave: valor}} aplicados a cada agente.
+        """
+        alteracoes = alteracoes or {}
+        agentes = agentes or {}
+        desconhecidos = set(agentes) - {a.nome for a in self.agentes}
+        if desconhecidos:
+            raise ValueError(f"Agentes inexistentes no cenario: {', '.join(sorted(desconhecidos))}")
+
+        erros = []
+        copia = Cenario.__new__(Cenario)
+        copia.parametros = dict(self.parametros, **alteracoes)
+        self._validar_motor(alteracoes, erros)
+        copia.ambiente = self.ambiente
+        if "ambiente" in alteracoes:
+            copia.ambiente = _compilar_ambiente(alteracoes["ambiente"], erros)
+        copia.agentes = []
+        cfgs = []
+        for agente in self.agentes:
+            if agente.nome in agentes:
+                cfg = dict(agente.cfg, **agentes[agente.nome])
+                agente = _compilar_agente(cfg, f"agente {agente.nome}", erros)
+            copia.agentes.append(agente)
+            cfgs.append(agente.cfg if agente else None)
+        _falhar(erros)
+        copia.parametros["agentes"] = cfgs
+        return copia
@@ -0,0 +1,118 @@
+class MetodosGeneticos:
+    """
+    Metodos comuns aos agentes geneticos (AgenteFarolGenetico e AgenteForagingGenetico),
+    para as duas copias nao divergirem: corte por elite, historico e cache de fitness.
+    Usa os atributos definidos nos agentes (modo, populacao, fitnesses, cenario,
+    recompensa_ep, cache_fitness, fitness_aleatorio, fitness_cortado...).
+    """
+
+    def pode_superar_elite(self, recompensa_max_restante, melhoria_max_distancia):
+        """
+        Estimativa otimista do fitness do individuo atual (a media dos seus
+        episodios, como o limiar); devolve False se nem no melhor caso entra na
+        elite da ultima geracao. So corta no ultimo episodio do individuo: antes
+        disso os episodios seguintes ainda podem compensar.
+        recompensa_max_restante = 0 indica que o sucesso ja nao e possivel;
+        melhoria_max_distancia e o que a distancia ao alvo ainda pode descer no total
+        (ambiente.melhoria_maxima_distancia), o limite do bonus de melhoria.
+        """
+        if self.modo != "aprendizagem" or self.limiar_elite is None:
+            return True
+        if self.ep_avaliados_individuo < self.episodios_por_individuo - 1:
+            return True
+        otimista = self.recompensa_ep + recompensa_max_restante
+        if recompensa_max_restante > 0:
+            otimista += self.bonus_sucesso
+        if self.bonus_melhoria_distancia > 0:
+            otimista += self.bonus_melhoria_distancia * melhoria_max_distancia
+        if self.penalizacao_passos > 0:
+            otimista -= self.penalizacao_passos * self.passos_ep
+        media = (self.acumulado_fitness_individuo + otimista) / self.episodios_por_individuo
+        return media > self.limiar_elite
+
+    def _registar_geracao_fitness(self, avaliados):
+        # avaliados: [(genoma, fitness)] da geracao que acabou de ser avaliada
+        if not avaliados:
+            return
+        fitnesses = [f for _, f in avaliados]
+        self.historico_fitness.append({
+            "geracao": self.geracao,
+            "melhor": max(fitnesses),
+            "media": sum(fitnesses) / len(fitnesses),
+        })
+
+    def _chave_cache(self, genoma):
+        return (tuple(genoma.get(estado) for estado in self.estados_possiveis), self.cenario)
+
+    def _fitness_em_cache(self, genoma):
+        """
+        Devolve o fitness guardado para este genoma no cenario atual (ou None).
+        A cache e LRU e so e usada no modo de aprendizagem.
+        """
+        if not self.cache_fitness_tamanho or self.modo != "aprendizagem":
+            return None
+        self.consultas_cache += 1
+        chave = self._chave_cache(genoma)
+        fitness = self.cache_fitness.get(chave)
+        if fitness is None:
+            return None
+        self.cache_fitness.move_to_end(chave)
+        self.acertos_cache += 1
+        return fitness
+
+    def marcar_corte(self):
+        """
+        O motor cortou o episodio atual: o fitness do individuo fica mais baixo do que
+        o de um episodio completo (e o corte por elite depende da geracao).
+        """
+        self.fitness_cortado = True
+
+    def _guardar_fitness_cache(self, genoma, fitness):
+        # um fitness que dependeu de escolhas aleatorias (fitness_aleatorio) ou de um
+        # episodio cortado (fitness_cortado) nao e repetivel
+        if not self.cache_fitness_tamanho or self.modo != "aprendizagem":
+            return
+        if self.fitness_aleatorio or self.fitness_cortado:
+            return
+        chave = self._chave_cache(genoma)
+        self.cache_fitness[chave] = fitness
+        self.cache_fitness.move_to_end(chave)
+        while len(self.cache_fitness) > self.cache_fitness_tamanho:
+            self.cache_fitness.popitem(last=False)
+
+    def _atribuir_fitness(self, fitness):
+        self.fitnesses[self.indice_genoma_atual] = fitness
+        if fitness > self.melhor_fitness:
+            self.melhor_fitness = fitness
+            self.melhor_genoma = dict(self._genoma_atual())
+
+    def _saltar_individuos_em_cache(self):
+        """
+        Avanca sobre os individuos cujo genoma ja foi avaliado neste cenario,
+        reutilizando o fitness em vez de gastar episodios. No maximo salta uma
+        populacao inteira seguida, para nunca ficar preso numa populacao convergida.
+        """
+        saltados = 0
+        while saltados < self.populacao_tamanho:
+            fitness = self._fitness_em_cache(self._genoma_atual())
+            if fitness is None:
+                return
+            self._atribuir_fitness(fitness)
+            saltados += 1
+            self.indice_genoma_atual += 1
+            if self.indice_genoma_atual >= len(self.populacao):
+                self._evoluir()
+                self.indice_genoma_atual = 0
+
+    def _registar_geracao_cache(self):
+        if not self.cache_fitness_tamanho:
+            return
+        taxa = self.acertos_cache / self.consultas_cache if self.consultas_cache else 0.0
+        self.historico_cache.append({
+            "geracao": self.geracao,
+            "consultas": self.consultas_cache,
+            "acertos": self.acertos_cache,
+            "taxa_acertos": taxa,
+        })
+        self.consultas_cache = 0
+        self.acertos_cache = 0
@@ -1,22 +1,64 @@
 import json
 
+from core.Accao import NOMES_ACCOES
+
 
 class Logger:
     """
     Regista metricas por episodio e guarda em ficheiro.
     """
 
-    def __init__(self):
+    # registos de passos convertidos de cada vez ao gravar
+    BLOCO_PASSOS = 1000
+
+    def __init__(self, ficheiro_ao_vivo=None):
         self.episodios = []
+        # JSON lines escrito episodio a episodio (sobrevive a um crash a meio do treino)
+        self._ao_vivo = open(ficheiro_ao_vivo, "w", encoding="utf-8") if ficheiro_ao_vivo else None
 
-    def registar_episodio(self, numero, recompensa_total, passos, recompensa_descontada=0.0, sucesso=False):
-        self.episodios.append({
+    def registar_episodio(self, numero, recompensa_total, passos, recompensa_descontada=0.0, sucesso=False, corte=None,
+                          mensagens=None):
+        registo = {
             "episodio": numero,
             "recompensa_total": recompensa_total,
             "recompensa_descontada": recompensa_descontada,
             "passos": passos,
             "sucesso": sucesso,
-        })
+        }
+        # motivo do corte antecipado (so presente quando o episodio foi cortado)
+        if corte:
+            registo["corte"] = corte
+        # volume das mensagens entre agentes (so com barramento)
+        if mensagens is not None:
+            registo["mensagens"] = mensagens
+        self.episodios.append(registo)
+        return registo
+
+    def escrever_ao_vivo(self, registo):
+        """
+        Acrescenta um registo ao ficheiro ao vivo. O motor escreve aqui o registo do
+        episodio ja com o estado dos agentes e a velocidade (o mesmo que publica por HTTP);
+        o ficheiro de metricas fica so com os campos de registar_episodio.
+        """
+        if self._ao_vivo:
+            self._ao_vivo.write(json.dumps(registo, ensure_ascii=False) + "\n")
+            self._ao_vivo.flush()
+
+    def retomar(self, episodios):
+        """
+        Continua a partir de metricas ja registadas (checkpoint): repoe a lista
+        e reescreve-as no ficheiro ao vivo.
+        """
+        self.episodios = list(episodios)
+        if self._ao_vivo:
+            for registo in self.episodios:
+                self._ao_vivo.write(json.dumps(registo, ensure_ascii=False) + "\n")
+            self._ao_vivo.flush()
+
+    def fechar(self):
+        if self._ao_vivo:
+            self._ao_vivo.close()
+            self._ao_vivo = None
 
     def guardar(self, ficheiro="metricas.json"):
         with open(ficheiro, "w", encoding="utf-8") as f:
@@ -24,7 +66,27 @@ class Logger:
 
     def guardar_passos(self, historico_passos, ficheiro="metricas_passos.json"):
         """
-        Guarda historico de passos (lista de dicts) em ficheiro separado.
+        Guarda historico de passos (RegistoPasso ou dicts) em ficheiro separado.
+        As accoes sao guardadas em memoria como codigos inteiros e
+        convertidas aqui para o nome legivel. Escreve por blocos (o mesmo JSON
+        que json.dump com indent=2) sem construir a lista convertida inteira.
         """
         with open(ficheiro, "w", encoding="utf-8") as f:
-            json.dump(historico_passos, f, ensure_ascii=False, indent=2)
+            f.write("[")
+            separador = ""
+            for inicio in range(0, len(historico_passos), self.BLOCO_PASSOS):
+                bloco = [self._converter_passo(p) for p in historico_passos[inicio:inicio + self.BLOCO_PASSOS]]
+                # "[\n  {...},\n  {...}\n]" -> "\n  {...},\n  {...}"
+                f.write(separador)
+                f.write(json.dumps(bloco, ensure_ascii=False, indent=2)[1:-2])
+                separador = ","
+            f.write("\n]" if separador else "]")
+
+    @staticmethod
+    def _converter_passo(passo):
+        if hasattr(passo, "_asdict"):
+            passo = passo._asdict()
+        accao = passo.get("accao")
+        if isinstance(accao, int):
+            passo = dict(passo, accao=NOMES_ACCOES[accao])
+        return passo
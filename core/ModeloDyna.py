@@ -0,0 +1,60 @@
+import heapq
+
+
+class ModeloDyna:
+    """
+    Modelo aprendido do ambiente para planeamento (Dyna-Q com prioritized sweeping).
+    Guarda para cada (estado, accao) o ultimo resultado observado
+    (recompensa, proximo estado, terminou) e os predecessores de cada estado.
+
+    Depois de cada passo real sao feitas ate `passos` atualizacoes simuladas,
+    escolhidas por uma fila de prioridade (maior erro TD primeiro); quando o
+    valor de um estado muda, os seus predecessores entram na fila.
+    """
+
+    def __init__(self, passos=10, limiar=1e-4):
+        self.passos = max(0, int(passos))
+        self.limiar = limiar
+        self.modelo = {}
+        self.predecessores = {}
+        self._fila = []
+        self._na_fila = {}
+        self._contador = 0
+        self.atualizacoes = 0
+
+    def _erro(self, q_table, accoes, gamma, chave):
+        recompensa, prox_estado, terminou = self.modelo[chave]
+        futuro = 0.0 if terminou else max(q_table.get((prox_estado, a), 0.0) for a in accoes)
+        return recompensa + gamma * futuro - q_table.get(chave, 0.0)
+
+    def _colocar(self, chave, prioridade):
+        if prioridade <= self.limiar or self._na_fila.get(chave, 0.0) >= prioridade:
+            return
+        self._na_fila[chave] = prioridade
+        self._contador += 1
+        # heapq e uma min-heap: prioridade negativa; o contador desempata sem comparar estados
+        heapq.heappush(self._fila, (-prioridade, self._contador, chave))
+
+    def observar(self, q_table, accoes, gamma, estado, accao, recompensa, prox_estado, terminou):
+        """
+        Regista uma transicao real no modelo e poe-na na fila com a sua prioridade.
+        """
+        chave = (estado, accao)
+        self.modelo[chave] = (recompensa, prox_estado, terminou)
+        self.predecessores.setdefault(prox_estado, set()).add(chave)
+        self._colocar(chave, abs(self._erro(q_table, accoes, gamma, chave)))
+
+    def planear(self, q_table, accoes, alpha, gamma):
+        feitas = 0
+        while self._fila and feitas < self.passos:
+            prioridade, _, chave = heapq.heappop(self._fila)
+            if self._na_fila.get(chave) != -prioridade:
+                continue  # entrada antiga, ja substituida por outra com mais prioridade
+            del self._na_fila[chave]
+
+            q_table[chave] = q_table.get(chave, 0.0) + alpha * self._erro(q_table, accoes, gamma, chave)
+            feitas += 1
+
+            for anterior in self.predecessores.get(chave[0], ()):
+                self._colocar(anterior, abs(self._erro(q_table, accoes, gamma, anterior)))
+        self.atualizacoes += feitas
@@ -0,0 +1,178 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+
+from core.MotorDeSimulacao import MotorDeSimulacao
+
+TOPOLOGIAS = ("anel", "completa", "estrela")
+
+
+def _sufixo(caminho, sufixo):
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}{sufixo}{extensao or '.json'}"
+
+
+def _parametros_ilha(parametros, indice):
+    """
+    Parametros de uma ilha: metricas proprias, sem render nem publicacao ao vivo.
+    """
+    p = json.loads(json.dumps(parametros))
+    p.pop("ilhas", None)
+    p.pop("ao_vivo", None)
+    p["render"] = False
+    p["render_window"] = False
+    p["ficheiro_metricas"] = _sufixo(p.get("ficheiro_metricas", "metricas.json"), f"_ilha{indice}")
+    if "ficheiro_passos" in p:
+        p["ficheiro_passos"] = _sufixo(p["ficheiro_passos"], f"_ilha{indice}")
+    return p
+
+
+def _ciclo_ilha(indice, parametros, semente, ligacao):
+    """
+    Processo de uma ilha: corre a sua propria simulacao e, a cada pedido do processo
+    principal, acolhe imigrantes, evolui N geracoes e devolve a elite e o melhor genoma.
+    """
+    random.seed(semente)
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        motor = MotorDeSimulacao.de_parametros(parametros)
+        geneticos = [a for a in motor.agentes if hasattr(a, "acolher_migrantes")]
+        for agente in motor.agentes:
+            # as politicas sao carregadas no arranque, mas as ilhas nao as gravam
+            # (o processo principal grava o genoma campeao)
+            if hasattr(agente, "ficheiro_genoma"):
+                agente.ficheiro_genoma = None
+            if hasattr(agente, "ficheiro_qtable"):
+                agente.ficheiro_qtable = None
+        ep = 0
+        while True:
+            pedido = ligacao.recv()
+            if pedido is None:
+                break
+            geracoes, imigrantes = pedido
+            for agente in geneticos:
+                agente.acolher_migrantes(imigrantes.get(agente.nome, []))
+            alvo = {agente.nome: agente.geracao + geracoes for agente in geneticos}
+            while ep < motor.episodios and any(a.geracao < alvo[a.nome] for a in geneticos):
+                ep += 1
+                motor._executar_episodio(ep)
+            relatorio = {
+                agente.nome: {
+                    "elite": agente.ultima_elite,
+                    "melhor_genoma": agente.melhor_genoma,
+                    "melhor_fitness": agente.melhor_fitness,
+                    "geracao": agente.geracao,
+                }
+                for agente in geneticos
+            }
+            ligacao.send((relatorio, ep >= motor.episodios or not geneticos))
+        motor._terminar()
+
+
+class ModeloIlhas:
+    """
+    Modelo de ilhas para os agentes geneticos: K sub-populacoes evoluem em processos
+    separados (cada um com o seu ambiente) e a cada M geracoes trocam os melhores
+    individuos segundo uma topologia. O melhor genoma global de cada agente e
+    gravado no seu ficheiro_genoma.
+
+    Parametros (bloco "ilhas"):
+    - numero: quantas ilhas (processos);
+    - migracao_a_cada: geracoes entre migracoes;
+    - migrantes: quantos individuos cada ilha recebe por migracao;
+    - topologia: "anel" (recebe da ilha anterior), "completa" (de todas) ou "estrela" (ilha 0 e o centro);
+    - semente: semente base (ilha i usa semente + i).
+    """
+
+    def __init__(self, parametros: dict):
+        cfg = parametros.get("ilhas", {})
+        self.parametros = parametros
+        self.numero = max(1, int(cfg.get("numero", 4)))
+        self.migracao_a_cada = max(1, int(cfg.get("migracao_a_cada", 5)))
+        self.migrantes = max(0, int(cfg.get("migrantes", 2)))
+        self.topologia = cfg.get("topologia", "anel")
+        if self.topologia not in TOPOLOGIAS:
+            raise ValueError(f"Topologia desconhecida: {self.topologia}")
+        self.semente = cfg.get("semente")
+        self.campeoes = {}
+
+    def _origens(self, i):
+        k = self.numero
+        if k == 1:
+            return []
+        if self.topologia == "anel":
+            return [(i - 1) % k]
+        if self.topologia == "estrela":
+            return [j for j in range(1, k)] if i == 0 else [0]
+        return [j for j in range(k) if j != i]
+
+    def _migrar(self, relatorios):
+        imigrantes = {i: {} for i in relatorios}
+        for i in relatorios:
+            origens = [relatorios[j] for j in self._origens(i) if j in relatorios]
+            for nome in relatorios[i]:
+                candidatos = [par for r in origens for par in r.get(nome, {}).get("elite", [])]
+                candidatos.sort(key=lambda par: par[1], reverse=True)
+                imigrantes[i][nome] = [genoma for genoma, _ in candidatos[: self.migrantes]]
+        return imigrantes
+
+    def _atualizar_campeoes(self, relatorios, gravadores):
+        for relatorio in relatorios.values():
+            for nome, r in relatorio.items():
+                if r["melhor_genoma"] is None:
+                    continue
+                atual = self.campeoes.get(nome)
+                if atual is None or r["melhor_fitness"] > atual[0]:
+                    self.campeoes[nome] = (r["melhor_fitness"], r["melhor_genoma"])
+                    gravador = gravadores.get(nome)
+                    if gravador is not None:
+                        gravador.melhor_genoma = r["melhor_genoma"]
+                        gravador.guardar_politica()
+                        print(f"[ilhas] novo campeao {nome}: fitness {r['melhor_fitness']:.3f} (geracao {r['geracao']})")
+
+    def executa(self):
+        # instancias locais dos agentes geneticos, so para gravar o genoma campeao no formato de cada um
+        motor_local = MotorDeSimulacao(parametros=self.parametros)
+        gravadores = {}
+        for cfg in self.parametros.get("agentes", []):
+            if cfg.get("algoritmo") == "genetico" and cfg.get("ficheiro_genoma"):
+                gravadores[cfg.get("nome", "agente")] = motor_local._criar_agente(dict(cfg, populacao=2))
+
+        ligacoes = []
+        processos = []
+        for i in range(self.numero):
+            semente = None if self.semente is None else self.semente + i
+            principal, filho = multiprocessing.Pipe()
+            processo = multiprocessing.Process(
+                target=_ciclo_ilha,
+                args=(i, _parametros_ilha(self.parametros, i), semente, filho),
+                daemon=True,
+            )
+            processo.start()
+            ligacoes.append(principal)
+            processos.append(processo)
+
+        ativas = list(range(self.numero))
+        imigrantes = {i: {} for i in ativas}
+        migracoes = 0
+        while ativas:
+            for i in ativas:
+                ligacoes[i].send((self.migracao_a_cada, imigrantes.get(i, {})))
+            relatorios = {}
+            for i in list(ativas):
+                relatorio, terminou = ligacoes[i].recv()
+                relatorios[i] = relatorio
+                if terminou:
+                    ativas.remove(i)
+            self._atualizar_campeoes(relatorios, gravadores)
+            imigrantes = self._migrar(relatorios)
+            migracoes += 1
+
+        for ligacao, processo in zip(ligacoes, processos):
+            ligacao.send(None)
+            processo.join()
+        print(f"[ilhas] {self.numero} ilhas, {migracoes} migracoes ({self.topologia})")
+        for nome, (fitness, _) in self.campeoes.items():
+            print(f"[ilhas] campeao final {nome}: fitness {fitness:.3f}")
+        return self.campeoes
@@ -1,6 +1,47 @@
 import json
+import os
+import pickle
+import random
 import time
+from collections import namedtuple
 from core.AgenteThread import AgenteThread
+from core.Configuracao import Cenario, compilar_agente, compilar_ambiente
+
+# Um passo de um agente no historico (tuplo: sem dicionario por registo; convertido em dict ao gravar)
+RegistoPasso = namedtuple("RegistoPasso", ("episodio", "passo", "agente", "accao", "recompensa", "posicao"))
+
+
+def correr_episodio(ambiente, agentes, max_passos, historico=None):
+    """
+    Caminho rapido de um episodio: sincrono (sem threads), sem prints e sem logger.
+    Mesmas regras de termino que MotorDeSimulacao.executa.
+    Usado na avaliacao de politicas e na coevolucao; com uma lista em `historico`
+    regista (passo, agente, accao, recompensa, posicao) como o motor (harness de regressao).
+    """
+    recompensa_total = 0.0
+    passos = 0
+    sucesso = False
+    for _ in range(max_passos):
+        passos += 1
+        for agente in agentes:
+            agente.observacao(ambiente.observacaoPara(agente))
+            accao = agente.age()
+            resultado = ambiente.agir(accao, agente)
+            if isinstance(resultado, dict):
+                recompensa = float(resultado.get("recompensa", 0.0))
+                terminou = bool(resultado.get("terminou", False))
+            else:
+                recompensa, terminou = float(resultado[0]), bool(resultado[1])
+            agente.avaliacaoEstadoAtual(recompensa, ambiente.observacaoPara(agente), terminou)
+            recompensa_total += recompensa
+            sucesso = sucesso or terminou
+            if historico is not None:
+                historico.append((passos, agente.nome, accao.codigo, recompensa, ambiente.posicoes_agentes.get(agente)))
+        ambiente.atualizacao()
+        if sucesso or ambiente.terminou():
+            sucesso = True
+            break
+    return {"passos": passos, "sucesso": sucesso, "recompensa_total": recompensa_total}
 
 
 # Motor principal que carrega parametros, cria ambiente/agentes, corre episodios (observa-age-avalia), regista metricas e fecha threads
@@ -23,16 +64,48 @@ class MotorDeSimulacao:
         self.render = False
         self.render_window = False
         self.render_sleep = 0.0
+        self.render_a_cada = 1
+        self.render_intervalo = 0.0
         self.gamma_desconto = 1.0
         self.visualizador = None
+        # Regras de corte de episodios sem esperanca (0/False = desativado)
+        self.corte_sem_progresso = 0
+        self.corte_elite = False
+        # Metricas ao vivo: ficheiro JSON lines e/ou servidor HTTP local
+        self.ficheiro_ao_vivo = None
+        self.porta_ao_vivo = 0
+        self.host_ao_vivo = "127.0.0.1"
+        self.publicador = None
+        self._melhor_distancia = None
+        self._passos_sem_progresso = 0
+        # Checkpoints completos (agentes, ambiente, RNG, metricas) a cada N episodios
+        self.ficheiro_checkpoint = None
+        self.checkpoint_a_cada = 0
+        self.retomar = False
+        # Barramento de mensagens entre agentes (bloco "comunicacao"; None = desativado)
+        self.barramento = None
 
     @staticmethod
-    def cria(nome_do_ficheiro_parametros: str) -> "MotorDeSimulacao":
+    def cria(nome_do_ficheiro_parametros: str, retomar: bool = False) -> "MotorDeSimulacao":
         with open(nome_do_ficheiro_parametros, "r", encoding="utf-8") as f:
             parametros = json.load(f)
+        motor = MotorDeSimulacao.de_parametros(parametros, nome_do_ficheiro_parametros)
+        motor.retomar = retomar or motor.retomar
+        return motor
+
+    @staticmethod
+    def de_parametros(parametros: dict, ficheiro_parametros: str | None = None) -> "MotorDeSimulacao":
+        return MotorDeSimulacao.de_cenario(Cenario(parametros), ficheiro_parametros)
 
+    @staticmethod
+    def de_cenario(cenario: Cenario, ficheiro_parametros: str | None = None) -> "MotorDeSimulacao":
+        """
+        Motor a partir de parametros ja validados e compilados (ver core.Configuracao.Cenario);
+        um mesmo cenario (ou as suas variantes) pode criar muitos motores.
+        """
+        parametros = cenario.parametros
         motor = MotorDeSimulacao(
-            ficheiro_parametros=nome_do_ficheiro_parametros,
+            ficheiro_parametros=ficheiro_parametros,
             parametros=parametros,
         )
 
@@ -43,9 +116,23 @@ class MotorDeSimulacao:
         motor.render = parametros.get("render", motor.render)
         motor.render_window = parametros.get("render_window", motor.render_window)
         motor.render_sleep = parametros.get("render_sleep", motor.render_sleep)
+        motor.render_a_cada = parametros.get("render_a_cada", motor.render_a_cada)
+        motor.render_intervalo = parametros.get("render_intervalo", motor.render_intervalo)
         motor.gamma_desconto = parametros.get("gamma_desconto", motor.gamma_desconto)
-        motor._construir_ambiente(parametros.get("ambiente", {}))
-        motor._construir_agentes(parametros.get("agentes", []))
+        corte = parametros.get("corte", {})
+        motor.corte_sem_progresso = corte.get("sem_progresso", motor.corte_sem_progresso)
+        motor.corte_elite = corte.get("elite", motor.corte_elite)
+        ao_vivo = parametros.get("ao_vivo", {})
+        motor.ficheiro_ao_vivo = ao_vivo.get("ficheiro", motor.ficheiro_ao_vivo)
+        motor.porta_ao_vivo = ao_vivo.get("porta", motor.porta_ao_vivo)
+        motor.host_ao_vivo = ao_vivo.get("host", motor.host_ao_vivo)
+        checkpoint = parametros.get("checkpoint", {})
+        motor.ficheiro_checkpoint = checkpoint.get("ficheiro", motor.ficheiro_checkpoint)
+        motor.checkpoint_a_cada = checkpoint.get("a_cada", motor.checkpoint_a_cada)
+        motor.retomar = checkpoint.get("retomar", motor.retomar)
+        motor.ambiente = cenario.ambiente.criar()
+        motor._construir_agentes(cenario.agentes)
+        motor._construir_barramento(parametros.get("comunicacao"))
         motor._construir_logger()
         motor._construir_visualizador()
 
@@ -61,122 +148,11 @@ class MotorDeSimulacao:
         return self.agentes
 
     def _construir_ambiente(self, cfg_ambiente: dict):
-        tipo = cfg_ambiente.get("tipo", "farol")
-
-        if tipo == "farol":
-            from ambientes.AmbienteFarol import AmbienteFarol
+        self.ambiente = compilar_ambiente(cfg_ambiente).criar()
 
-            largura = cfg_ambiente.get("largura", 5)
-            altura = cfg_ambiente.get("altura", 5)
-            pos_farol = tuple(cfg_ambiente.get("farol", (largura - 1, altura - 1)))
-            obstaculos = [tuple(o) for o in cfg_ambiente.get("obstaculos", [])]
-
-            self.ambiente = AmbienteFarol(
-                largura=largura,
-                altura=altura,
-                pos_farol=pos_farol,
-                obstaculos=obstaculos,
-            )
-        elif tipo == "foraging":
-            from ambientes.AmbienteForaging import AmbienteForaging
-
-            largura = cfg_ambiente.get("largura", 7)
-            altura = cfg_ambiente.get("altura", 7)
-            recursos = [tuple(r) for r in cfg_ambiente.get("recursos", [])]
-            valores_recursos = cfg_ambiente.get("valores_recursos", {})
-            ninhos = [tuple(n) for n in cfg_ambiente.get("ninhos", [])]
-            obstaculos = [tuple(o) for o in cfg_ambiente.get("obstaculos", [])]
-
-            self.ambiente = AmbienteForaging(
-                largura=largura,
-                altura=altura,
-                recursos=recursos,
-                valores_recursos=valores_recursos,
-                ninhos=ninhos,
-                obstaculos=obstaculos,
-            )
-        else:
-            raise ValueError(f"Ambiente desconhecido: {tipo}")
-
-    def _construir_agentes(self, lista_cfg_agentes: list):
-        for cfg in lista_cfg_agentes:
-            tipo = cfg.get("tipo", "farol")
-            algoritmo = cfg.get("algoritmo", "q_learning")
-            nome = cfg.get("nome", "agente")
-            posicao_inicial = tuple(cfg.get("posicao_inicial", (0, 0)))
-
-            if tipo == "farol":
-                if algoritmo == "genetico":
-                    from agentes.AgenteFarolGenetico import AgenteFarolGenetico
-
-                    agente = AgenteFarolGenetico(
-                        nome,
-                        modo=cfg.get("modo", "aprendizagem"),
-                        ficheiro_genoma=cfg.get("ficheiro_genoma", None),
-                        populacao=cfg.get("populacao", 12),
-                        elitismo=cfg.get("elitismo", 2),
-                        taxa_mutacao=cfg.get("taxa_mutacao", 0.1),
-                        prob_cruzamento=cfg.get("prob_cruzamento", 0.7),
-                        episodios_por_individuo=cfg.get("episodios_por_individuo", 1),
-                        bonus_sucesso=cfg.get("bonus_sucesso", 2.0),
-                        penalizacao_passos=cfg.get("penalizacao_passos", 0.0),
-                        penalizacao_distancia=cfg.get("penalizacao_distancia", 0.0),
-                        bonus_melhoria_distancia=cfg.get("bonus_melhoria_distancia", 0.0),
-                        penalizacao_afastamento=cfg.get("penalizacao_afastamento", 0.0),
-                        tamanho_torneio=cfg.get("tamanho_torneio", 3),
-                        stall_max=cfg.get("stall_max", 2),
-                        heuristic_seeds=cfg.get("heuristic_seeds", 1),
-                    )
-                else:
-                    from agentes.AgenteFarol import AgenteFarol
-
-                    agente = AgenteFarol(
-                        nome,
-                        modo=cfg.get("modo", "teste"),
-                        ficheiro_qtable=cfg.get("q_table", None),
-                        epsilon=cfg.get("epsilon", 0.2),
-                        alpha=cfg.get("alpha", 0.5),
-                        gamma=cfg.get("gamma", 0.9),
-                        epsilon_min=cfg.get("epsilon_min", 0.05),
-                        epsilon_decay=cfg.get("epsilon_decay", 0.99),
-                    )
-            elif tipo == "foraging":
-                if algoritmo == "genetico":
-                    from agentes.AgenteForagingGenetico import AgenteForagingGenetico
-
-                    agente = AgenteForagingGenetico(
-                        nome,
-                        modo=cfg.get("modo", "aprendizagem"),
-                        ficheiro_genoma=cfg.get("ficheiro_genoma", None),
-                        populacao=cfg.get("populacao", 20),
-                        elitismo=cfg.get("elitismo", 4),
-                        taxa_mutacao=cfg.get("taxa_mutacao", 0.1),
-                        prob_cruzamento=cfg.get("prob_cruzamento", 0.8),
-                        episodios_por_individuo=cfg.get("episodios_por_individuo", 1),
-                        bonus_sucesso=cfg.get("bonus_sucesso", 10.0),
-                        penalizacao_passos=cfg.get("penalizacao_passos", 0.0),
-                        penalizacao_distancia=cfg.get("penalizacao_distancia", 0.0),
-                        bonus_melhoria_distancia=cfg.get("bonus_melhoria_distancia", 0.0),
-                        penalizacao_afastamento=cfg.get("penalizacao_afastamento", 0.0),
-                        tamanho_torneio=cfg.get("tamanho_torneio", 3),
-                        stall_max=cfg.get("stall_max", 2),
-                        heuristic_seeds=cfg.get("heuristic_seeds", 1),
-                    )
-                else:
-                    from agentes.AgenteForaging import AgenteForaging
-
-                    agente = AgenteForaging(
-                        nome,
-                        modo=cfg.get("modo", "teste"),
-                        ficheiro_qtable=cfg.get("q_table", None),
-                        epsilon=cfg.get("epsilon", 0.2),
-                        alpha=cfg.get("alpha", 0.5),
-                        gamma=cfg.get("gamma", 0.9),
-                        epsilon_min=cfg.get("epsilon_min", 0.05),
-                        epsilon_decay=cfg.get("epsilon_decay", 0.99),
-                    )
-            else:
-                raise ValueError(f"Tipo de agente desconhecido: {tipo}")
+    def _construir_agentes(self, agentes_compilados: list):
+        for compilado in agentes_compilados:
+            agente = compilado.criar()
 
             self.agentes.append(agente)
             thr = AgenteThread(agente)
@@ -184,12 +160,73 @@ class MotorDeSimulacao:
             self.agente_threads.append(thr)
 
             if self.ambiente and hasattr(self.ambiente, "adicionaAgente"):
-                self.ambiente.adicionaAgente(agente, posicao_inicial)
+                self.ambiente.adicionaAgente(agente, compilado.posicao_inicial)
+
+        motivo = self._motivo_sem_cache_fitness(agentes_compilados)
+        if motivo:
+            for agente in self.agentes:
+                if not getattr(agente, "cache_fitness_tamanho", 0):
+                    continue
+                print(f"Aviso: cache_fitness desativada em {agente.nome} ({motivo}).")
+                agente.cache_fitness_tamanho = 0
+
+    def _motivo_sem_cache_fitness(self, agentes_compilados):
+        """
+        A cache de fitness assume que o mesmo genoma no mesmo cenario tem sempre o mesmo
+        fitness. Devolve o motivo por que isso nao se verifica nesta simulacao, ou None.
+        """
+        geneticos = [c for c in agentes_compilados if c.cfg.get("algoritmo") == "genetico"]
+        if len(geneticos) > 1:
+            # o fitness de um individuo depende do individuo do outro agente (emparelhados
+            # i <-> i); saltar individuos em cache num so agente desfaz o par
+            return "varios agentes geneticos no mesmo ambiente"
+        for compilado in agentes_compilados:
+            fixo = compilado.argumentos.get("modo") == "fixo" or compilado.cfg.get("algoritmo") == "compilada"
+            if compilado.cfg.get("algoritmo") != "genetico" and not fixo:
+                # explora ao acaso e/ou muda a politica entre episodios
+                return f"o agente {compilado.nome} nao tem uma politica fixa"
+        if self.ambiente and hasattr(self.ambiente, "dinamica_aleatoria") and self.ambiente.dinamica_aleatoria():
+            return "o ambiente tem dinamica aleatoria"
+        return None
+
+    def _construir_barramento(self, cfg):
+        if cfg is None:
+            return
+        from core.Comunicacao import BarramentoMensagens
+
+        self.barramento = BarramentoMensagens(cfg.get("capacidade", 8), cfg.get("raio"))
+        for agente in self.agentes:
+            agente.barramento = self.barramento
+
+    def _esperar_agentes(self):
+        """
+        Espera que as threads acabem de processar as avaliacoes pendentes, antes de o
+        motor ler ou alterar o estado dos agentes.
+        """
+        for thr in self.agente_threads:
+            thr.esperar()
+
+    def _entregar_mensagens(self):
+        # as avaliacoes do passo (que podem enviar mensagens) tem de estar terminadas
+        self._esperar_agentes()
+        self.barramento.entrega(self.agentes, getattr(self.ambiente, "posicoes_agentes", {}))
+
+    def _criar_agente(self, cfg: dict):
+        """
+        Cria um agente (sem thread) a partir da sua configuracao, validada pelo registo de agentes.
+        """
+        return compilar_agente(cfg).criar()
 
     def _construir_logger(self):
         from core.Logger import Logger
 
-        self.logger = Logger()
+        self.logger = Logger(self.ficheiro_ao_vivo)
+
+        if self.porta_ao_vivo:
+            from core.PublicadorMetricas import PublicadorMetricas
+
+            self.publicador = PublicadorMetricas(self.host_ao_vivo, self.porta_ao_vivo)
+            print(f"Metricas ao vivo em http://{self.publicador.host}:{self.publicador.porta}/eventos")
 
     def _construir_visualizador(self):
         if not self.render_window:
@@ -201,7 +238,10 @@ class MotorDeSimulacao:
             self.render_window = False
             return
         if hasattr(self.ambiente, "grid_state"):
-            self.visualizador = VisualizadorGrid()
+            self.visualizador = VisualizadorGrid(
+                a_cada=self.render_a_cada,
+                intervalo_min=self.render_intervalo,
+            )
 
     def _extrair_resultado(self, resultado):
         recompensa = 0.0
@@ -220,98 +260,253 @@ class MotorDeSimulacao:
         return recompensa, terminou
 
     def executa(self):
-        for ep in range(1, self.episodios + 1):
-            print(f"===== EPISODIO {ep} =====")
-            self._reset_episodio()
-            sucesso_ep = False
-
-            for _ in range(self.max_passos):
-                self.passo_atual += 1
-                terminou_episodio = False
-                print(f"--- PASSO {self.passo_atual} ---")
-
-                for thr in self.agente_threads:
-                    agente = thr.agente
-                    obs = self.ambiente.observacaoPara(agente)
-                    accao = thr.passo(obs)
-
-                    resultado = self.ambiente.agir(accao, agente)
-                    recompensa, terminou = self._extrair_resultado(resultado)
-
-                    nova_obs = self.ambiente.observacaoPara(agente)
-                    thr.avaliar(recompensa, nova_obs, terminou)
-
-                    pos = self.ambiente.posicoes_agentes.get(agente)
-                    self.recompensa_total += recompensa
-                    fator = self.gamma_desconto ** max(self.passo_atual - 1, 0)
-                    self.recompensa_descontada_total += fator * recompensa
-                    self.historico_passos.append({
-                        "episodio": ep,
-                        "passo": self.passo_atual,
-                        "agente": agente.nome,
-                        "accao": accao.tipo,
-                        "recompensa": recompensa,
-                        "posicao": pos,
-                    })
-
-                    print(f"> {agente.nome} faz {accao.tipo}, recompensa {recompensa}, posicao {pos}")
-                    if terminou:
-                        terminou_episodio = True
-                        sucesso_ep = True
-
-                self.ambiente.atualizacao()
-
-                if self.render and hasattr(self.ambiente, "render"):
-                    self.ambiente.render()
-                    if self.render_sleep > 0:
-                        time.sleep(self.render_sleep)
-                if self.render_window and self.visualizador and hasattr(self.ambiente, "grid_state"):
-                    grelha = self.ambiente.grid_state()
-                    self.visualizador.mostra(grelha)
+        inicio = self._carregar_checkpoint() if self.retomar else 0
+        for ep in range(inicio + 1, self.episodios + 1):
+            self._executar_episodio(ep)
+            if self._checkpoint_devido(ep):
+                self._guardar_checkpoint(ep)
+        self._terminar()
+
+    def _checkpoint_devido(self, ep):
+        if not self.ficheiro_checkpoint or self.checkpoint_a_cada <= 0:
+            return False
+        return ep % self.checkpoint_a_cada == 0 or ep == self.episodios
+
+    def _guardar_checkpoint(self, ep):
+        """
+        Guarda tudo o que o proximo episodio depende: agentes (Q-tables, epsilon,
+        populacoes, fitnesses, indice do genoma, buffers, tracos...), ambiente,
+        estado do gerador aleatorio e metricas ja registadas. O ficheiro e escrito
+        por inteiro e so depois substitui o anterior.
+        """
+        # as threads podem ainda estar a processar a ultima avaliacao do episodio
+        self._esperar_agentes()
+        estado = {
+            "episodio": ep,
+            "random": random.getstate(),
+            "agentes": self.agentes,
+            "ambiente": self.ambiente,
+            "metricas": self.logger.episodios if self.logger else [],
+            "historico_passos": self.historico_passos_todos,
+        }
+        temporario = self.ficheiro_checkpoint + ".tmp"
+        with open(temporario, "wb") as f:
+            pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, self.ficheiro_checkpoint)
+
+    def _carregar_checkpoint(self):
+        """
+        Repoe o estado do ultimo checkpoint e devolve o episodio em que foi gravado
+        (0 se nao houver checkpoint).
+        """
+        if not self.ficheiro_checkpoint or not os.path.exists(self.ficheiro_checkpoint):
+            print("Sem checkpoint para retomar; a comecar do episodio 1.")
+            return 0
+        with open(self.ficheiro_checkpoint, "rb") as f:
+            estado = pickle.load(f)
+        if [a.nome for a in estado["agentes"]] != [a.nome for a in self.agentes]:
+            raise ValueError("O checkpoint nao corresponde aos agentes dos parametros")
+        # os agentes e o ambiente sao gravados juntos (o ambiente guarda-os como chaves)
+        self.agentes = estado["agentes"]
+        self.ambiente = estado["ambiente"]
+        for thr, agente in zip(self.agente_threads, self.agentes):
+            thr.agente = agente
+            agente.barramento = self.barramento
+        if self.logger:
+            self.logger.retomar(estado["metricas"])
+        self.historico_passos_todos = estado["historico_passos"]
+        random.setstate(estado["random"])
+        print(f"Retomado do checkpoint {self.ficheiro_checkpoint} (episodio {estado['episodio']}).")
+        return estado["episodio"]
+
+    def _executar_episodio(self, ep):
+        print(f"===== EPISODIO {ep} =====")
+        self._reset_episodio()
+        sucesso_ep = False
+        inicio_ep = time.perf_counter()
+        corte_ep = None
+
+        for _ in range(self.max_passos):
+            self.passo_atual += 1
+            terminou_episodio = False
+            print(f"--- PASSO {self.passo_atual} ---")
+
+            for thr in self.agente_threads:
+                agente = thr.agente
+                obs = self.ambiente.observacaoPara(agente)
+                accao = thr.passo(obs)
+
+                resultado = self.ambiente.agir(accao, agente)
+                recompensa, terminou = self._extrair_resultado(resultado)
+
+                nova_obs = self.ambiente.observacaoPara(agente)
+                thr.avaliar(recompensa, nova_obs, terminou)
+
+                pos = self.ambiente.posicoes_agentes.get(agente)
+                self.recompensa_total += recompensa
+                fator = self.gamma_desconto ** max(self.passo_atual - 1, 0)
+                self.recompensa_descontada_total += fator * recompensa
+                self.historico_passos.append(RegistoPasso(ep, self.passo_atual, agente.nome, accao.codigo, recompensa, pos))
+
+                print(f"> {agente.nome} faz {accao.tipo}, recompensa {recompensa}, posicao {pos}")
+                if terminou:
+                    terminou_episodio = True
+                    sucesso_ep = True
+
+            self.ambiente.atualizacao()
+            if self.barramento:
+                self._entregar_mensagens()
+
+            if self.render and hasattr(self.ambiente, "render"):
+                self.ambiente.render()
+                if self.render_sleep > 0:
+                    time.sleep(self.render_sleep)
+            if self.render_window and self.visualizador and hasattr(self.ambiente, "grid_state"):
+                # frames saltados nem chegam a construir a grelha
+                if self.visualizador.proximo_frame():
+                    self.visualizador.desenha(self.ambiente.grid_state())
                     if self.render_sleep > 0:
                         time.sleep(self.render_sleep)
 
-                if hasattr(self.ambiente, "terminou") and callable(self.ambiente.terminou):
-                    if self.ambiente.terminou():
-                        terminou_episodio = True
-                        sucesso_ep = True
-
-                if terminou_episodio:
-                    print("Condicao de termino atingida pelo ambiente/acao.")
-                    break
-
-            if self.logger:
-                self.logger.registar_episodio(
-                    ep,
-                    self.recompensa_total,
-                    self.passo_atual,
-                    self.recompensa_descontada_total,
-                    sucesso_ep,
-                )
-            # guarda historico do episodio antes de reset
-            self.historico_passos_todos.extend(self.historico_passos)
-            self._guardar_politicas()
-
-            print(f"Recompensa total do episodio {ep}: {self.recompensa_total}")
-            print(f"Recompensa descontada do episodio {ep}: {self.recompensa_descontada_total}")
-            print(f"Passos executados: {self.passo_atual}")
-
-            self._reset_agentes()
+            if hasattr(self.ambiente, "terminou") and callable(self.ambiente.terminou):
+                if self.ambiente.terminou():
+                    terminou_episodio = True
+                    sucesso_ep = True
+
+            if terminou_episodio:
+                print("Condicao de termino atingida pelo ambiente/acao.")
+                break
+
+            corte_ep = self._verificar_corte()
+            if corte_ep:
+                print(f"Episodio cortado: {corte_ep}")
+                break
+
+        # a ultima avaliacao (a do passo terminal) tem de chegar ao agente antes de
+        # guardar politicas e fazer reset; sem isto o reset pode ganhar a corrida
+        self._esperar_agentes()
+        if corte_ep:
+            for agente in self.agentes:
+                if hasattr(agente, "marcar_corte"):
+                    agente.marcar_corte()
+        if self.logger:
+            registo = self.logger.registar_episodio(
+                ep,
+                self.recompensa_total,
+                self.passo_atual,
+                self.recompensa_descontada_total,
+                sucesso_ep,
+                corte_ep,
+                self.barramento.estatisticas() if self.barramento else None,
+            )
+            if self.ficheiro_ao_vivo or self.publicador:
+                self._publicar_episodio(registo, time.perf_counter() - inicio_ep)
+        # guarda historico do episodio antes de reset
+        self.historico_passos_todos.extend(self.historico_passos)
+        self._guardar_politicas()
+
+        print(f"Recompensa total do episodio {ep}: {self.recompensa_total}")
+        print(f"Recompensa descontada do episodio {ep}: {self.recompensa_descontada_total}")
+        print(f"Passos executados: {self.passo_atual}")
+        if self.barramento:
+            e = self.barramento.estatisticas()
+            print(
+                f"Mensagens: {e['enviadas']} enviadas, {e['entregues']} entregues, "
+                f"{e['descartadas']} descartadas, latencia media {self.barramento.latencia_media_ms():.3f} ms"
+            )
+
+        self._reset_agentes()
 
+    def _terminar(self):
+        """
+        Fim da simulacao: guarda metricas e passos, fecha publicador/janela e para as threads.
+        """
         if self.logger:
             self.logger.guardar(self.ficheiro_metricas)
             if self.historico_passos_todos:
                 self.logger.guardar_passos(self.historico_passos_todos, self.ficheiro_passos)
+            self.logger.fechar()
+        if self.publicador:
+            self.publicador.parar()
+        if self.visualizador:
+            self.visualizador.fechar()
         self._parar_threads()
 
+    def _publicar_episodio(self, registo, duracao):
+        """
+        Junta ao registo do episodio o estado de aprendizagem dos agentes
+        (epsilon, geracao e melhor fitness) e a velocidade, e escreve o mesmo
+        registo no ficheiro ao vivo e no publicador HTTP.
+        """
+        agentes = {}
+        for agente in self.agentes:
+            estado = {}
+            if hasattr(agente, "epsilon"):
+                estado["epsilon"] = agente.epsilon
+            if hasattr(agente, "geracao"):
+                estado["geracao"] = agente.geracao
+            if hasattr(agente, "melhor_fitness") and agente.melhor_fitness != -float("inf"):
+                estado["melhor_fitness"] = agente.melhor_fitness
+            if getattr(agente, "historico_cache", None):
+                estado["cache_fitness"] = agente.historico_cache[-1]["taxa_acertos"]
+            agentes[agente.nome] = estado
+        ao_vivo = dict(
+            registo,
+            agentes=agentes,
+            passos_por_segundo=self.passo_atual / duracao if duracao > 0 else 0.0,
+        )
+        if self.barramento:
+            # a latencia e tempo de relogio: so ao vivo, fora do ficheiro de metricas
+            ao_vivo["mensagens"] = dict(registo["mensagens"], latencia_media_ms=self.barramento.latencia_media_ms())
+        self.logger.escrever_ao_vivo(ao_vivo)
+        if self.publicador:
+            self.publicador.publicar(ao_vivo)
+
     def _reset_episodio(self):
         self.passo_atual = 0
         self.recompensa_total = 0.0
         self.recompensa_descontada_total = 0.0
         self.historico_passos = []
+        self._melhor_distancia = None
+        self._passos_sem_progresso = 0
+        if self.barramento:
+            self.barramento.limpar()
         if hasattr(self.ambiente, "reset"):
             self.ambiente.reset()
 
+    def _verificar_corte(self):
+        """
+        Aplica as regras de corte configuradas e devolve o motivo do corte
+        ("sem_progresso" ou "elite") ou None se o episodio deve continuar.
+        """
+        if self.corte_sem_progresso > 0 and hasattr(self.ambiente, "distancia_objetivo"):
+            distancia = self.ambiente.distancia_objetivo()
+            if self._melhor_distancia is None or distancia < self._melhor_distancia:
+                self._melhor_distancia = distancia
+                self._passos_sem_progresso = 0
+            else:
+                self._passos_sem_progresso += 1
+                if self._passos_sem_progresso >= self.corte_sem_progresso:
+                    return "sem_progresso"
+
+        if self.corte_elite and hasattr(self.ambiente, "recompensa_maxima_restante"):
+            # pode_superar_elite le o que as avaliacoes do passo acumularam
+            self._esperar_agentes()
+            passos_restantes = self.max_passos - self.passo_atual
+            avaliados = 0
+            for agente in self.agentes:
+                if not hasattr(agente, "pode_superar_elite"):
+                    continue
+                avaliados += 1
+                maximo = self.ambiente.recompensa_maxima_restante(agente, passos_restantes)
+                melhoria = self.ambiente.melhoria_maxima_distancia(agente, passos_restantes)
+                if agente.pode_superar_elite(maximo, melhoria):
+                    return None
+            # so corta se todos os agentes com elite ja nao a conseguem superar
+            if avaliados:
+                return "elite"
+        return None
+
     def _reset_agentes(self):
         for agente in self.agentes:
             if hasattr(agente, "reset"):
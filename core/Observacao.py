@@ -1,4 +1,22 @@
 # Envelope de dados de percepcao enviados do ambiente para o agente
 class Observacao:
+    # __slots__: sem dicionario por instancia (ha uma observacao por agente e passo)
+    __slots__ = ("dados", "_memo")
+
     def __init__(self, dados=None):
         self.dados = dados or {}
+        # criado so no primeiro memo (agentes fixos nunca o usam)
+        self._memo = None
+
+    def memo(self, funcao):
+        """
+        Resultado de funcao(self.dados), calculado uma so vez por observacao
+        (ex.: o estado codificado de um agente, partilhado entre age e a aprendizagem).
+        """
+        if self._memo is None:
+            self._memo = {}
+        try:
+            return self._memo[funcao]
+        except KeyError:
+            valor = self._memo[funcao] = funcao(self.dados)
+            return valor
@@ -0,0 +1,219 @@
+import json
+
+from core.Accao import CODIGOS_MOVIMENTO, NOMES_ACCOES
+
+# 4 bits de movimento (N, S, E, O) -> 16 mascaras possiveis por estado
+MASCARAS = 16
+
+
+def _sinal(v):
+    return 1 if v > 0 else -1 if v < 0 else 0
+
+
+def _mais_proximo(pos, alvos):
+    if not alvos:
+        return None
+    return min(alvos, key=lambda a: abs(pos[0] - a[0]) + abs(pos[1] - a[1]))
+
+
+class _Alvos:
+    """
+    Conjunto de posicoes (recursos ou ninhos) e alvo mais proximo de cada posicao,
+    reaproveitados enquanto as observacoes trazem a mesma lista (o foraging partilha
+    a lista de recursos ate os recursos mudarem, e a dos ninhos sempre).
+    """
+
+    def __init__(self):
+        self._lista = None
+        self.conjunto = frozenset()
+        self._proximos = {}
+
+    def de(self, lista):
+        if lista is not self._lista and lista != self._lista:
+            self.conjunto = frozenset(lista)
+            self._proximos = {}
+        self._lista = lista
+        return self
+
+    def mais_proximo(self, pos):
+        try:
+            return self._proximos[pos]
+        except KeyError:
+            alvo = self._proximos[pos] = _mais_proximo(pos, self._lista)
+            return alvo
+
+
+# ---------- codificadores: observacao -> indice do estado ----------
+# Cada um reproduz o _estado() do agente correspondente, mas devolve logo um inteiro.
+# `recursos` e `ninhos` sao os _Alvos da politica (so o foraging os usa).
+
+def _codificar_farol(obs, largura, altura, recursos, ninhos):
+    dx, dy = obs["dir_farol"]
+    mascara = obs.get("mascara_movimentos", 0)
+    if abs(dx) > abs(dy):
+        bit = 1 << (2 if dx > 0 else 3)  # E / O
+    else:
+        bit = 1 << (1 if dy > 0 else 0)  # S / N
+    frente_livre = 1 if mascara & bit else 0
+    return (((_sinal(dx) + 1) * 3 + _sinal(dy) + 1) * 2 + frente_livre) * MASCARAS + mascara
+
+
+def _estados_farol(largura, altura):
+    return [(sx, sy, frente) for sx in (-1, 0, 1) for sy in (-1, 0, 1) for frente in (False, True)]
+
+
+def _codificar_foraging_q(obs, largura, altura, recursos, ninhos):
+    pos = obs["posicao"]
+    recursos = recursos.de(obs.get("recursos", []))
+    a_carregar = 1 if obs.get("a_carregar", False) else 0
+    recurso_aqui = 1 if pos in recursos.conjunto else 0
+    ninho_aqui = 1 if pos in ninhos.de(obs.get("ninhos", [])).conjunto else 0
+    dx_sign = dy_sign = 0
+    alvo = recursos.mais_proximo(pos)
+    if alvo:
+        dx_sign = _sinal(alvo[0] - pos[0])
+        dy_sign = _sinal(alvo[1] - pos[1])
+    indice = (pos[1] * largura + pos[0]) * 2 + a_carregar
+    indice = ((indice * 2 + recurso_aqui) * 2 + ninho_aqui) * 3 + dx_sign + 1
+    return (indice * 3 + dy_sign + 1) * MASCARAS + obs.get("mascara_movimentos", 0)
+
+
+def _estados_foraging_q(largura, altura):
+    return [
+        (x, y, carregar, recurso, ninho, sx, sy)
+        for y in range(altura)
+        for x in range(largura)
+        for carregar in (0, 1)
+        for recurso in (0, 1)
+        for ninho in (0, 1)
+        for sx in (-1, 0, 1)
+        for sy in (-1, 0, 1)
+    ]
+
+
+def _codificar_foraging_genetico(obs, largura, altura, recursos, ninhos):
+    pos = obs["posicao"]
+    recursos = recursos.de(obs.get("recursos", []))
+    ninhos = ninhos.de(obs.get("ninhos", []))
+    a_carregar = 1 if obs.get("a_carregar", False) else 0
+    recurso_aqui = 1 if pos in recursos.conjunto else 0
+    ninho_aqui = 1 if pos in ninhos.conjunto else 0
+    dx_sign = dy_sign = 0
+    alvo = (ninhos if a_carregar else recursos).mais_proximo(pos)
+    if alvo:
+        dx_sign = _sinal(alvo[0] - pos[0])
+        dy_sign = _sinal(alvo[1] - pos[1])
+    indice = ((a_carregar * 2 + recurso_aqui) * 2 + ninho_aqui) * 3 + dx_sign + 1
+    return (indice * 3 + dy_sign + 1) * MASCARAS + obs.get("mascara_movimentos", 0)
+
+
+def _estados_foraging_genetico(largura, altura):
+    return [
+        (carregar, recurso, ninho, sx, sy)
+        for carregar in (0, 1)
+        for recurso in (0, 1)
+        for ninho in (0, 1)
+        for sx in (-1, 0, 1)
+        for sy in (-1, 0, 1)
+    ]
+
+
+CODIFICADORES = {
+    "farol": (_codificar_farol, _estados_farol),
+    "foraging_q": (_codificar_foraging_q, _estados_foraging_q),
+    "foraging_genetico": (_codificar_foraging_genetico, _estados_foraging_genetico),
+}
+
+
+class PoliticaCompilada:
+    """
+    Politica congelada num array denso: indice(estado, mascara de movimentos) -> codigo da accao.
+    Decidir custa so codificar a observacao e ler uma posicao do array; no foraging os
+    conjuntos de recursos/ninhos e os alvos mais proximos ficam guardados ate a lista mudar.
+    """
+
+    def __init__(self, codificador, accoes, largura=0, altura=0):
+        if codificador not in CODIFICADORES:
+            raise ValueError(f"Codificador desconhecido: {codificador}")
+        self.codificador = codificador
+        self.accoes = bytes(accoes)
+        self.largura = largura
+        self.altura = altura
+        self._codificar = CODIFICADORES[codificador][0]
+        self._recursos = _Alvos()
+        self._ninhos = _Alvos()
+
+    def accao(self, obs):
+        return self.accoes[self._codificar(obs, self.largura, self.altura, self._recursos, self._ninhos)]
+
+    def guardar(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump({
+                "codificador": self.codificador,
+                "largura": self.largura,
+                "altura": self.altura,
+                "nomes_accoes": NOMES_ACCOES,
+                # um digito (codigo da accao) por entrada do array
+                "accoes": "".join(str(c) for c in self.accoes),
+            }, f)
+
+    @staticmethod
+    def carregar(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        return PoliticaCompilada(
+            dados["codificador"],
+            [int(c) for c in dados["accoes"]],
+            dados.get("largura", 0),
+            dados.get("altura", 0),
+        )
+
+
+def _movimentos_da_mascara(mascara):
+    return [c for c in CODIGOS_MOVIMENTO if mascara & (1 << c)]
+
+
+def compilar(agente, largura=0, altura=0):
+    """
+    Compila a politica greedy de um agente treinado (Q-learning em modo teste/fixo
+    ou genetico, usando o melhor genoma) percorrendo todos os estados e mascaras.
+    Nos geneticos, uma accao invalida do genoma passa a ser a heuristica do agente
+    (em vez da escolha aleatoria) e a heuristica de desbloqueio (stall) nao e usada.
+    """
+    from agentes.AgenteFarol import AgenteFarol
+    from agentes.AgenteFarolGenetico import AgenteFarolGenetico
+    from agentes.AgenteForaging import AgenteForaging
+    from agentes.AgenteForagingGenetico import AgenteForagingGenetico
+
+    if getattr(agente, "sensores", None):
+        raise ValueError("Os codificadores compilados usam a observacao global; agentes com sensores nao sao compilaveis")
+    if isinstance(agente, (AgenteFarolGenetico, AgenteForagingGenetico)):
+        codificador = "farol" if isinstance(agente, AgenteFarolGenetico) else "foraging_genetico"
+        genoma = agente.melhor_genoma or agente._genoma_atual()
+
+        def decidir(estado, mov_validos):
+            accao = genoma.get(estado)
+            if accao is None or (accao in CODIGOS_MOVIMENTO and accao not in mov_validos):
+                accao = agente._acao_heuristica(estado, mov_validos)
+            return accao
+    elif isinstance(agente, AgenteFarol):
+        codificador = "farol"
+
+        def decidir(estado, mov_validos):
+            return agente._escolher_accao(estado, mov_validos)
+    elif isinstance(agente, AgenteForaging) and agente.modo == "teste":
+        codificador = "foraging_q"
+
+        def decidir(estado, mov_validos):
+            return agente._escolher_accao(estado, {"movimentos_validos": mov_validos})
+    else:
+        raise ValueError(f"Nao e possivel compilar a politica de {type(agente).__name__} (modo {agente.modo})")
+
+    if getattr(agente, "modo", None) == "aprendizagem" and not hasattr(agente, "melhor_genoma"):
+        raise ValueError("Compila so agentes Q-learning em modo teste/fixo (sem exploracao)")
+
+    accoes = bytearray()
+    for estado in CODIFICADORES[codificador][1](largura, altura):
+        for mascara in range(MASCARAS):
+            accoes.append(decidir(estado, _movimentos_da_mascara(mascara)))
+    return PoliticaCompilada(codificador, accoes, largura, altura)
@@ -0,0 +1,91 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PublicadorMetricas:
+    """
+    Servidor HTTP local que publica as metricas de cada episodio enquanto a
+    simulacao corre. O motor so chama publicar() (acrescenta a uma lista e
+    acorda os clientes); o envio e feito nas threads do servidor.
+
+    GET /metricas?desde=N  -> lista JSON dos episodios a partir do indice N
+    GET /eventos           -> Server-Sent Events, um evento por episodio
+    """
+
+    def __init__(self, host="127.0.0.1", porta=8765):
+        self.episodios = []
+        self._condicao = threading.Condition()
+        self._terminado = False
+        publicador = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, formato, *args):
+                pass
+
+            def do_GET(self):
+                caminho, _, query = self.path.partition("?")
+                if caminho == "/metricas":
+                    desde = 0
+                    for par in query.split("&"):
+                        if par.startswith("desde="):
+                            try:
+                                desde = max(0, int(par[len("desde="):]))
+                            except ValueError:
+                                pass
+                    corpo = json.dumps(publicador.episodios_desde(desde)).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+                elif caminho == "/eventos":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    publicador._enviar_eventos(self.wfile)
+                else:
+                    self.send_error(404)
+
+        self.servidor = ThreadingHTTPServer((host, porta), _Handler)
+        self.servidor.daemon_threads = True
+        self.host, self.porta = self.servidor.server_address[:2]
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self._thread.start()
+
+    def publicar(self, registo):
+        with self._condicao:
+            self.episodios.append(registo)
+            self._condicao.notify_all()
+
+    def episodios_desde(self, indice):
+        with self._condicao:
+            return self.episodios[indice:]
+
+    def _enviar_eventos(self, wfile):
+        enviados = 0
+        while True:
+            with self._condicao:
+                while enviados >= len(self.episodios) and not self._terminado:
+                    self._condicao.wait(timeout=1.0)
+                novos = self.episodios[enviados:]
+                terminado = self._terminado
+            try:
+                for registo in novos:
+                    wfile.write(f"data: {json.dumps(registo)}\n\n".encode("utf-8"))
+                if terminado:
+                    wfile.write(b"event: fim\ndata: {}\n\n")
+                wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            enviados += len(novos)
+            if terminado:
+                return
+
+    def parar(self):
+        with self._condicao:
+            self._terminado = True
+            self._condicao.notify_all()
+        self.servidor.shutdown()
+        self.servidor.server_close()
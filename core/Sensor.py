@@ -1,13 +1,112 @@
 # Base para sensores que extraem partes do estado do ambiente para o agente
+import ast
+
+# conteudo de cada celula na grelha dos sensores (um byte por celula)
+LIVRE = 0
+OBSTACULO = 1  # tambem o que fica fora do mapa
+RECURSO = 2
+NINHO = 3
+FAROL = 4
+
+
+def _sinal(v):
+    return 1 if v > 0 else -1 if v < 0 else 0
+
+
+def estado_para_texto(estado):
+    """
+    Chave de Q-table para estados feitos de leituras de sensores (bytes, tuplos, None).
+    """
+    return repr(estado)
+
+
+def estado_de_texto(texto):
+    return ast.literal_eval(texto)
+
+
 class Sensor:
     """
     Sensor base. Ambientes concretos podem definir sensores que devolvem
     parte do estado para o agente.
+    Um agente com sensores instalados (Agente.instala) recebe uma observacao
+    parcial: em vez da lista global de recursos/ninhos, a leitura de cada sensor
+    fica na chave `nome` do sensor.
     """
 
+    nome = "sensor"
+
     def mede(self, ambiente, agente):
         """
         Mede algo no ambiente para o agente.
         Por omissão não faz nada.
         """
         return None
+
+
+class SensorVistaLocal(Sensor):
+    """
+    Vista local: janela (2*raio+1) x (2*raio+1) centrada no agente, em bytes
+    (uma celula por byte, linha a linha). Custa o tamanho da janela, nao o do mapa
+    nem o numero de recursos.
+    """
+
+    nome = "vista_local"
+
+    def __init__(self, raio=1):
+        self.raio = raio
+
+    def mede(self, ambiente, agente):
+        x, y = ambiente.posicoes_agentes[agente]
+        return ambiente.janela(x, y, self.raio)
+
+
+class SensorAlvoProximo(Sensor):
+    """
+    Deslocamento (dx, dy) ate ao alvo mais proximo dentro da janela de raio `raio`
+    (recurso, ou ninho se o agente carrega um; o farol no ambiente do farol),
+    ou None se nenhum esta a vista.
+    """
+
+    nome = "alvo_proximo"
+    # raio -> [(indice na janela, dx, dy)] por distancia crescente
+    _ordens = {}
+
+    def __init__(self, raio=2):
+        self.raio = raio
+
+    def _ordem(self):
+        ordem = self._ordens.get(self.raio)
+        if ordem is None:
+            lado = 2 * self.raio + 1
+            ordem = sorted(
+                (((dy + self.raio) * lado + dx + self.raio, dx, dy)
+                 for dy in range(-self.raio, self.raio + 1)
+                 for dx in range(-self.raio, self.raio + 1)),
+                key=lambda c: (abs(c[1]) + abs(c[2]), c[2], c[1]),
+            )
+            self._ordens[self.raio] = ordem
+        return ordem
+
+    def mede(self, ambiente, agente):
+        alvo = ambiente.celula_alvo(agente)
+        x, y = ambiente.posicoes_agentes[agente]
+        janela = ambiente.janela(x, y, self.raio)
+        if alvo not in janela:
+            return None
+        for indice, dx, dy in self._ordem():
+            if janela[indice] == alvo:
+                return (dx, dy)
+        return None
+
+
+class SensorDirecaoFarol(Sensor):
+    """
+    Direcao do farol em sinais (sx, sy), sempre conhecida (o farol e visivel de longe).
+    """
+
+    nome = "direcao_farol"
+
+    def mede(self, ambiente, agente):
+        x, y = ambiente.posicoes_agentes[agente]
+        fx, fy = ambiente.pos_farol
+        return (_sinal(fx - x), _sinal(fy - y))
@@ -0,0 +1,45 @@
+TIPOS_TRACOS = ("q_lambda", "sarsa_lambda")
+
+
+class TracosElegibilidade:
+    """
+    Tracos de elegibilidade esparsos para Q(lambda) (Watkins) e SARSA(lambda).
+    So os pares (estado, accao) com traco ativo sao guardados; cada traco decai
+    gamma*lambda por passo e e removido abaixo de `limiar`, por isso o custo de
+    cada atualizacao e limitado pelo numero de tracos vivos (nunca mais de
+    `maximo`, mesmo em episodios longos).
+    Os tracos sao "de substituicao" (voltam a 1 ao revisitar o par).
+    """
+
+    def __init__(self, lambda_=0.8, gamma=0.9, tipo="q_lambda", limiar=1e-3, maximo=500):
+        if tipo not in TIPOS_TRACOS:
+            raise ValueError(f"Tipo de tracos desconhecido: {tipo}")
+        self.lambda_ = lambda_
+        self.gamma = gamma
+        self.tipo = tipo
+        self.limiar = limiar
+        self.maximo = max(1, int(maximo))
+        # dict por ordem de visita: os primeiros sao os mais antigos (menores)
+        self.tracos = {}
+
+    def atualizar(self, q_table, chave, erro, alpha):
+        """
+        Aplica o erro TD do passo atual a todos os pares elegiveis e faz decair os tracos.
+        """
+        self.tracos.pop(chave, None)
+        self.tracos[chave] = 1.0
+        while len(self.tracos) > self.maximo:
+            del self.tracos[next(iter(self.tracos))]
+
+        decaimento = self.gamma * self.lambda_
+        passo = alpha * erro
+        vivos = {}
+        for k, e in self.tracos.items():
+            q_table[k] = q_table.get(k, 0.0) + passo * e
+            e *= decaimento
+            if e >= self.limiar:
+                vivos[k] = e
+        self.tracos = vivos
+
+    def limpar(self):
+        self.tracos = {}
@@ -0,0 +1,138 @@
+import json
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+
+from agregador_metricas import AgregadorMetricas
+from plot_metricas import desenhar_metricas
+
+
+class FonteMetricas:
+    """
+    Recebe episodios em segundo plano, de um servidor do motor (SSE em /eventos)
+    ou de um ficheiro JSON lines que ainda esta a ser escrito. Linhas invalidas do
+    ficheiro sao saltadas com um aviso em stderr e contadas em `invalidos`.
+    """
+
+    def __init__(self, origem):
+        self.origem = origem
+        self.novos = []
+        self.ultimo = {}
+        self.terminou = False
+        self.invalidos = 0
+        self._lock = threading.Lock()
+        alvo = self._ler_sse if origem.startswith("http") else self._seguir_ficheiro
+        threading.Thread(target=alvo, daemon=True).start()
+
+    def _receber(self, registo):
+        with self._lock:
+            self.novos.append(registo)
+            self.ultimo = registo
+
+    def retirar(self):
+        with self._lock:
+            novos, self.novos = self.novos, []
+            return novos
+
+    def _ler_sse(self):
+        url = self.origem.rstrip("/")
+        if not url.endswith("/eventos"):
+            url += "/eventos"
+        try:
+            with urllib.request.urlopen(url) as resposta:
+                evento = None
+                for linha in resposta:
+                    linha = linha.decode("utf-8").rstrip("\n")
+                    if linha.startswith("event:"):
+                        evento = linha[len("event:"):].strip()
+                    elif linha.startswith("data:"):
+                        if evento == "fim":
+                            break
+                        self._receber(json.loads(linha[len("data:"):]))
+                    elif not linha:
+                        evento = None
+        except OSError as erro:
+            print(f"Ligacao terminada: {erro}")
+        self.terminou = True
+
+    def _seguir_ficheiro(self):
+        caminho = Path(self.origem)
+        while not caminho.exists():
+            time.sleep(0.5)
+        pendente = ""
+        numero = 0
+        with open(caminho, "r", encoding="utf-8") as f:
+            while True:
+                linha = f.readline()
+                if not linha:
+                    time.sleep(0.5)
+                    continue
+                pendente += linha
+                # linha incompleta: o motor ainda a esta a escrever
+                if not pendente.endswith("\n"):
+                    continue
+                numero += 1
+                if pendente.strip():
+                    try:
+                        registo = json.loads(pendente)
+                    except json.JSONDecodeError:
+                        self.invalidos += 1
+                        print(f"Aviso: linha {numero} invalida ignorada", file=sys.stderr)
+                    else:
+                        self._receber(registo)
+                pendente = ""
+
+
+def _legenda(registo):
+    partes = [f"episodio {registo.get('episodio', '?')}"]
+    if "passos_por_segundo" in registo:
+        partes.append(f"{registo['passos_por_segundo']:.0f} passos/s")
+    for nome, estado in registo.get("agentes", {}).items():
+        detalhes = []
+        if "epsilon" in estado:
+            detalhes.append(f"eps={estado['epsilon']:.3f}")
+        if "geracao" in estado:
+            detalhes.append(f"ger={estado['geracao']}")
+        if "melhor_fitness" in estado:
+            detalhes.append(f"melhor={estado['melhor_fitness']:.2f}")
+        if detalhes:
+            partes.append(f"{nome}: " + " ".join(detalhes))
+    return " | ".join(partes)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python3 dashboard_metricas.py <http://127.0.0.1:8765 | metricas_ao_vivo.jsonl> [intervalo_s]")
+        sys.exit(1)
+
+    origem = sys.argv[1]
+    intervalo = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    fonte = FonteMetricas(origem)
+    agregador = AgregadorMetricas()
+
+    plt.ion()
+    fig, axs = plt.subplots(2, 2, figsize=(10, 8))
+    while plt.fignum_exists(fig.number):
+        novos = fonte.retirar()
+        for registo in novos:
+            agregador.adiciona(registo)
+        if novos:
+            for ax in axs.flat:
+                ax.clear()
+            desenhar_metricas(axs, agregador, Path(origem).name)
+            fig.suptitle(_legenda(fonte.ultimo), fontsize=9)
+            fig.tight_layout()
+        if fonte.terminou and not novos:
+            print("Simulacao terminada.")
+            plt.ioff()
+            plt.show()
+            break
+        plt.pause(intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
+import json
 import sys
 from core.MotorDeSimulacao import MotorDeSimulacao
 
 
 if __name__ == "__main__":
-    # Usa ficheiro passado por argumento ou por omissão o farol
-    ficheiro = sys.argv[1] if len(sys.argv) > 1 else "parametros_farol.json"
-    motor = MotorDeSimulacao.cria(ficheiro)
-    motor.executa()
+    # Usa ficheiro passado por argumento ou por omissão o farol; --retomar continua do ultimo checkpoint
+    argumentos = [a for a in sys.argv[1:] if a != "--retomar"]
+    ficheiro = argumentos[0] if argumentos else "parametros_farol.json"
+    with open(ficheiro, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    if parametros.get("ilhas"):
+        # agentes geneticos em varias ilhas (processos) com migracao
+        from core.ModeloIlhas import ModeloIlhas
+
+        ModeloIlhas(parametros).executa()
+    elif parametros.get("coevolucao"):
+        # agentes geneticos avaliados em equipas (genoma partilhado ou melhor parceiro)
+        from core.Coevolucao import Coevolucao
+
+        Coevolucao(parametros).executa()
+    else:
+        motor = MotorDeSimulacao.cria(ficheiro, retomar="--retomar" in sys.argv)
+        motor.executa()
@@ -1,40 +1,53 @@
-import json
 import sys
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 
+from agregador_metricas import AgregadorMetricas
 
-def carregar_metricas(caminho):
-    with open(caminho, "r", encoding="utf-8") as f:
-        return json.load(f)
 
+def carregar_metricas(caminho, janela=10):
+    return AgregadorMetricas.de_ficheiro(caminho, janela)
 
-def curva(axes, x, y, titulo, ylabel):
-    axes.plot(x, y, marker="o")
+
+def curva(axes, x, y, titulo, ylabel, media_movel=None):
+    # marcadores so em series curtas; com muitos pontos so atrasam o desenho
+    axes.plot(x, y, marker="o" if len(x) <= 200 else None, alpha=0.6 if media_movel else 1.0)
+    if media_movel:
+        axes.plot(x, media_movel, color="black", linewidth=1.5, label="media movel")
+        axes.legend(loc="best")
     axes.set_title(titulo)
     axes.set_xlabel("Episodio")
     axes.set_ylabel(ylabel)
     axes.grid(True, alpha=0.3)
 
 
+def desenhar_metricas(axs, metricas, nome):
+    """
+    Desenha as curvas de um AgregadorMetricas numa grelha 2x2 de eixos.
+    """
+    episodios = metricas.episodios
+    valores = metricas.valores
+    moveis = metricas.medias_moveis
+
+    curva(axs[0, 0], episodios, valores["recompensa_total"], f"{nome} - Recompensa total", "Recompensa", moveis["recompensa_total"])
+    curva(axs[0, 1], episodios, valores["recompensa_descontada"], f"{nome} - Recompensa descontada", "Recompensa desc.", moveis["recompensa_descontada"])
+    curva(axs[1, 0], episodios, valores["passos"], f"{nome} - Passos", "Passos", moveis["passos"])
+    curva(axs[1, 1], episodios, metricas.sucesso_acumulado, f"{nome} - Taxa de sucesso acum.", "Taxa")
+
+
 def plotar_metricas(metricas, nome):
-    episodios = [m.get("episodio", i + 1) for i, m in enumerate(metricas)]
-    r_total = [m.get("recompensa_total", 0) for m in metricas]
-    r_desc = [m.get("recompensa_descontada", 0) for m in metricas]
-    passos = [m.get("passos", 0) for m in metricas]
-    sucesso = [1 if m.get("sucesso", False) else 0 for m in metricas]
-    sucesso_acum = []
-    soma = 0
-    for i, s in enumerate(sucesso, 1):
-        soma += s
-        sucesso_acum.append(soma / i)
+    """
+    Desenha as curvas de um AgregadorMetricas (ou de uma lista de metricas por episodio).
+    """
+    if not isinstance(metricas, AgregadorMetricas):
+        agregador = AgregadorMetricas()
+        for m in metricas:
+            agregador.adiciona(m)
+        metricas = agregador
 
     fig, axs = plt.subplots(2, 2, figsize=(10, 8))
-    curva(axs[0, 0], episodios, r_total, f"{nome} - Recompensa total", "Recompensa")
-    curva(axs[0, 1], episodios, r_desc, f"{nome} - Recompensa descontada", "Recompensa desc.")
-    curva(axs[1, 0], episodios, passos, f"{nome} - Passos", "Passos")
-    curva(axs[1, 1], episodios, sucesso_acum, f"{nome} - Taxa de sucesso acum.", "Taxa")
+    desenhar_metricas(axs, metricas, nome)
     fig.tight_layout()
     plt.show()
 
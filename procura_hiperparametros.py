@@ -0,0 +1,285 @@
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.Configuracao import Cenario
+from core.MotorDeSimulacao import MotorDeSimulacao
+
+METRICAS = ("recompensa", "sucesso", "passos", "fitness")
+
+
+def amostrar(espaco, gerador):
+    """
+    Um candidato do espaco de procura. Cada chave ("alpha" ou "A1.alpha") aceita:
+    [min, max] intervalo (inteiros se ambos o forem), [a, b, c, ...] ou {"escolha": [...]}
+    valores possiveis, e {"log": [min, max]} intervalo em escala logaritmica.
+    """
+    candidato = {}
+    for chave, dominio in espaco.items():
+        if isinstance(dominio, dict) and "log" in dominio:
+            baixo, alto = dominio["log"]
+            candidato[chave] = math.exp(gerador.uniform(math.log(baixo), math.log(alto)))
+        elif isinstance(dominio, dict) and "escolha" in dominio:
+            candidato[chave] = gerador.choice(dominio["escolha"])
+        elif isinstance(dominio, list) and len(dominio) == 2 and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in dominio):
+            baixo, alto = dominio
+            if isinstance(baixo, int) and isinstance(alto, int):
+                candidato[chave] = gerador.randint(baixo, alto)
+            else:
+                candidato[chave] = gerador.uniform(baixo, alto)
+        elif isinstance(dominio, list) and dominio:
+            candidato[chave] = gerador.choice(dominio)
+        else:
+            raise ValueError(f"Dominio invalido para '{chave}': {dominio!r}")
+    return candidato
+
+
+def alteracoes_por_agente(cenario, candidato):
+    """
+    {nome do agente: {chave: valor}}: "A1.alpha" so no A1; "alpha" em todos os agentes
+    cujo tipo aceita essa chave.
+    """
+    alteracoes = {a.nome: {} for a in cenario.agentes}
+    for chave, valor in candidato.items():
+        nome, _, campo = chave.rpartition(".")
+        alvos = [a for a in cenario.agentes if (a.nome == nome if nome else campo in a.especificacao.campos)]
+        if not alvos:
+            raise ValueError(f"Nenhum agente aceita '{chave}'")
+        for agente in alvos:
+            alteracoes[agente.nome][campo] = valor
+    return {nome: a for nome, a in alteracoes.items() if a}
+
+
+def preparar_parametros(parametros, pasta):
+    """
+    Copia dos parametros para treinar isolado em `pasta`: sem render, sem Q-tables/genomas
+    do repositorio, agentes em aprendizagem (exceto os fixos e as politicas compiladas)
+    e um checkpoint para continuar entre rondas.
+    """
+    p = json.loads(json.dumps(parametros))
+    p["render"] = False
+    p["render_window"] = False
+    p["ficheiro_metricas"] = os.path.join(pasta, "metricas.json")
+    p.pop("ficheiro_passos", None)
+    p.pop("ao_vivo", None)
+    p["checkpoint"] = {"ficheiro": os.path.join(pasta, "checkpoint.pkl"), "retomar": True}
+    for cfg in p.get("agentes", []):
+        cfg.pop("q_table", None)
+        cfg.pop("ficheiro_genoma", None)
+        if cfg.get("modo") == "fixo":
+            continue
+        if cfg.get("algoritmo", "q_learning") in ("q_learning", "genetico"):
+            cfg["modo"] = "aprendizagem"
+    return p
+
+
+def treinar(parametros, episodios, semente):
+    """
+    Treina (ou continua do checkpoint da ronda anterior) ate `episodios` e devolve
+    as metricas de todos os episodios ja corridos e o historico de fitness por
+    geracao de cada agente genetico.
+    """
+    p = dict(parametros, episodios=episodios)
+    p["checkpoint"] = dict(p["checkpoint"], a_cada=episodios)
+    # so conta na primeira ronda: ao retomar, o gerador vem do checkpoint
+    random.seed(semente)
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        motor = MotorDeSimulacao.de_parametros(p)
+        motor.executa()
+    fitness = {a.nome: a.historico_fitness for a in motor.agentes if hasattr(a, "historico_fitness")}
+    return motor.logger.episodios, fitness
+
+
+def pontuacao(resultado, metrica, janela):
+    """
+    Media dos ultimos `janela` episodios (maior e melhor). Com "fitness", media
+    (entre agentes geneticos) do fitness medio da ultima geracao completa.
+    """
+    episodios, fitness = resultado
+    if metrica == "fitness":
+        ultimas = [geracoes[-1]["media"] for geracoes in fitness.values() if geracoes]
+        return sum(ultimas) / len(ultimas) if ultimas else -float("inf")
+    ultimos = episodios[-janela:]
+    if not ultimos:
+        return -float("inf")
+    if metrica == "sucesso":
+        return sum(1 for e in ultimos if e.get("sucesso")) / len(ultimos)
+    if metrica == "passos":
+        return -sum(e["passos"] for e in ultimos) / len(ultimos)
+    return sum(e["recompensa_total"] for e in ultimos) / len(ultimos)
+
+
+def episodios_por_geracao(cenario):
+    """
+    Episodios de uma geracao (populacao x episodios_por_individuo) do agente genetico
+    mais lento, ou 1 sem agentes geneticos.
+    """
+    geracao = 1
+    for agente in cenario.agentes:
+        if agente.cfg.get("algoritmo") == "genetico":
+            a = agente.argumentos
+            geracao = max(geracao, max(2, a["populacao"]) * max(1, a["episodios_por_individuo"]))
+    return geracao
+
+
+def rondas(minimo, maximo, eta):
+    """
+    Orcamentos (episodios acumulados) de cada ronda: minimo, minimo*eta, ..., maximo.
+    """
+    orcamentos = [minimo]
+    while orcamentos[-1] * eta < maximo:
+        orcamentos.append(orcamentos[-1] * eta)
+    if orcamentos[-1] < maximo:
+        orcamentos.append(maximo)
+    return orcamentos
+
+
+class ProcuraHiperparametros:
+    """
+    Procura aleatoria com successive halving: `candidatos` configuracoes treinam
+    `minimo` episodios; fica o melhor 1/eta (pela metrica nos ultimos episodios),
+    que continua a treinar ate ao orcamento seguinte, e assim ate `maximo` episodios.
+    Cada candidato continua do seu checkpoint; as corridas de cada ronda sao
+    distribuidas por processos. Com agentes geneticos os orcamentos de cada candidato
+    sao arredondados para geracoes inteiras (a meio de uma geracao os parametros do GA
+    ainda nao atuaram) e, por omissao, a metrica e o fitness medio da ultima geracao.
+    Empates sao desfeitos ao acaso (com a semente da procura).
+    """
+
+    def __init__(self, parametros, espaco, candidatos=16, eta=2, minimo=10, maximo=None,
+                 metrica=None, janela=10, processos=None, semente=0):
+        self.cenario = Cenario(parametros)
+        if metrica is None:
+            geneticos = any(a.cfg.get("algoritmo") == "genetico" for a in self.cenario.agentes)
+            metrica = "fitness" if geneticos else "recompensa"
+        if metrica not in METRICAS:
+            raise ValueError(f"Metrica desconhecida: {metrica}")
+        self.espaco = espaco
+        self.eta = max(2, int(eta))
+        self.maximo = maximo or parametros.get("episodios", 1)
+        self.metrica = metrica
+        self.janela = janela
+        self.processos = processos or os.cpu_count() or 1
+        self.semente = semente
+
+        gerador = random.Random(semente)
+        self.ensaios = []
+        for i in range(candidatos):
+            valores = amostrar(espaco, gerador)
+            # valida ja (tipos, chaves) com o esquema dos parametros
+            variante = self.cenario.variante(agentes=alteracoes_por_agente(self.cenario, valores))
+            self.ensaios.append({
+                "id": i, "valores": valores, "parametros": variante.parametros, "pontuacoes": [],
+                "geracao": episodios_por_geracao(variante), "episodios": 0,
+            })
+        # com agentes geneticos a primeira ronda cobre duas geracoes: a primeira e a
+        # populacao inicial, ainda sem selecao, cruzamento nem mutacao
+        geracao = max(e["geracao"] for e in self.ensaios) if self.ensaios else 1
+        if geracao > 1:
+            minimo = max(minimo, 2 * geracao)
+        self.orcamentos = rondas(max(1, min(minimo, self.maximo)), self.maximo, self.eta)
+        self._desempate = random.Random(semente + 1)
+
+    @staticmethod
+    def _orcamento(ensaio, orcamento):
+        # arredonda para cima ate uma geracao inteira (1 episodio sem agentes geneticos)
+        return -(-orcamento // ensaio["geracao"]) * ensaio["geracao"]
+
+    def executa(self):
+        inicio = time.perf_counter()
+        episodios_gastos = 0
+        vivos = list(self.ensaios)
+        with tempfile.TemporaryDirectory() as raiz:
+            for ensaio in self.ensaios:
+                pasta = os.path.join(raiz, f"candidato_{ensaio['id']}")
+                os.makedirs(pasta)
+                ensaio["parametros"] = preparar_parametros(ensaio["parametros"], pasta)
+            executor = ProcessPoolExecutor(self.processos) if self.processos > 1 else None
+            try:
+                for ronda, orcamento in enumerate(self.orcamentos, 1):
+                    orcamentos = [self._orcamento(e, orcamento) for e in vivos]
+                    tarefas = ([e["parametros"] for e in vivos], orcamentos,
+                               [self.semente * 1000 + e["id"] for e in vivos])
+                    if executor:
+                        resultados = list(executor.map(treinar, *tarefas))
+                    else:
+                        resultados = list(map(treinar, *tarefas))
+                    for ensaio, episodios, resultado in zip(vivos, orcamentos, resultados):
+                        episodios_gastos += episodios - ensaio["episodios"]
+                        ensaio["episodios"] = episodios
+                        ensaio["pontuacoes"].append(pontuacao(resultado, self.metrica, self.janela))
+                    vivos.sort(key=lambda e: (e["pontuacoes"][-1], self._desempate.random()), reverse=True)
+                    self._mostrar_ronda(ronda, orcamento, vivos)
+                    if ronda < len(self.orcamentos):
+                        vivos = vivos[:max(1, len(vivos) // self.eta)]
+            finally:
+                if executor:
+                    executor.shutdown()
+
+        completo = sum(self._orcamento(e, self.maximo) for e in self.ensaios)
+        print(
+            f"Episodios gastos: {episodios_gastos} (sem cortes seriam {completo}, "
+            f"{episodios_gastos / completo:.0%}) em {time.perf_counter() - inicio:.1f}s"
+        )
+        return vivos[0]
+
+    def _mostrar_ronda(self, ronda, orcamento, vivos):
+        janela = "ultima geracao" if self.metrica == "fitness" else f"ultimos {self.janela}"
+        print(f"Ronda {ronda}: {len(vivos)} candidatos com {orcamento} episodios ({self.metrica}, {janela})")
+        for ensaio in vivos:
+            valores = ", ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in ensaio["valores"].items())
+            print(f"  #{ensaio['id']:<3} {ensaio['pontuacoes'][-1]:10.3f}  {ensaio['episodios']:>5} ep  {valores}")
+
+    def resumo(self):
+        return [{"id": e["id"], "valores": e["valores"], "pontuacoes": e["pontuacoes"], "episodios": e["episodios"]}
+                for e in self.ensaios]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procura de hiperparametros (aleatoria + successive halving).")
+    parser.add_argument("parametros", help="ficheiro de parametros base")
+    parser.add_argument("espaco", help='espaco de procura (JSON ou ficheiro), ex. {"alpha": [0.1, 0.9], "epsilon_decay": [0.95, 0.999]}')
+    parser.add_argument("--candidatos", type=int, default=16)
+    parser.add_argument("--eta", type=int, default=2, help="fica 1/eta dos candidatos em cada ronda")
+    parser.add_argument("--minimo", type=int, default=10, help="episodios da primeira ronda")
+    parser.add_argument("--maximo", type=int, help="episodios da ultima ronda (por omissao, os dos parametros)")
+    parser.add_argument("--metrica", choices=METRICAS, help="por omissao, fitness com agentes geneticos e recompensa sem eles")
+    parser.add_argument("--janela", type=int, default=10, help="ultimos episodios usados na pontuacao")
+    parser.add_argument("--processos", type=int, help="processos em paralelo (por omissao, um por core)")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--saida", help="guarda todos os candidatos e pontuacoes neste ficheiro JSON")
+    parser.add_argument("--guardar-melhor", metavar="FICHEIRO", help="escreve os parametros com os valores do melhor candidato")
+    args = parser.parse_args()
+
+    with open(args.parametros, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    if os.path.exists(args.espaco):
+        with open(args.espaco, "r", encoding="utf-8") as f:
+            espaco = json.load(f)
+    else:
+        espaco = json.loads(args.espaco)
+
+    procura = ProcuraHiperparametros(
+        parametros, espaco, args.candidatos, args.eta, args.minimo, args.maximo,
+        args.metrica, args.janela, args.processos, args.semente,
+    )
+    melhor = procura.executa()
+    print(f"Melhor: #{melhor['id']} {json.dumps(melhor['valores'])}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(procura.resumo(), f, ensure_ascii=False, indent=2)
+    if args.guardar_melhor:
+        cenario = procura.cenario.variante(agentes=alteracoes_por_agente(procura.cenario, melhor["valores"]))
+        with open(args.guardar_melhor, "w", encoding="utf-8") as f:
+            json.dump(cenario.parametros, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
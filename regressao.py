@@ -0,0 +1,171 @@
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from core.MotorDeSimulacao import MotorDeSimulacao, correr_episodio
+
+FICHEIRO_GOLDEN = "regressao_golden.json"
+MODOS = ("motor", "sincrono")
+
+
+def preparar_parametros(parametros, pasta, episodios):
+    """
+    Copia dos parametros para correr isolado em `pasta`: sem render nem saidas ao vivo,
+    com as Q-tables/genomas copiados (os modos teste leem-nos, os de aprendizagem escrevem-nos).
+    """
+    p = json.loads(json.dumps(parametros))
+    p["episodios"] = min(p.get("episodios", 1), episodios)
+    p["render"] = False
+    p["render_window"] = False
+    p["ficheiro_metricas"] = os.path.join(pasta, "metricas.json")
+    p["ficheiro_passos"] = os.path.join(pasta, "passos.json")
+    p.pop("ao_vivo", None)
+    p.pop("checkpoint", None)
+    for cfg in p.get("agentes", []):
+        for chave in ("q_table", "ficheiro_genoma", "politica"):
+            if not cfg.get(chave):
+                continue
+            destino = os.path.join(pasta, f"{cfg.get('nome', 'agente')}_{os.path.basename(cfg[chave])}")
+            if os.path.exists(cfg[chave]):
+                shutil.copy(cfg[chave], destino)
+            cfg[chave] = destino
+    return p
+
+
+def hash_episodio(passos, sucesso):
+    """
+    Hash de um episodio: cada passo (passo, agente, accao, recompensa, posicao) e o desfecho.
+    """
+    h = hashlib.sha1()
+    for passo in passos:
+        h.update(repr(tuple(passo)).encode())
+    h.update(b"sucesso" if sucesso else b"falha")
+    return h.hexdigest()[:16]
+
+
+def correr_motor(parametros, semente):
+    """
+    Corrida normal (MotorDeSimulacao.executa, com threads); hash por episodio a partir
+    do historico de passos e das metricas do Logger.
+    """
+    random.seed(semente)
+    motor = MotorDeSimulacao.de_parametros(parametros)
+    motor.executa()
+    por_episodio = {}
+    for r in motor.historico_passos_todos:
+        por_episodio.setdefault(r.episodio, []).append((r.passo, r.agente, r.accao, r.recompensa, r.posicao))
+    return [hash_episodio(por_episodio.get(e["episodio"], []), e["sucesso"]) for e in motor.logger.episodios]
+
+
+def correr_sincrono(parametros, semente):
+    """
+    Os mesmos episodios pelo caminho rapido (correr_episodio, sem threads).
+    Sem corte nem barramento: cenarios com esses blocos nao sao comparaveis.
+    """
+    random.seed(semente)
+    motor = MotorDeSimulacao.de_parametros(parametros)
+    hashes = []
+    try:
+        for _ in range(motor.episodios):
+            motor._reset_episodio()
+            passos = []
+            resultado = correr_episodio(motor.ambiente, motor.agentes, motor.max_passos, passos)
+            hashes.append(hash_episodio(passos, resultado["sucesso"]))
+            motor._guardar_politicas()
+            motor._reset_agentes()
+    finally:
+        motor._parar_threads()
+    return hashes
+
+
+def suporta(modo, parametros):
+    if modo == "sincrono":
+        corte = parametros.get("corte", {})
+        return "comunicacao" not in parametros and not corte.get("sem_progresso") and not corte.get("elite")
+    return True
+
+
+def correr(ficheiro, semente, episodios, modo):
+    with open(ficheiro, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    if not suporta(modo, parametros):
+        return None
+    with tempfile.TemporaryDirectory() as pasta, open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        p = preparar_parametros(parametros, pasta, episodios)
+        if modo == "sincrono":
+            return correr_sincrono(p, semente)
+        return correr_motor(p, semente)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Harness de regressao: hash por episodio de corridas fixas (cenarios x sementes), "
+                    "comparado com o registo golden."
+    )
+    parser.add_argument("cenarios", nargs="*", help="ficheiros de parametros (por omissao, parametros_*.json)")
+    parser.add_argument("--golden", default=FICHEIRO_GOLDEN)
+    parser.add_argument("--gravar", action="store_true", help="(re)grava o golden em vez de comparar")
+    parser.add_argument("--sementes", default="1,2", help="sementes separadas por virgulas")
+    parser.add_argument("--episodios", type=int, default=20, help="maximo de episodios por corrida")
+    parser.add_argument("--modo", default="motor", help="motor, sincrono ou ambos (motor,sincrono)")
+    args = parser.parse_args()
+
+    cenarios = args.cenarios or sorted(glob.glob("parametros_*.json"))
+    sementes = [int(s) for s in args.sementes.split(",") if s]
+    modos = MODOS if args.modo == "ambos" else tuple(args.modo.split(","))
+    for modo in modos:
+        if modo not in MODOS:
+            parser.error(f"modo desconhecido: {modo}")
+
+    if args.gravar:
+        golden = {"episodios": args.episodios, "corridas": {}}
+        for ficheiro in cenarios:
+            for semente in sementes:
+                inicio = time.perf_counter()
+                hashes = correr(ficheiro, semente, args.episodios, "motor")
+                golden["corridas"][f"{ficheiro}#{semente}"] = hashes
+                print(f"{ficheiro} semente {semente}: {len(hashes)} episodios ({time.perf_counter() - inicio:.1f}s)")
+        with open(args.golden, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2)
+        print(f"Golden gravado em {args.golden}")
+        return
+
+    with open(args.golden, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    falhas = 0
+    for modo in modos:
+        for ficheiro in cenarios:
+            for semente in sementes:
+                chave = f"{ficheiro}#{semente}"
+                esperado = golden["corridas"].get(chave)
+                if esperado is None:
+                    print(f"[{modo}] {chave}: sem golden (gravar com --gravar)")
+                    continue
+                inicio = time.perf_counter()
+                obtido = correr(ficheiro, semente, golden["episodios"], modo)
+                duracao = time.perf_counter() - inicio
+                if obtido is None:
+                    print(f"[{modo}] {chave}: ignorado (corte/comunicacao so existem no motor)")
+                elif obtido == esperado:
+                    print(f"[{modo}] {chave}: OK ({len(obtido)} episodios, {duracao:.1f}s)")
+                else:
+                    falhas += 1
+                    diferentes = [i + 1 for i, (a, b) in enumerate(zip(esperado, obtido)) if a != b]
+                    primeiro = diferentes[0] if diferentes else min(len(esperado), len(obtido)) + 1
+                    print(
+                        f"[{modo}] {chave}: DIFERENTE a partir do episodio {primeiro} "
+                        f"({len(diferentes)} episodios diferentes, {len(obtido)}/{len(esperado)} corridos)"
+                    )
+    print("Tudo igual ao golden." if not falhas else f"{falhas} corridas diferentes do golden.")
+    raise SystemExit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import sys
+
+from agregador_metricas import indexar_episodios, iterar_episodio
+from core.Accao import ACCOES, CODIGOS_ACCOES
+from core.MotorDeSimulacao import MotorDeSimulacao
+
+
+class _AgenteReplay:
+    # so precisa de nome: as accoes vem do ficheiro de passos
+    def __init__(self, nome):
+        self.nome = nome
+
+
+def construir_cenario(parametros):
+    """
+    Cria o ambiente descrito nos parametros e agentes "vazios" nas posicoes iniciais.
+    """
+    motor = MotorDeSimulacao(parametros=parametros)
+    motor._construir_ambiente(parametros.get("ambiente", {}))
+    ambiente = motor.ambiente
+    agentes = {}
+    for cfg in parametros.get("agentes", []):
+        agente = _AgenteReplay(cfg.get("nome", "agente"))
+        agentes[agente.nome] = agente
+        ambiente.adicionaAgente(agente, tuple(cfg.get("posicao_inicial", (0, 0))))
+    return ambiente, agentes
+
+
+def reconstruir_frames(ambiente, agentes, registos):
+    """
+    Reaplica no ambiente as accoes de um episodio e devolve [(passo, grelha), ...],
+    com um frame inicial (passo 0) e um frame por passo do motor.
+    A posicao registada no ficheiro e a referencia: se divergir, prevalece.
+    """
+    ambiente.reset()
+    frames = [(0, ambiente.grid_state())]
+    passo_atual = None
+    for registo in registos:
+        passo = registo.get("passo")
+        if passo_atual is not None and passo != passo_atual:
+            ambiente.atualizacao()
+            frames.append((passo_atual, ambiente.grid_state()))
+        passo_atual = passo
+
+        agente = agentes.get(registo.get("agente"))
+        if agente is None:
+            continue
+        codigo = CODIGOS_ACCOES.get(registo.get("accao"))
+        if codigo is not None:
+            ambiente.agir(ACCOES[codigo], agente)
+        posicao = registo.get("posicao")
+        if posicao is not None:
+            ambiente.posicoes_agentes[agente] = tuple(posicao)
+    if passo_atual is not None:
+        ambiente.atualizacao()
+        frames.append((passo_atual, ambiente.grid_state()))
+    return frames
+
+
+def _exportar(frames, saida, fps):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from visualizacao import mapear_grelha
+
+    fig, ax = plt.subplots()
+    im = ax.imshow(mapear_grelha(frames[0][2]), cmap="tab20", vmin=0, vmax=5)
+    altura, largura = len(frames[0][2]), len(frames[0][2][0])
+    textos = [[ax.text(x, y, "", ha="center", va="center", color="black") for x in range(largura)] for y in range(altura)]
+    titulo = ax.set_title("")
+
+    def desenhar(i):
+        episodio, passo, grelha = frames[i]
+        im.set_data(mapear_grelha(grelha))
+        for y, linha in enumerate(grelha):
+            for x, c in enumerate(linha):
+                textos[y][x].set_text("" if c in (".", "#") else c)
+        titulo.set_text(f"Episodio {episodio} - passo {passo}")
+        return [im, titulo] + [t for linha in textos for t in linha]
+
+    extensao = os.path.splitext(saida)[1].lower()
+    if extensao in (".gif", ".mp4"):
+        from matplotlib.animation import FFMpegWriter, FuncAnimation, PillowWriter
+
+        writer = PillowWriter(fps=fps) if extensao == ".gif" else FFMpegWriter(fps=fps)
+        animacao = FuncAnimation(fig, desenhar, frames=len(frames), blit=False)
+        animacao.save(saida, writer=writer)
+    else:
+        # pasta de PNGs, um por frame
+        os.makedirs(saida, exist_ok=True)
+        for i, (episodio, passo, _) in enumerate(frames):
+            desenhar(i)
+            fig.savefig(os.path.join(saida, f"ep{episodio:04d}_passo{passo:04d}.png"))
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz episodios a partir do ficheiro de passos (sem correr a simulacao).")
+    parser.add_argument("parametros", help="ficheiro de parametros usado na corrida (cenario)")
+    parser.add_argument("--passos", help="ficheiro _passos.json (por omissao o derivado de ficheiro_metricas)")
+    parser.add_argument("--episodio", type=int, default=1, help="primeiro episodio a reproduzir")
+    parser.add_argument("--ate", type=int, help="ultimo episodio a reproduzir (por omissao so --episodio)")
+    parser.add_argument("--saida", default="replay.gif", help="ficheiro .gif/.mp4 ou pasta para PNGs")
+    parser.add_argument("--fps", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.parametros, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    ficheiro_passos = args.passos
+    if not ficheiro_passos:
+        motor = MotorDeSimulacao(parametros=parametros)
+        motor.ficheiro_metricas = parametros.get("ficheiro_metricas", motor.ficheiro_metricas)
+        ficheiro_passos = parametros.get("ficheiro_passos", motor._derivar_ficheiro_passos())
+    if not os.path.exists(ficheiro_passos):
+        print(f"Ficheiro de passos nao encontrado: {ficheiro_passos}")
+        sys.exit(1)
+
+    ambiente, agentes = construir_cenario(parametros)
+    indice = indexar_episodios(ficheiro_passos)
+    frames = []
+    for episodio in range(args.episodio, (args.ate or args.episodio) + 1):
+        if episodio not in indice:
+            print(f"Aviso: episodio {episodio} nao existe em {ficheiro_passos}")
+            continue
+        registos = iterar_episodio(ficheiro_passos, episodio, indice)
+        frames.extend((episodio, passo, grelha) for passo, grelha in reconstruir_frames(ambiente, agentes, registos))
+
+    if not frames:
+        sys.exit(1)
+    _exportar(frames, args.saida, args.fps)
+    print(f"{len(frames)} frames exportados para {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agregador_metricas import AgregadorMetricas, iterar_episodios
+
+
+def _registo(i):
+    return {"episodio": i, "recompensa_total": float(i), "recompensa_descontada": 0.0, "passos": i, "sucesso": i % 2 == 0}
+
+
+def test_jsonl_com_registo_invalido_a_meio(tmp_path):
+    caminho = tmp_path / "metricas.jsonl"
+    linhas = [json.dumps(_registo(i)) for i in range(1, 2000)]
+    linhas[1] = '{"episodio": 2, "recompensa_total": '
+    caminho.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    invalidos = []
+    episodios = [m["episodio"] for m in iterar_episodios(caminho, tamanho_bloco=256, invalidos=invalidos)]
+    assert episodios == [1] + list(range(3, 2000))
+    assert len(invalidos) == 1
+
+
+def test_lista_do_logger_com_registo_invalido_e_fim_truncado(tmp_path):
+    caminho = tmp_path / "metricas.json"
+    texto = json.dumps([_registo(i) for i in range(1, 51)], indent=2)
+    texto = texto.replace('"recompensa_total": 10.0', '"recompensa_total": 10.0.0')
+    caminho.write_text(texto[:-40], encoding="utf-8")
+
+    agregador = AgregadorMetricas()
+    agregador.adiciona_ficheiro(caminho)
+    assert list(agregador.episodios) == [i for i in range(1, 50) if i != 10]
+    assert agregador.resumo()["registos_invalidos"] == 1
+
+
+def test_lista_compacta_com_registo_invalido(tmp_path):
+    caminho = tmp_path / "metricas.json"
+    registos = [json.dumps(_registo(i)) for i in range(1, 6)]
+    registos[2] = '{"episodio": 3, "passos": }'
+    caminho.write_text("[" + ",".join(registos) + "]", encoding="utf-8")
+
+    invalidos = []
+    episodios = [m["episodio"] for m in iterar_episodios(caminho, invalidos=invalidos)]
+    assert episodios == [1, 2, 4, 5]
+    assert len(invalidos) == 1
@@ -0,0 +1,188 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from core.MotorDeSimulacao import MotorDeSimulacao
+
+
+def correr(parametros, semente=None, ficheiro=None):
+    """
+    Corre uma simulacao completa neste processo (sem prints) e devolve o resumo.
+    `parametros` e um dicionario ja carregado; `ficheiro` so serve para o relatorio.
+    """
+    if semente is not None:
+        random.seed(semente)
+    inicio = time.perf_counter()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        if parametros.get("ilhas"):
+            from core.ModeloIlhas import ModeloIlhas
+
+            ModeloIlhas(parametros).executa()
+            episodios = []
+        elif parametros.get("coevolucao"):
+            from core.Coevolucao import Coevolucao
+
+            Coevolucao(parametros).executa()
+            episodios = []
+        else:
+            motor = MotorDeSimulacao.de_parametros(parametros, ficheiro)
+            motor.executa()
+            episodios = motor.logger.episodios if motor.logger else []
+    duracao = time.perf_counter() - inicio
+    sucessos = sum(1 for e in episodios if e.get("sucesso"))
+    return {
+        "ficheiro": ficheiro,
+        "semente": semente,
+        "episodios": len(episodios),
+        "taxa_sucesso": sucessos / len(episodios) if episodios else 0.0,
+        "passos_medios": sum(e["passos"] for e in episodios) / len(episodios) if episodios else 0.0,
+        "duracao": duracao,
+    }
+
+
+def _ler_tarefa(linha):
+    """
+    Uma tarefa por linha (JSON): o caminho de um ficheiro de parametros,
+    os proprios parametros, ou {"ficheiro"|"parametros": ..., "semente": ...}.
+    """
+    tarefa = json.loads(linha)
+    if isinstance(tarefa, str):
+        tarefa = {"ficheiro": tarefa}
+    elif "agentes" in tarefa or "ambiente" in tarefa:
+        tarefa = {"parametros": tarefa}
+    parametros = tarefa.get("parametros")
+    if parametros is None:
+        if not tarefa.get("ficheiro"):
+            raise ValueError("tarefa sem 'ficheiro' nem 'parametros'")
+        with open(tarefa["ficheiro"], "r", encoding="utf-8") as f:
+            parametros = json.load(f)
+    return parametros, tarefa.get("semente"), tarefa.get("ficheiro")
+
+
+def servir(entrada, saida):
+    """
+    Modo trabalhador: um unico interpretador que corre as tarefas lidas de `entrada`
+    (JSON lines) e escreve um resumo por tarefa em `saida`, sem pagar o arranque
+    do Python, os imports nem a leitura dos modulos a cada corrida.
+    """
+    for linha in entrada:
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            parametros, semente, ficheiro = _ler_tarefa(linha)
+            resultado = correr(parametros, semente, ficheiro)
+        except Exception as e:  # uma tarefa invalida nao para o trabalhador
+            resultado = {"erro": f"{type(e).__name__}: {e}"}
+        saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        saida.flush()
+
+
+def _copia_isolada(ficheiro, pasta, episodios):
+    """
+    Copia dos parametros que escreve tudo em `pasta` (metricas, Q-tables, genomas),
+    para medir sem alterar os ficheiros do repositorio.
+    """
+    with open(ficheiro, "r", encoding="utf-8") as f:
+        parametros = json.load(f)
+    if episodios:
+        parametros["episodios"] = episodios
+    parametros["render"] = False
+    parametros["render_window"] = False
+    parametros.pop("ao_vivo", None)
+    parametros["ficheiro_metricas"] = os.path.join(pasta, "metricas.json")
+    parametros.pop("ficheiro_passos", None)
+    for cfg in parametros.get("agentes", []):
+        for chave in ("q_table", "ficheiro_genoma", "politica"):
+            if cfg.get(chave):
+                destino = os.path.join(pasta, os.path.basename(cfg[chave]))
+                if os.path.exists(cfg[chave]):
+                    shutil.copy(cfg[chave], destino)
+                cfg[chave] = destino
+    copia = os.path.join(pasta, "parametros.json")
+    with open(copia, "w", encoding="utf-8") as f:
+        json.dump(parametros, f)
+    return copia, parametros
+
+
+def medir_arranque(ficheiro_original, repeticoes, episodios=1):
+    """
+    Orcamento de arranque: custo por corrida de `python3 main.py` (processo novo)
+    e do mesmo trabalho num trabalhador ja quente, separado por fases.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        ficheiro, parametros = _copia_isolada(ficheiro_original, pasta, episodios)
+        return _medir(ficheiro, parametros, repeticoes, os.path.basename(ficheiro_original))
+
+
+def _medir(ficheiro, parametros, repeticoes, nome):
+    raiz = os.path.dirname(os.path.abspath(__file__))
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+    interpretador = (time.perf_counter() - inicio) / repeticoes
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        subprocess.run([sys.executable, "-c", "import core.MotorDeSimulacao"], cwd=raiz, check=True)
+    imports = (time.perf_counter() - inicio) / repeticoes - interpretador
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        subprocess.run([sys.executable, os.path.join(raiz, "main.py"), ficheiro], cwd=raiz, check=True, stdout=subprocess.DEVNULL)
+    frio = (time.perf_counter() - inicio) / repeticoes
+
+    leitura = construcao = 0.0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        with open(ficheiro, "r", encoding="utf-8") as f:
+            p = json.load(f)
+        meio = time.perf_counter()
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            motor = MotorDeSimulacao.de_parametros(p, ficheiro)
+            motor._parar_threads()
+        fim = time.perf_counter()
+        leitura += meio - inicio
+        construcao += fim - meio
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        correr(parametros, ficheiro=ficheiro)
+    quente = (time.perf_counter() - inicio) / repeticoes
+
+    ms = 1000.0
+    print(f"{nome} ({repeticoes} repeticoes, ms por corrida)")
+    print(f"  interpretador Python       {interpretador * ms:8.1f}")
+    print(f"  imports do motor           {imports * ms:8.1f}")
+    print(f"  leitura dos parametros     {leitura / repeticoes * ms:8.2f}")
+    print(f"  ambiente + agentes         {construcao / repeticoes * ms:8.2f}")
+    print(f"  main.py (processo novo)    {frio * ms:8.1f}")
+    print(f"  trabalhador quente         {quente * ms:8.1f}")
+    return frio, quente
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Trabalhador quente: corre muitas simulacoes no mesmo processo (tarefas em JSON lines no stdin)."
+    )
+    parser.add_argument("--medir", metavar="PARAMETROS", help="mede o orcamento de arranque com este ficheiro de parametros")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--episodios", type=int, default=1, help="episodios por corrida ao medir (0 = os dos parametros)")
+    args = parser.parse_args()
+
+    if args.medir:
+        medir_arranque(args.medir, args.repeticoes, args.episodios)
+    else:
+        servir(sys.stdin, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,165 @@
+import multiprocessing
+import queue
+import time
+
 import matplotlib.pyplot as plt
 import numpy as np
 
 
-class VisualizadorGrid:
+_MAPA_CORES = {".": 0, "#": 1, "F": 2, "R": 3, "N": 4}
+
+
+def mapear_grelha(grelha):
+    # simbolo da grelha -> indice de cor
+    return np.array([[_MAPA_CORES.get(c, 5) for c in linha] for linha in grelha])
+
+
+class _RenderizadorBlit:
+    """
+    Desenha a grelha com blitting: os artistas (imagem e um Text por celula)
+    sao criados uma vez; em cada frame so mudam as celulas alteradas e so a
+    area dos eixos e copiada para o ecra.
+    """
+
     def __init__(self):
+        plt.ion()
         self.fig, self.ax = plt.subplots()
         self.im = None
-        self.textos = []
-        plt.ion()
+        self.textos = {}
+        self.ultima = None
+        self.fundo = None
+        self.fig.canvas.mpl_connect("draw_event", self._ao_redesenhar)
 
-    def _mapear(self, grelha):
-        mapa = {".": 0, "#": 1, "F": 2, "R": 3, "N": 4}
-        mat = []
-        for linha in grelha:
-            mat.append([mapa.get(c, 5) for c in linha])
-        return np.array(mat)
+    def _ao_redesenhar(self, _evento):
+        # janela redimensionada/redesenhada: volta a guardar o fundo
+        self.fundo = self.fig.canvas.copy_from_bbox(self.ax.bbox)
+        self._desenhar_artistas()
 
-    def mostra(self, grelha):
-        mat = self._mapear(grelha)
+    def _inicializar(self, grelha):
+        self.im = self.ax.imshow(mapear_grelha(grelha), cmap="tab20", vmin=0, vmax=5, animated=True)
+        for y, linha in enumerate(grelha):
+            for x, _ in enumerate(linha):
+                self.textos[(x, y)] = self.ax.text(x, y, "", ha="center", va="center", color="black", animated=True)
+        self.fig.canvas.draw()
+        plt.pause(0.001)
+
+    def _desenhar_artistas(self):
         if self.im is None:
-            self.im = self.ax.imshow(mat, cmap="tab20")
-        else:
-            self.im.set_data(mat)
-        for t in self.textos:
-            t.remove()
-        self.textos = []
+            return
+        self.ax.draw_artist(self.im)
+        for t in self.textos.values():
+            if t.get_text():
+                self.ax.draw_artist(t)
+
+    def desenha(self, grelha):
+        if self.im is None:
+            self._inicializar(grelha)
+            self.ultima = [[None] * len(linha) for linha in grelha]
+
+        alterou = False
         for y, linha in enumerate(grelha):
+            anterior = self.ultima[y]
             for x, c in enumerate(linha):
-                if c not in [".", "#"]:
-                    self.textos.append(self.ax.text(x, y, c, ha="center", va="center", color="black"))
-        plt.pause(0.001)
+                if anterior[x] == c:
+                    continue
+                anterior[x] = c
+                alterou = True
+                self.textos[(x, y)].set_text("" if c in (".", "#") else c)
+        if alterou:
+            self.im.set_data(mapear_grelha(grelha))
+
+        canvas = self.fig.canvas
+        if self.fundo is None or not getattr(canvas, "supports_blit", True):
+            canvas.draw_idle()
+        else:
+            canvas.restore_region(self.fundo)
+            self._desenhar_artistas()
+            canvas.blit(self.ax.bbox)
+        canvas.flush_events()
+
+    def processa_eventos(self):
+        self.fig.canvas.flush_events()
+
+
+def _ciclo_render(fila):
+    render = _RenderizadorBlit()
+    while True:
+        try:
+            grelha = fila.get(timeout=0.05)
+        except queue.Empty:
+            render.processa_eventos()
+            continue
+        if grelha is None:
+            break
+        render.desenha(grelha)
+    plt.close(render.fig)
+
+
+class VisualizadorGrid:
+    """
+    Janela com a grelha do ambiente.
+    - a_cada: so mostra um frame a cada N passos.
+    - intervalo_min: tempo minimo (s) entre frames mostrados.
+    - processo_separado: desenha noutro processo; a simulacao so entrega a grelha
+      (sem esperar) e, se o desenho estiver atrasado, o frame e descartado.
+    """
+
+    def __init__(self, a_cada=1, intervalo_min=0.0, processo_separado=True):
+        self.a_cada = max(1, a_cada)
+        self.intervalo_min = max(0.0, intervalo_min)
+        self._contador = 0
+        self._ultimo_frame = None
+        self._fila = None
+        self._processo = None
+        self._render = None
+        self.frames_mostrados = 0
+        self.frames_descartados = 0
+
+        if processo_separado:
+            self._fila = multiprocessing.Queue(maxsize=1)
+            self._processo = multiprocessing.Process(target=_ciclo_render, args=(self._fila,), daemon=True)
+            self._processo.start()
+        else:
+            self._render = _RenderizadorBlit()
+
+    def proximo_frame(self):
+        """
+        Avanca um passo e diz se este passo deve ser mostrado
+        (permite ao motor nem sequer construir a grelha nos passos saltados).
+        """
+        self._contador += 1
+        if self._contador % self.a_cada:
+            return False
+        agora = time.perf_counter()
+        if self._ultimo_frame is not None and agora - self._ultimo_frame < self.intervalo_min:
+            return False
+        self._ultimo_frame = agora
+        return True
+
+    def desenha(self, grelha):
+        if self._render is not None:
+            self._render.desenha(grelha)
+            self.frames_mostrados += 1
+            return
+        try:
+            self._fila.put_nowait(grelha)
+            self.frames_mostrados += 1
+        except queue.Full:
+            self.frames_descartados += 1
+
+    def mostra(self, grelha):
+        if self.proximo_frame():
+            self.desenha(grelha)
+
+    def fechar(self):
+        if self._processo is not None:
+            try:
+                self._fila.put(None, timeout=1.0)
+            except queue.Full:
+                pass
+            self._processo.join(timeout=2.0)
+            if self._processo.is_alive():
+                self._processo.terminate()
+            self._processo = None
+        elif self._render is not None:
+            plt.close(self._render.fig)